@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# ruff: noqa: T201, E402
+from bootstrap import python_checks
+
+python_checks()
+
+# pylint: disable=wrong-import-position,wrong-import-order
+import argparse
+import logging.config
+import time
+from pathlib import Path
+
+from lxml import etree
+
+from scrapers import cachestore, jsoncodec, settings
+from scrapers.htmlparse import is_broken, lxml_parse, soup_parse
+
+logging.config.dictConfig(settings.LOGGING)
+log = logging.getLogger("benchmark")
+log.debug("Base logging configured")
+
+
+def parse_args():
+    log.debug("Parsing command line arguments")
+    parser = argparse.ArgumentParser(
+        description="Benchmark parts of the scrapers using the cache",
+    )
+
+    parser.add_argument(
+        "--loglevel",
+        type=str.upper,
+        default="INFO",
+        choices=["DEBUG", "INFO", "WARN", "ERROR", "CRITICAL"],
+    )
+
+    subparsers = parser.add_subparsers(
+        title="benchmarks",
+        description="valid benchmarks",
+        help="what to benchmark",
+        dest="benchmark",
+        required=True,
+    )
+
+    parser_html = subparsers.add_parser(
+        "html",
+        help="Compare lxml and soupparser on cached HTML, per shop",
+    )
+    parser_html.add_argument(
+        "--limit",
+        type=int,
+        default=200,
+        metavar="N",
+        help="Parse at most N files per shop. Default 200.",
+    )
+
+    parser_json = subparsers.add_parser(
+        "json",
+        help="Compare the JSON backends on cached JSON, per shop",
+    )
+    parser_json.add_argument(
+        "--limit",
+        type=int,
+        default=200,
+        metavar="N",
+        help="Load at most N files per shop. Default 200.",
+    )
+
+    args = parser.parse_args()
+
+    log.debug("Command line arguments: %s", args)
+    return args
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def benchmark_html(limit: int) -> None:
+    print(
+        f"{'shop':<24} {'files':>6} {'MiB':>8} {'soup s':>8} "
+        f"{'lxml s':>8} {'speed-up':>9} {'fallback':>9}",
+    )
+    for shop_dir in sorted(Path(settings.CACHE_BASE).iterdir()):
+        if not shop_dir.is_dir():
+            continue
+        files = sorted(cachestore.glob(shop_dir, "**/*.html"))[:limit]
+        if not files:
+            continue
+        size = soup_time = lxml_time = 0
+        fallbacks = 0
+        for path in files:
+            content = cachestore.read_text(path)
+            size += len(content)
+            seconds, _ = timed(soup_parse, content)
+            soup_time += seconds
+            try:
+                seconds, tree = timed(lxml_parse, content)
+                broken = is_broken(tree)
+            except (etree.ParserError, ValueError):
+                seconds, broken = 0, True
+            lxml_time += seconds
+            if broken:
+                fallbacks += 1
+                log.debug("lxml would fall back to soupparser for %s", path)
+        print(
+            f"{shop_dir.name:<24} {len(files):>6} {size / 2**20:>8.1f} "
+            f"{soup_time:>8.2f} {lxml_time:>8.2f} "
+            f"{soup_time / max(lxml_time, 1e-9):>8.1f}x {fallbacks:>9}",
+        )
+
+
+def benchmark_json(limit: int) -> None:
+    backends = [
+        backend
+        for backend in jsoncodec.BACKENDS
+        if jsoncodec.resolve_backend(backend) == backend
+    ]
+    print(
+        f"{'shop':<24} {'files':>6} {'MiB':>8} "
+        + " ".join(
+            f"{backend + ' ' + op:>14}"
+            for backend in backends
+            for op in ["load s", "dump s"]
+        ),
+    )
+    for shop_dir in sorted(Path(settings.CACHE_BASE).iterdir()):
+        if not shop_dir.is_dir():
+            continue
+        files = sorted(shop_dir.glob("**/*.json"))[:limit]
+        if not files:
+            continue
+        contents = [path.read_bytes() for path in files]
+        times = {}
+        for backend in backends:
+            load_time = dump_time = 0
+            for content in contents:
+                seconds, obj = timed(jsoncodec.loads, content, backend)
+                load_time += seconds
+                seconds, _ = timed(jsoncodec.dumps, obj, 4, backend)
+                dump_time += seconds
+            times[backend] = (load_time, dump_time)
+        print(
+            f"{shop_dir.name:<24} {len(files):>6} "
+            f"{sum(len(c) for c in contents) / 2**20:>8.1f} "
+            + " ".join(
+                f"{seconds:>14.3f}"
+                for backend in backends
+                for seconds in times[backend]
+            ),
+        )
+
+
+def main():
+    args = parse_args()
+    log.setLevel(level=args.loglevel)
+    if args.benchmark == "html":
+        benchmark_html(args.limit)
+    elif args.benchmark == "json":
+        benchmark_json(args.limit)
+
+
+if __name__ == "__main__":
+    main()
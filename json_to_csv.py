@@ -4,19 +4,18 @@ from bootstrap import python_checks
 python_checks()
 # ruff: noqa: E402
 import argparse
+import collections
 import csv
-import datetime as dt
 import decimal
+import heapq
 import logging.config
-import shutil
 import sys
-import urllib.request
+from collections.abc import Iterator
 from datetime import datetime
 from decimal import Decimal
 from pathlib import Path
 
-from scrapers import settings
-from scrapers.base import BaseScraper
+from scrapers import fileio, rates, settings
 
 logging.config.dictConfig(settings.LOGGING)
 log = logging.getLogger("json_to_csv")
@@ -84,49 +83,45 @@ def parse_args():
         required=True,
     )
 
-    for x in Path(settings.OUTPUT_FOLDER).glob("*.json"):
-        if x.stem != "schema":
-            subparsers.add_parser(x.stem)
+    subparsers.add_parser(
+        "all",
+        help="all shops in one csv, with a shop column, ordered by date",
+    )
+    for x in shop_export_paths():
+        subparsers.add_parser(x.stem)
     args = parser.parse_args()
 
     log.debug("Command line arguments: %s", args)
     return args
 
 
-def check_or_download_exr(syear: int, eyear: int) -> list[Path]:
-    eyear += 1
-    url = (
-        "https://data.norges-bank.no/api/data/EXR/B..NOK.SP?"
-        "startPeriod={year}-01-22&"
-        "endPeriod={year}-12-31&"
-        "format=csv&bom=include&locale=no"
+def shop_export_paths() -> list[Path]:
+    """The JSON exports of all shops in OUTPUT_FOLDER"""
+    return [
+        path
+        for path in sorted(Path(settings.OUTPUT_FOLDER).glob("*.json"))
+        if path.stem not in ["schema", "all"]
+    ]
+
+
+def shop_name(shop_json: dict) -> str:
+    return (
+        shop_json["metadata"]["name"]
+        if shop_json["metadata"]["name"] == shop_json["metadata"]["branch_name"]
+        else shop_json["metadata"]["branch_name"]
     )
-    now = datetime.now().astimezone()
-    curr_year = int(now.strftime("%Y"))
-    last_year = curr_year - 1
-
-    files = []
-    for exr_year in range(syear, eyear):
-        csv_file = settings.CACHE_BASE / f"EXR-{exr_year}.csv"
-        files.append(csv_file)
-        if not csv_file.is_file() or exr_year in [curr_year, last_year]:
-            if exr_year == last_year and csv_file.is_file():
-                last_year_modified = datetime.fromtimestamp(
-                    csv_file.stat().st_mtime,
-                ).astimezone()
-                if last_year_modified.year == curr_year:
-                    log.debug("Rates for %s found", exr_year)
-                    continue
-            log.debug("Downloading rate date for %s", exr_year)
-            with urllib.request.urlopen(  # noqa: S310
-                url.format(year=exr_year),
-            ) as response, csv_file.open(
-                "wb",
-            ) as csv_handle:
-                shutil.copyfileobj(response, csv_handle)
-        else:
-            log.debug("Rates for %s found", exr_year)
-    return files
+
+
+def index_orders(args, orders, index: list) -> Iterator[dict]:
+    """
+    Yields the orders from fileio.iter_json_list, adding (date, byte
+    offset) of those between --after and --before to index
+    """
+    for offset, order in orders:
+        date = datetime.strptime(order["date"], "%Y-%m-%d").astimezone()
+        if args.after < date < args.before:
+            index.append((order["date"], offset))
+        yield order
 
 
 def calculate_year_range_currencies(args, orders) -> list[int, int, set[str]]:
@@ -152,7 +147,7 @@ def calculate_year_range_currencies(args, orders) -> list[int, int, set[str]]:
     return ystart, yend, currencies
 
 
-def main():  # noqa: PLR0915, C901
+def main():  # noqa: PLR0912, PLR0915, C901
     args = parse_args()
 
     if args.after > args.before:
@@ -162,19 +157,40 @@ def main():  # noqa: PLR0915, C901
         )
         raise ValueError(msg)
 
-    rate_data = {}
-
-    shop_json = BaseScraper.read(
-        Path(settings.OUTPUT_FOLDER) / Path(args.source + ".json"),
-        from_json=True,
-    )
-    shop = (
-        shop_json["metadata"]["name"]
-        if shop_json["metadata"]["name"] == shop_json["metadata"]["branch_name"]
-        else shop_json["metadata"]["branch_name"]
-    )
-    log.info("Shop: %s", shop)
-    output = {}
+    if args.source == "all":
+        export_paths = shop_export_paths()
+    else:
+        export_paths = [
+            Path(settings.OUTPUT_FOLDER) / Path(args.source + ".json"),
+        ]
+
+    # Read the exports one order at a time, keeping only the date and
+    # byte offset of each order, so memory use does not grow with the
+    # size of the exports. The orders are read again by offset, in date
+    # order, when writing the csv.
+    exports = []
+    ystart, yend, currencies = None, None, set()
+    for export_path in export_paths:
+        # Everything in the export but the orders
+        shop_json, index = {}, []
+        orders = index_orders(
+            args,
+            fileio.iter_json_list(export_path, "orders", shop_json),
+            index,
+        )
+        if args.nok:
+            shop_start, shop_end, shop_currencies = (
+                calculate_year_range_currencies(args, orders)
+            )
+            if shop_start:
+                ystart = min(shop_start, ystart or shop_start)
+                yend = max(shop_end, yend or shop_end)
+            currencies |= shop_currencies
+        # Index what calculate_year_range_currencies did not read
+        collections.deque(orders, maxlen=0)
+        # By date, and file order within a date
+        index.sort()
+        exports.append((export_path, shop_json, index))
 
     if args.separator:
 
@@ -203,37 +219,19 @@ def main():  # noqa: PLR0915, C901
                 return force_separator(str(value))
 
             value = Decimal(value.replace(",", "."))
-            conv = Decimal(rate_data[curr][date]["value"].replace(",", "."))
-            mult = rate_data[curr][date]["mult"]
-
-            if mult == "0":
-                return force_separator(
-                    str(
-                        (value * conv).quantize(
-                            decimal.Decimal(".00"),
-                            decimal.ROUND_HALF_UP,
-                        ),
+            conv = exchange_rates.rate(curr, date)
+            return force_separator(
+                str(
+                    (value * conv).quantize(
+                        decimal.Decimal(".00"),
+                        decimal.ROUND_HALF_UP,
                     ),
-                )
-            if mult == "2":
-                return force_separator(
-                    str(
-                        ((value * conv) / 100).quantize(
-                            decimal.Decimal(".00"),
-                            decimal.ROUND_HALF_UP,
-                        ),
-                    ),
-                )
-            msg = f"Unexpected mult: {mult}"
-            raise ValueError(msg)
+                ),
+            )
 
         def curr_to_nok(_):
             return "NOK"
 
-        ystart, yend, currencies = calculate_year_range_currencies(
-            args,
-            shop_json["orders"],
-        )
         log.debug(
             "Year range (%s,%s), currencies: %s",
             ystart,
@@ -241,192 +239,144 @@ def main():  # noqa: PLR0915, C901
             ",".join(currencies),
         )
 
-        exr_files = check_or_download_exr(ystart, yend)
-
-        log.info("Loading EXR CSVs, this may take some time...")
-
-        for exr in exr_files:
-            with exr.open(newline="", encoding="utf-8-sig") as csvfile:
-                reader = csv.DictReader(csvfile, delimiter=";")
-                for row in reader:
-                    if row["BASE_CUR"] in currencies:
-                        if row["BASE_CUR"] not in rate_data:
-                            rate_data[row["BASE_CUR"]] = {}
-                        rate_data[row["BASE_CUR"]][row["TIME_PERIOD"]] = {
-                            "mult": row["UNIT_MULT"],
-                            "value": row["OBS_VALUE"],
-                        }
-
-        cur: dict
-
-        dend = min(
-            datetime(yend, 12, 31).astimezone(),
-            datetime.now().astimezone(),
-        )
-
-        # Loop over currencies in dict
-        for cur in rate_data.copy():
-            prev_mult = None
-            prev_date = None
-            prev_value = None
-            log.debug("Processing %s", cur)
-            # Loop over dates for currency
-            for date_str in sorted(rate_data[cur].copy().keys()):
-                date = datetime.strptime(
-                    date_str,
-                    "%Y-%m-%d",
-                ).astimezone()
-                if date > dend:
-                    # Stop processing currency if date is after
-                    # last required year
-                    break
-                if prev_date:
-                    exp_date = prev_date + dt.timedelta(days=1)
-                    # Look for "missing" dates
-                    if date != exp_date:
-                        # We got date, but expected exp_date
-                        while True:
-                            prev_date += dt.timedelta(days=1)
-                            if prev_date > dend:
-                                # Stop processing currency if date is after
-                                # last required year
-                                break
-
-                            if date_str == prev_date:
-                                # The current prev_date is the date we
-                                # read in this row, do not generate anymore
-                                break
-
-                            # Add missing dates to original dict
-                            rate_data[cur][prev_date.strftime("%Y-%m-%d")] = {
-                                "mult": prev_mult,
-                                "value": prev_value,
-                            }
-                prev_mult = rate_data[cur][date_str]["mult"]
-                prev_date = date
-                prev_value = rate_data[cur][date_str]["value"]
-
-    for order in shop_json["orders"]:
-        date_str = datetime.strptime(order["date"], "%Y-%m-%d").astimezone()
-        if date_str > args.after and date_str < args.before:
-            if order["date"] not in output:
-                output[order["date"]] = []
-            if not args.no_order_totals:
-                output[order["date"]].append(
-                    [
-                        order["date"],
-                        order["id"],
-                        (
-                            convert_to_nok(
-                                order["subtotal"]["value"],
-                                (
-                                    order["subtotal"]["currency"]
-                                    if "currency" in order["subtotal"]
-                                    else ""
-                                ),
-                                order["date"],
-                            )
-                            if "subtotal" in order
-                            else ""
-                        ),
-                        (
-                            curr_to_nok(order["subtotal"]["currency"])
-                            if "subtotal" in order
-                            and "currency" in order["subtotal"]
-                            else ""
-                        ),
-                        (
-                            convert_to_nok(
-                                order["shipping"]["value"],
-                                (
-                                    order["shipping"]["currency"]
-                                    if "currency" in order["shipping"]
-                                    else ""
-                                ),
-                                order["date"],
-                            )
-                            if "shipping" in order
-                            else ""
-                        ),
-                        (
-                            curr_to_nok(order["shipping"]["currency"])
-                            if "shipping" in order
-                            and "currency" in order["shipping"]
-                            else ""
-                        ),
-                        (
-                            convert_to_nok(
-                                order["tax"]["value"],
-                                (
-                                    order["tax"]["currency"]
-                                    if "currency" in order["tax"]
-                                    else ""
-                                ),
-                                order["date"],
-                            )
-                            if "tax" in order
-                            else ""
-                        ),
-                        (
-                            curr_to_nok(order["tax"]["currency"])
-                            if "tax" in order and "currency" in order["tax"]
-                            else ""
-                        ),
+        log.info("Loading exchange rates")
+        exchange_rates = rates.exchange_rates()
+        if ystart:
+            exchange_rates.load(ystart, yend)
+
+    def order_rows(order: dict) -> list[list[str]]:
+        rows = []
+        if not args.no_order_totals:
+            rows.append(
+                [
+                    order["date"],
+                    order["id"],
+                    (
                         convert_to_nok(
-                            order["total"]["value"],
+                            order["subtotal"]["value"],
                             (
-                                order["total"]["currency"]
-                                if "currency" in order["total"]
+                                order["subtotal"]["currency"]
+                                if "currency" in order["subtotal"]
                                 else ""
                             ),
                             order["date"],
-                        ),
-                        curr_to_nok(order["total"]["currency"]),
-                        "",
-                        "",
-                        "",
-                        "",
-                        "",
-                        "",
-                    ],
-                )
-            for item in order["items"]:
-                output[order["date"]].append(
-                    [
-                        order["date"],
-                        order["id"],
-                        "",
-                        "",
-                        "",
-                        "",
-                        "",
-                        "",
-                        "",
-                        "",
-                        item["name"],
-                        (item["variation"] if "variation" in item else ""),
-                        force_separator(item["quantity"]),
+                        )
+                        if "subtotal" in order
+                        else ""
+                    ),
+                    (
+                        curr_to_nok(order["subtotal"]["currency"])
+                        if "subtotal" in order
+                        and "currency" in order["subtotal"]
+                        else ""
+                    ),
+                    (
+                        convert_to_nok(
+                            order["shipping"]["value"],
+                            (
+                                order["shipping"]["currency"]
+                                if "currency" in order["shipping"]
+                                else ""
+                            ),
+                            order["date"],
+                        )
+                        if "shipping" in order
+                        else ""
+                    ),
+                    (
+                        curr_to_nok(order["shipping"]["currency"])
+                        if "shipping" in order
+                        and "currency" in order["shipping"]
+                        else ""
+                    ),
+                    (
+                        convert_to_nok(
+                            order["tax"]["value"],
+                            (
+                                order["tax"]["currency"]
+                                if "currency" in order["tax"]
+                                else ""
+                            ),
+                            order["date"],
+                        )
+                        if "tax" in order
+                        else ""
+                    ),
+                    (
+                        curr_to_nok(order["tax"]["currency"])
+                        if "tax" in order and "currency" in order["tax"]
+                        else ""
+                    ),
+                    convert_to_nok(
+                        order["total"]["value"],
                         (
-                            convert_to_nok(
-                                item["total"]["value"],
-                                (
-                                    item["total"]["currency"]
-                                    if "currency" in order["total"]
-                                    else ""
-                                ),
-                                order["date"],
-                            )
-                            if "total" in item
+                            order["total"]["currency"]
+                            if "currency" in order["total"]
                             else ""
                         ),
+                        order["date"],
+                    ),
+                    curr_to_nok(order["total"]["currency"]),
+                    "",
+                    "",
+                    "",
+                    "",
+                    "",
+                    "",
+                ],
+            )
+        rows.extend(
+            [
+                order["date"],
+                order["id"],
+                "",
+                "",
+                "",
+                "",
+                "",
+                "",
+                "",
+                "",
+                item["name"],
+                (item["variation"] if "variation" in item else ""),
+                force_separator(item["quantity"]),
+                (
+                    convert_to_nok(
+                        item["total"]["value"],
                         (
-                            curr_to_nok(item["total"]["currency"])
-                            if "total" in item
+                            item["total"]["currency"]
+                            if "currency" in order["total"]
                             else ""
                         ),
-                        ("1" if "tax" in order else "0"),
-                    ],
-                )
+                        order["date"],
+                    )
+                    if "total" in item
+                    else ""
+                ),
+                (
+                    curr_to_nok(item["total"]["currency"])
+                    if "total" in item
+                    else ""
+                ),
+                ("1" if "tax" in order else "0"),
+            ]
+            for item in order["items"]
+        )
+        return rows
+
+    def shop_rows(
+        export_path: Path,
+        shop_json: dict,
+        index: list[tuple[str, int]],
+    ) -> Iterator[list[str]]:
+        """The rows of the indexed orders in export_path, by date"""
+        shop = shop_name(shop_json)
+        log.info("Shop: %s", shop)
+        with export_path.open("rb") as file:
+            for _, offset in index:
+                order = fileio.read_json_at(file, offset)
+                for row in order_rows(order):
+                    yield [shop, *row] if args.source == "all" else row
 
     with (Path(settings.OUTPUT_FOLDER) / Path(args.source + ".csv")).open(
         "w",
@@ -442,7 +392,8 @@ def main():  # noqa: PLR0915, C901
                 options["delimiter"] = args.delimiter
         writer = csv.writer(out, dialect=csv.excel, **options)
         writer.writerow(
-            [
+            ["shop"] * (args.source == "all")
+            + [
                 "order_date",
                 "order_id",
                 "subtotal",
@@ -461,9 +412,15 @@ def main():  # noqa: PLR0915, C901
                 "order_has_tax",
             ],
         )
-        for sorted_date in dict(sorted(output.items())).values():
-            for order in sorted_date:
-                writer.writerow(order)
+        # Each shop's rows are sorted by date, merge them as they are
+        # written instead of collecting and sorting all of them
+        date_column = 1 if args.source == "all" else 0
+        writer.writerows(
+            heapq.merge(
+                *(shop_rows(*export) for export in exports),
+                key=lambda row: row[date_column],
+            ),
+        )
 
 
 if __name__ == "__main__":
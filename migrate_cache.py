@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# ruff: noqa: T201, E402
+from bootstrap import python_checks
+
+python_checks()
+
+# pylint: disable=wrong-import-position,wrong-import-order
+import argparse
+import logging.config
+from pathlib import Path
+
+from scrapers import blobstore, cachestore, settings
+
+logging.config.dictConfig(settings.LOGGING)
+log = logging.getLogger("migrate_cache")
+log.debug("Base logging configured")
+
+
+def parse_args():
+    log.debug("Parsing command line arguments")
+    parser = argparse.ArgumentParser(
+        description=(
+            "Rewrite the HTML in the cache with WS_CACHE_COMPRESSION, "
+            "or the compression given, and hardlink identical thumbnails "
+            "and PDFs to one file"
+        ),
+    )
+
+    parser.add_argument(
+        "--loglevel",
+        type=str.upper,
+        default="INFO",
+        choices=["DEBUG", "INFO", "WARN", "ERROR", "CRITICAL"],
+    )
+
+    parser.add_argument(
+        "--compression",
+        choices=["none", "gzip", "zstd"],
+        default=cachestore.METHOD,
+        help=f"Compression to use. Default {cachestore.METHOD}.",
+    )
+
+    parser.add_argument(
+        "--no-deduplicate",
+        action="store_true",
+        help="Do not hardlink identical files.",
+    )
+
+    args = parser.parse_args()
+
+    log.debug("Command line arguments: %s", args)
+    return args
+
+
+def main():
+    args = parse_args()
+    log.setLevel(level=args.loglevel)
+    method = cachestore.resolve_method(args.compression)
+    blob_folder = Path(settings.CACHE_BASE) / "blobs"
+    print(
+        f"{'shop':<24} {'files':>6} {'MiB before':>11} {'MiB after':>10} "
+        f"{'MiB deduplicated':>17}",
+    )
+    for shop_dir in sorted(Path(settings.CACHE_BASE).iterdir()):
+        if not shop_dir.is_dir() or shop_dir == blob_folder:
+            continue
+        count, before, after = cachestore.migrate(shop_dir, method)
+        saved = 0
+        if not args.no_deduplicate:
+            _, saved = blobstore.store_folder(shop_dir, blob_folder)
+        print(
+            f"{shop_dir.name:<24} {count:>6} "
+            f"{before / 2**20:>11.1f} {after / 2**20:>10.1f} "
+            f"{saved / 2**20:>17.1f}",
+        )
+
+
+if __name__ == "__main__":
+    main()
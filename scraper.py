@@ -7,9 +7,8 @@ import os
 from bootstrap import python_checks
 
 python_checks()
-# ruff: noqa: E402, F403
-from scrapers import *
-from scrapers import settings
+# ruff: noqa: E402
+from scrapers import registry, settings
 
 if settings.GH_TOKEN:
     os.environ["GH_TOKEN"] = settings.GH_TOKEN
@@ -37,6 +36,15 @@ def parse_args():  # noqa: PLR0915
         help="Do not close browser window.",
     )
 
+    parser.add_argument(
+        "--refresh-driver",
+        action="store_true",
+        help=(
+            "Look up geckodriver again, instead of using the one found "
+            "last time. Done automatically when Firefox is updated."
+        ),
+    )
+
     subparsers = parser.add_subparsers(
         title="sources",
         description="valid sources",
@@ -125,6 +133,28 @@ def parse_args():  # noqa: PLR0915
             ),
         )
 
+    def reparse_cache(parser):
+        parser.add_argument(
+            "--reparse-cache",
+            action="store_true",
+            help=(
+                "Rebuild order JSON from cached HTML using all CPU cores, "
+                "without starting a browser."
+            ),
+        )
+
+    def workers(parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            metavar="N",
+            help=(
+                "Scrape orders using N parallel browser sessions. "
+                "Each session uses a copy of the Firefox profile. Default 1."
+            ),
+        )
+
     parser_adafruit = subparsers.add_parser("adafruit")
 
     to_std_json(parser_adafruit)
@@ -133,6 +163,8 @@ def parse_args():  # noqa: PLR0915
 
     use_cached_orderlist(parser_aliexpress)
     to_std_json(parser_aliexpress)
+    reparse_cache(parser_aliexpress)
+    workers(parser_aliexpress)
 
     parser_amazon = subparsers.add_parser("amazon")
 
@@ -141,6 +173,8 @@ def parse_args():  # noqa: PLR0915
     force_scrape_item_pdf(parser_amazon)
     force_scrape_order_json(parser_amazon)
     to_std_json(parser_amazon)
+    reparse_cache(parser_amazon)
+    workers(parser_amazon)
 
     parser_amazon.add_argument(
         "-y",
@@ -197,6 +231,7 @@ def parse_args():  # noqa: PLR0915
     parser_ebay = subparsers.add_parser("ebay")
     use_cached_orderlist(parser_ebay)
     to_std_json(parser_ebay)
+    reparse_cache(parser_ebay)
     skip_item_pdf(parser_ebay)
     skip_item_thumb(parser_ebay)
     force_web_scrape(parser_ebay)
@@ -216,10 +251,12 @@ def parse_args():  # noqa: PLR0915
     parser_komplett = subparsers.add_parser("komplett")
     use_cached_orderlist(parser_komplett)
     to_std_json(parser_komplett)
+    reparse_cache(parser_komplett)
 
     parser_polyalkemi = subparsers.add_parser("polyalkemi")
     use_cached_orderlist(parser_polyalkemi)
     to_std_json(parser_polyalkemi)
+    reparse_cache(parser_polyalkemi)
 
     skip_order_pdf(parser_polyalkemi)
     skip_item_pdf(parser_polyalkemi)
@@ -229,6 +266,7 @@ def parse_args():  # noqa: PLR0915
     parser_tindie = subparsers.add_parser("tindie")
     use_cached_orderlist(parser_tindie)
     to_std_json(parser_tindie)
+    reparse_cache(parser_tindie)
     skip_item_pdf(parser_tindie)
     skip_item_thumb(parser_tindie)
 
@@ -242,9 +280,7 @@ def main():
     args = parse_args()
     log.setLevel(level=args.loglevel)
 
-    scraper_class = next(
-        y for x, y in globals().items() if x.lower() == args.source + "scraper"
-    )
+    scraper_class = registry.scraper_class(args.source)
     log.debug("Loaded %s based on %s", scraper_class, args.source)
 
     if (
@@ -255,6 +291,8 @@ def main():
         scraper_class(args).command_to_std_json()
     elif hasattr(args, "to_std_json") and args.to_std_json:
         log.error("%s does not support to_std_json", args.source)
+    elif getattr(args, "reparse_cache", False):
+        scraper_class(args).command_reparse_cache()
     else:
         scraper_class(args).command_scrape()
 
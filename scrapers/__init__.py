@@ -1,18 +1,28 @@
-from .adafruit import AdafruitScraper
-from .aliexpress import AliExpressScraper
-from .amazon import AmazonScraper
-from .base import BaseScraper, PagePart
-from .digikey import DigikeyScraper
-from .distrelec import DistrelecScraper
-from .ebay import EbayScraper
-from .imap import IMAPScraper
-from .jula import JulaScraper
-from .kjell import KjellScraper
-from .komplett import KomplettScraper
-from .pimoroni import PimoroniScraper
-from .polyalkemi import PolyalkemiScraper
-from .tindie import TindieScraper
-from .utils import AMBER, BLUE, GREEN, RED
+import importlib
+
+# Imported on first use (PEP 562), so i.e. "from scrapers import
+# settings" does not import every shop and Selenium
+_LAZY = {
+    "AdafruitScraper": ".adafruit",
+    "AliExpressScraper": ".aliexpress",
+    "AmazonScraper": ".amazon",
+    "BaseScraper": ".base",
+    "PagePart": ".base",
+    "DigikeyScraper": ".digikey",
+    "DistrelecScraper": ".distrelec",
+    "EbayScraper": ".ebay",
+    "IMAPScraper": ".imap",
+    "JulaScraper": ".jula",
+    "KjellScraper": ".kjell",
+    "KomplettScraper": ".komplett",
+    "PimoroniScraper": ".pimoroni",
+    "PolyalkemiScraper": ".polyalkemi",
+    "TindieScraper": ".tindie",
+    "AMBER": ".utils",
+    "BLUE": ".utils",
+    "GREEN": ".utils",
+    "RED": ".utils",
+}
 
 __all__ = [
     "AdafruitScraper",
@@ -35,3 +45,16 @@ __all__ = [
     "AMBER",
     "GREEN",
 ]
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        msg = f"module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(msg)
+    value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
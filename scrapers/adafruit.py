@@ -1,5 +1,4 @@
 import csv
-import json
 import re
 import time
 from datetime import datetime
@@ -8,7 +7,7 @@ from typing import TYPE_CHECKING, Final
 
 from selenium.webdriver.common.by import By
 
-from . import settings
+from . import jsoncodec, settings
 from .base import BaseScraper, PagePart
 
 if TYPE_CHECKING:
@@ -99,94 +98,98 @@ class AdafruitScraper(BaseScraper):
             "?main_page=account_history_info&order_id={order_id}",
             "https://www.adafruit.com/product/{item_id}",
         )
+        self.output_schema_json(structure, self.std_json_orders())
 
-        raw_orders = []
-        for filename in self.cache["ORDERS"].glob("*/order.json"):
-            with open(filename, encoding="utf-8") as input_file:
-                raw_orders.append(json.load(input_file))
-        filename_base = self.cache["BASE"]
+    def std_json_orders(self):
+        """Yields the orders for command_to_std_json, one at a time"""
+        return self.std_json_cached(
+            sorted(self.glob_cache(self.cache["ORDERS"], "*/order.json")),
+        )
 
-        for order_id_obj in raw_orders:
-            for order_id, order_obj in order_id_obj.items():
-                order_object = {
-                    "id": order_id,
-                    "date": (
-                        datetime.fromisoformat(order_obj["date_purchased"])
-                        .date()
-                        .isoformat()
+    def std_json_order(self, filename: Path) -> list[dict]:
+        """Converts the orders in filename for the JSON export"""
+        filename_base = self.cache["BASE"]
+        order_id_obj = jsoncodec.load(filename)
+        orders = []
+        for order_id, order_obj in order_id_obj.items():
+            order_object = {
+                "id": order_id,
+                "date": (
+                    datetime.fromisoformat(order_obj["date_purchased"])
+                    .date()
+                    .isoformat()
+                ),
+                "items": [],
+                "total": {
+                    "value": f'{order_obj["total"]}',
+                    "currency": "USD",
+                },
+                "subtotal": {
+                    "value": f'{order_obj["subtotal"]}',
+                    "currency": "USD",
+                },
+                "shipping": {
+                    "value": f'{order_obj["shipping"]}',
+                    "currency": "USD",
+                },
+                "tax": {"value": f'{order_obj["tax"]}', "currency": "USD"},
+            }
+            for item_id, item_data in order_obj["items"].items():
+                assert self.can_read(filename_base / item_data["png"])
+                assert self.can_read(filename_base / item_data["html"])
+                assert self.can_read(filename_base / item_data["pdf"])
+                item_obj = {
+                    "id": item_id,
+                    "name": item_data["product name"],
+                    "quantity": int(item_data["quantity"]),
+                    "thumbnail": item_data["png"],
+                    "total": self.get_value_currency(
+                        "price",
+                        item_data["price"],
+                        "USD",
+                    ),
+                    "subtotal": self.get_value_currency(
+                        "subtotal",
+                        item_data["subtotal"],
+                        "USD",
                     ),
-                    "items": [],
-                    "total": {
-                        "value": f'{order_obj["total"]}',
-                        "currency": "USD",
-                    },
-                    "subtotal": {
-                        "value": f'{order_obj["subtotal"]}',
-                        "currency": "USD",
-                    },
-                    "shipping": {
-                        "value": f'{order_obj["shipping"]}',
-                        "currency": "USD",
-                    },
-                    "tax": {"value": f'{order_obj["tax"]}', "currency": "USD"},
+                    "attachments": [
+                        {
+                            "name": "Item PDF",
+                            "path": item_data["pdf"],
+                            "comment": "PDF print of item page",
+                        },
+                        {
+                            "name": "Item HTML",
+                            "path": item_data["html"],
+                            "comment": "HTML Scrape of item page",
+                        },
+                    ],
                 }
-                for item_id, item_data in order_obj["items"].items():
-                    assert self.can_read(filename_base / item_data["png"])
-                    assert self.can_read(filename_base / item_data["html"])
-                    assert self.can_read(filename_base / item_data["pdf"])
-                    item_obj = {
-                        "id": item_id,
-                        "name": item_data["product name"],
-                        "quantity": int(item_data["quantity"]),
-                        "thumbnail": item_data["png"],
-                        "total": self.get_value_currency(
-                            "price",
-                            item_data["price"],
-                            "USD",
-                        ),
-                        "subtotal": self.get_value_currency(
-                            "subtotal",
-                            item_data["subtotal"],
-                            "USD",
-                        ),
-                        "attachments": [
-                            {
-                                "name": "Item PDF",
-                                "path": item_data["pdf"],
-                                "comment": "PDF print of item page",
-                            },
-                            {
-                                "name": "Item HTML",
-                                "path": item_data["html"],
-                                "comment": "HTML Scrape of item page",
-                            },
-                        ],
-                    }
-                    del item_data["html"]
-                    del item_data["pdf"]
-                    del item_data["png"]
-                    del item_data["product name"]
-                    del item_data["quantity"]
-                    del item_data["subtotal"]
-                    del item_data["price"]
-
-                    item_obj["extra_data"] = item_data
-                    order_object["items"].append(item_obj)
-
-                # Not deleting order_obj['date_purchased'] because it
-                # contains more data than we save in "date"
-                del order_obj["total"]
-                del order_obj["subtotal"]
-                del order_obj["tax"]
-                del order_obj["shipping"]
-
-                del order_obj["items"]
-                # Add all remaning keys to the new object
-                order_object["extra_data"] = order_obj
-
-                structure["orders"].append(order_object)
-
-        self.output_schema_json(structure)
+                del item_data["html"]
+                del item_data["pdf"]
+                del item_data["png"]
+                del item_data["product name"]
+                del item_data["quantity"]
+                del item_data["subtotal"]
+                del item_data["price"]
+
+                item_obj["extra_data"] = item_data
+                order_object["items"].append(item_obj)
+
+            # Not deleting order_obj['date_purchased'] because it
+            # contains more data than we save in "date"
+            del order_obj["total"]
+            del order_obj["subtotal"]
+            del order_obj["tax"]
+            del order_obj["shipping"]
+
+            del order_obj["items"]
+            # Add all remaning keys to the new object
+            order_object["extra_data"] = order_obj
+
+            orders.append(order_object)
+        return orders
 
     def browser_save_item_info(self, orders):
         max_items = settings.ADA_ITEMS_MAX + 1
@@ -317,14 +320,7 @@ class AdafruitScraper(BaseScraper):
                         binary=True,
                     )
 
-                    self.remove(self.cache["PDF_TEMP_FILENAME"])
-                    self.browser.execute_script("window.print();")
-                    self.wait_for_stable_file(self.cache["PDF_TEMP_FILENAME"])
-
-                    self.move_file(
-                        self.cache["PDF_TEMP_FILENAME"],
-                        pdf_filename,
-                    )
+                    self.browser_print_to_pdf(pdf_filename)
 
                     self.write(
                         html_filename,
@@ -360,6 +356,7 @@ class AdafruitScraper(BaseScraper):
             order_handle = brws.current_window_handle
             href = guide_link.get_attribute("href")
             brws.switch_to.new_window()
+            self.throttle(href)
             brws.get(href)
             guide_links: list[WebElement] = self.find_elements(
                 By.CSS_SELECTOR,
@@ -1,15 +1,12 @@
 # ruff: noqa: C901, PLR0912, PLR0915
 import base64
-import os
 import re
 import time
 from datetime import datetime
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, Final
 
-from lxml.etree import tostring
 from lxml.html import HtmlElement
-from lxml.html.soupparser import fromstring
 from selenium.common.exceptions import (
     ElementClickInterceptedException,
     NoSuchElementException,
@@ -22,8 +19,9 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions
 from selenium.webdriver.support.wait import WebDriverWait
 
-from . import settings
+from . import cachestore, settings
 from .base import BaseScraper
+from .htmlparse import parse_html
 
 # pylint: disable=unused-import
 from .utils import AMBER, RED
@@ -48,182 +46,187 @@ class AliExpressScraper(BaseScraper):
             "https://www.aliexpress.com/p/order/detail.html?orderId={order_id}",
             "https://www.aliexpress.com/item/{item_id}.html",
         )
+        self.output_schema_json(structure, self.std_json_orders())
+
+    def std_json_orders(self):
+        """Yields the orders for command_to_std_json, one at a time"""
+        return self.std_json_cached(
+            sorted(self.cache["ORDERS"].glob("**/*.json")),
+        )
+
+    def std_json_order(self, json_order_file: Path) -> list[dict]:
+        """Converts the order in json_order_file for the JSON export"""
         filename_base = self.cache["BASE"]
-        for json_order_file in self.cache["ORDERS"].glob("**/*.json"):
-            oob = self.read(json_order_file, from_json=True)
-            self.log.debug(
-                "Processing %s/%s",
-                json_order_file.parent.name,
-                json_order_file.name,
-            )
+        oob = self.read(json_order_file, from_json=True)
+        self.log.debug(
+            "Processing %s/%s",
+            json_order_file.parent.name,
+            json_order_file.name,
+        )
+
+        if not self.can_read(filename_base / oob["tracking_cache_file"]):
+            msg = f"Could not read {filename_base / oob['tracking_cache_file']}"
+            raise RuntimeError(msg)
+        if not self.can_read(filename_base / oob["cache_file"]):
+            msg = f"Could not read {filename_base / oob['cache_file']}"
+            raise RuntimeError(msg)
+        order_obj = {
+            "id": oob["id"],
+            "date": (datetime.fromisoformat(oob["date"]).date().isoformat()),
+            "items": [],
+            "attachments": [
+                {
+                    "name": "Order tracking HTML",
+                    "path": oob["tracking_cache_file"],
+                    "comment": "HTML Scrape of item tracking page",
+                },
+                {
+                    "name": "Order HTML",
+                    "path": oob["cache_file"],
+                    "comment": "HTML Scrape of order page",
+                },
+            ],
+        }
+        for price_name, price_value in oob["price_items"].copy().items():
+            if price_name.lower() in [
+                "total",
+                "tax",
+                "subtotal",
+                "shipping",
+            ]:
+                del oob["price_items"][price_name]
+                order_obj[price_name.lower()] = self.get_value_currency(
+                    price_name,
+                    price_value,
+                )
+
+        if not oob["price_items"]:
+            del oob["price_items"]
+        if "total" in order_obj:
+            del oob["total"]
+        else:
+            msg = "Total not from price_items"
+            raise NotImplementedError(msg)
+
+        del oob["tracking"]
+        del oob["id"]
+        del oob["contact_info"]
+        # We do not delete date, since it in theory is a timestamp
 
-            if not self.can_read(filename_base / oob["tracking_cache_file"]):
-                msg = f"Could not read {filename_base / oob['tracking_cache_file']}"
+        del oob["tracking_cache_file"]
+        del oob["cache_file"]
+
+        for item_sku_id, item_obj in oob["items"].items():
+            if not self.can_read(filename_base / item_obj["thumbnail"]):
+                self.log.error(
+                    (
+                        "Could not find thumbnail for "
+                        "order %s, item %s/%s/%s), %s"
+                    ),
+                    order_obj["id"],
+                    item_sku_id.split("-")[0],
+                    item_obj["title"],
+                    item_obj["sku"],
+                    item_obj["thumbnail"],
+                )
+            if (
+                "snapshot" in item_obj
+                and item_obj["snapshot"]["html"]
+                and not self.can_read(
+                    filename_base / item_obj["snapshot"]["html"],
+                )
+            ):
+                self.log.error(
+                    (
+                        "Could not find html snapshot for order %s,"
+                        " item %s/%s/%s)"
+                    ),
+                    order_obj["id"],
+                    item_sku_id.split("-")[0],
+                    item_obj["title"],
+                    item_obj["sku"],
+                )
+                msg = (
+                    "Could not find html snapshot "
+                    f"for order {order_obj['id']}"
+                )
                 raise RuntimeError(msg)
-            if not self.can_read(filename_base / oob["cache_file"]):
-                msg = f"Could not read {filename_base / oob['cache_file']}"
+            if (
+                "snapshot" in item_obj
+                and item_obj["snapshot"]["pdf"]
+                and not self.can_read(
+                    filename_base / item_obj["snapshot"]["pdf"],
+                )
+            ):
+                self.log.error(
+                    (
+                        "Could not find pdf snapshot for order %s,"
+                        " item %s/%s/%s)"
+                    ),
+                    order_obj["id"],
+                    item_sku_id.split("-")[0],
+                    item_obj["title"],
+                    item_obj["sku"],
+                )
+                msg = (
+                    "Could not find pdf snapshot "
+                    "for order {order_obj['id']}"
+                )
                 raise RuntimeError(msg)
-            order_obj = {
-                "id": oob["id"],
-                "date": (
-                    datetime.fromisoformat(oob["date"]).date().isoformat()
+            if "price" in item_obj:
+                price = item_obj["price"]
+                del oob["items"][item_sku_id]["price"]
+            else:
+                price = item_obj["total"]
+                del oob["items"][item_sku_id]["total"]
+            item_obj_out = {
+                "id": item_sku_id.split("-")[0],
+                "name": item_obj["title"],
+                "variation": item_obj["sku"],
+                "quantity": item_obj["count"],
+                "thumbnail": item_obj["thumbnail"],
+                "total": self.get_value_currency(
+                    "price",
+                    price,
                 ),
-                "items": [],
-                "attachments": [
+                "attachments": [],
+            }
+            if "snapshot" in item_obj and item_obj["snapshot"]["pdf"]:
+                item_obj_out["attachments"].append(
                     {
-                        "name": "Order tracking HTML",
-                        "path": oob["tracking_cache_file"],
-                        "comment": "HTML Scrape of item tracking page",
+                        "name": "Item PDF",
+                        "path": item_obj["snapshot"]["pdf"],
+                        "comment": "PDF print of item snapshot page",
                     },
+                )
+            if "snapshot" in item_obj and item_obj["snapshot"]["html"]:
+                item_obj_out["attachments"].append(
                     {
-                        "name": "Order HTML",
-                        "path": oob["cache_file"],
-                        "comment": "HTML Scrape of order page",
+                        "name": "Item HTML",
+                        "path": item_obj["snapshot"]["html"],
+                        "comment": "HTML Scrape of item snapshot page",
                     },
-                ],
-            }
-            for price_name, price_value in oob["price_items"].copy().items():
-                if price_name.lower() in [
-                    "total",
-                    "tax",
-                    "subtotal",
-                    "shipping",
-                ]:
-                    del oob["price_items"][price_name]
-                    order_obj[price_name.lower()] = self.get_value_currency(
-                        price_name,
-                        price_value,
-                    )
-
-            if not oob["price_items"]:
-                del oob["price_items"]
-            if "total" in order_obj:
-                del oob["total"]
-            else:
-                msg = "Total not from price_items"
-                raise NotImplementedError(msg)
-
-            del oob["tracking"]
-            del oob["id"]
-            del oob["contact_info"]
-            # We do not delete date, since it in theory is a timestamp
-
-            del oob["tracking_cache_file"]
-            del oob["cache_file"]
-
-            for item_sku_id, item_obj in oob["items"].items():
-                if not self.can_read(filename_base / item_obj["thumbnail"]):
-                    self.log.error(
-                        (
-                            "Could not find thumbnail for "
-                            "order %s, item %s/%s/%s), %s"
-                        ),
-                        order_obj["id"],
-                        item_sku_id.split("-")[0],
-                        item_obj["title"],
-                        item_obj["sku"],
-                        item_obj["thumbnail"],
-                    )
-                if (
-                    "snapshot" in item_obj
-                    and item_obj["snapshot"]["html"]
-                    and not self.can_read(
-                        filename_base / item_obj["snapshot"]["html"],
-                    )
-                ):
-                    self.log.error(
-                        (
-                            "Could not find html snapshot for order %s,"
-                            " item %s/%s/%s)"
-                        ),
-                        order_obj["id"],
-                        item_sku_id.split("-")[0],
-                        item_obj["title"],
-                        item_obj["sku"],
-                    )
-                    msg = (
-                        "Could not find html snapshot "
-                        f"for order {order_obj['id']}"
-                    )
-                    raise RuntimeError(msg)
-                if (
-                    "snapshot" in item_obj
-                    and item_obj["snapshot"]["pdf"]
-                    and not self.can_read(
-                        filename_base / item_obj["snapshot"]["pdf"],
-                    )
-                ):
-                    self.log.error(
-                        (
-                            "Could not find pdf snapshot for order %s,"
-                            " item %s/%s/%s)"
-                        ),
-                        order_obj["id"],
-                        item_sku_id.split("-")[0],
-                        item_obj["title"],
-                        item_obj["sku"],
-                    )
-                    msg = (
-                        "Could not find pdf snapshot "
-                        "for order {order_obj['id']}"
-                    )
-                    raise RuntimeError(msg)
-                if "price" in item_obj:
-                    price = item_obj["price"]
-                    del oob["items"][item_sku_id]["price"]
-                else:
-                    price = item_obj["total"]
-                    del oob["items"][item_sku_id]["total"]
-                item_obj_out = {
-                    "id": item_sku_id.split("-")[0],
-                    "name": item_obj["title"],
-                    "variation": item_obj["sku"],
-                    "quantity": item_obj["count"],
-                    "thumbnail": item_obj["thumbnail"],
-                    "total": self.get_value_currency(
-                        "price",
-                        price,
-                    ),
-                    "attachments": [],
-                }
-                if "snapshot" in item_obj and item_obj["snapshot"]["pdf"]:
-                    item_obj_out["attachments"].append(
-                        {
-                            "name": "Item PDF",
-                            "path": item_obj["snapshot"]["pdf"],
-                            "comment": "PDF print of item snapshot page",
-                        },
-                    )
-                if "snapshot" in item_obj and item_obj["snapshot"]["html"]:
-                    item_obj_out["attachments"].append(
-                        {
-                            "name": "Item HTML",
-                            "path": item_obj["snapshot"]["html"],
-                            "comment": "HTML Scrape of item snapshot page",
-                        },
-                    )
-
-                order_obj["items"].append(item_obj_out)
+                )
 
-                del oob["items"][item_sku_id]["sku"]
-                del oob["items"][item_sku_id]["count"]
-                del oob["items"][item_sku_id]["title"]
-                if "snapshot" in item_obj:
-                    del oob["items"][item_sku_id]["snapshot"]
-                del oob["items"][item_sku_id]["thumbnail"]
+            order_obj["items"].append(item_obj_out)
 
-                if oob["items"][item_sku_id] != {}:
-                    msg = (
-                        "Item dict not empty: "
-                        f"{item_sku_id.split('-')[0]}, "
-                        f"{oob['items'][item_sku_id]}"
-                    )
-                    raise ValueError(msg)
+            del oob["items"][item_sku_id]["sku"]
+            del oob["items"][item_sku_id]["count"]
+            del oob["items"][item_sku_id]["title"]
+            if "snapshot" in item_obj:
+                del oob["items"][item_sku_id]["snapshot"]
+            del oob["items"][item_sku_id]["thumbnail"]
 
-            del oob["items"]
-            structure["orders"].append(order_obj)
+            if oob["items"][item_sku_id] != {}:
+                msg = (
+                    "Item dict not empty: "
+                    f"{item_sku_id.split('-')[0]}, "
+                    f"{oob['items'][item_sku_id]}"
+                )
+                raise ValueError(msg)
 
-        self.output_schema_json(structure)
+        del oob["items"]
+        return [order_obj]
 
     def setup_templates(self):
         # pylint: disable=invalid-name
@@ -425,6 +428,7 @@ class AliExpressScraper(BaseScraper):
 
         counter = 0
         max_orders_reached = False
+        to_scrape = []
         for order in orders:
             if (
                 settings.ALI_ORDERS_MAX > 0
@@ -453,52 +457,69 @@ class AliExpressScraper(BaseScraper):
             if self.can_read(Path(json_filename)):
                 self.log.info("Json for order %s found, skipping", order["id"])
                 continue
-            self.log.debug("#" * 30)
-            self.log.debug("Scraping order ID %s", order["id"])
-            order_html: HtmlElement = HtmlElement()
+            to_scrape.append(order)
 
-            order["cache_file"] = self.ORDER_FILENAME_TEMPLATE.format(
-                order_id=order["id"],
-                ext="html",
-            )
-            if self.can_read(order["cache_file"]):
-                order_html = fromstring(self.read(order["cache_file"]))
-            else:
-                order_html = self.browser_scrape_order_details(order)
+        self.browser_pool_map(
+            lambda scraper, order: scraper.scrape_individual_order(order),
+            to_scrape,
+            self.ORDER_LIST_URL,
+        )
+        self.browser_safe_quit()
 
-            order_data = self.lxml_parse_individual_order(
-                order_html,
-                order["id"],
-            )
-            order.update(order_data)
+    def scrape_individual_order(self, order: dict):
+        """
+        Scrapes and saves a single order, its tracking info, thumbnails
+        and item snapshots.
+        """
+        json_filename = self.ORDER_FILENAME_TEMPLATE.format(
+            order_id=order["id"],
+            ext="json",
+        )
+        self.log.debug("#" * 30)
+        self.log.debug("Scraping order ID %s", order["id"])
+        order_html: HtmlElement = HtmlElement()
 
-            tracking = self.lxml_parse_tracking_html(
-                order,
-                self.get_scrape_tracking_page_html(order),
-            )
-            order["tracking"] = tracking
+        order["cache_file"] = self.ORDER_FILENAME_TEMPLATE.format(
+            order_id=order["id"],
+            ext="html",
+        )
+        if self.can_read(order["cache_file"]):
+            order_source = None
+            order_html = self.read(order["cache_file"], from_html=True)
+        else:
+            order_source = self.browser_scrape_order_details(order)
+            order_html = parse_html(order_source)
+
+        order_data = self.lxml_parse_individual_order(
+            order_html,
+            order["id"],
+        )
+        order.update(order_data)
+
+        tracking = self.lxml_parse_tracking_html(
+            order,
+            self.get_scrape_tracking_page_html(order),
+        )
+        order["tracking"] = tracking
 
-            # We do this after all "online" scraping is complete
+        # We do this after all "online" scraping is complete
+        if order_source is not None:
             self.log.info("Writing order details page to cache")
-            self.write(
-                Path(order["cache_file"]),
-                tostring(order_html).decode("utf-8"),
-            )
+            self.write(Path(order["cache_file"]), order_source, html=True)
 
-            # Make Paths relative before json
-            order["cache_file"] = str(
-                Path(order["cache_file"])
-                .relative_to(self.cache["BASE"])
-                .as_posix(),
-            )
+        # Make Paths relative before json
+        order["cache_file"] = str(
+            Path(order["cache_file"])
+            .relative_to(self.cache["BASE"])
+            .as_posix(),
+        )
 
-            order["tracking_cache_file"] = str(
-                Path(order["tracking_cache_file"])
-                .relative_to(self.cache["BASE"])
-                .as_posix(),
-            )
-            self.write(json_filename, order, to_json=True)
-        self.browser_safe_quit()
+        order["tracking_cache_file"] = str(
+            Path(order["tracking_cache_file"])
+            .relative_to(self.cache["BASE"])
+            .as_posix(),
+        )
+        self.write(json_filename, order, to_json=True)
 
     def load_order_list_html(self):
         """
@@ -508,9 +529,8 @@ class AliExpressScraper(BaseScraper):
             Returns:
                 order_list_html (str): The HTML from the order list page
         """
-        if self.options.use_cached_orderlist and os.access(
+        if self.options.use_cached_orderlist and self.can_read(
             self.ORDER_LIST_FILENAME,
-            os.R_OK,
         ):
             self.log.info(
                 "Loading order list from cache: %s",
@@ -604,7 +624,7 @@ class AliExpressScraper(BaseScraper):
             Returns:
                 orders (List[Dict]): List or order Dicts
         """
-        root = fromstring(order_list_html)
+        root = parse_html(order_list_html)
         order_items = root.xpath('//div[@class="order-item"]')
         orders = []
         for order in order_items:
@@ -688,7 +708,7 @@ class AliExpressScraper(BaseScraper):
         of the item's snapshots, since this must be done live.
 
             Returns:
-                order_html (HtmlElement): The HTML from
+                order_source (str): The HTML from
                 this order['id'] details page
         """
         url = self.ORDER_DETAIL_URL.format(order["id"])
@@ -832,7 +852,7 @@ class AliExpressScraper(BaseScraper):
                 move_mouse=move_mouse,
             )
 
-        return fromstring(brws.page_source)
+        return brws.page_source
 
     def browser_save_item_thumbnail(
         self,
@@ -954,18 +974,9 @@ class AliExpressScraper(BaseScraper):
                 self.log.debug("Found snapshot tab")
                 self.browser_cleanup_item_page()
                 time.sleep(2)
-                self.remove(self.cache["PDF_TEMP_FILENAME"])
 
                 self.log.debug("Trying to print to PDF")
-                self.browser.execute_script("window.print();")
-                # Do some read- and size change tests
-                # to try to detect when printing is complete
-                while not self.can_read(self.cache["PDF_TEMP_FILENAME"]):
-                    self.log.debug("PDF file does not exist yet")
-                    time.sleep(1)
-                self.wait_for_stable_file(self.cache["PDF_TEMP_FILENAME"])
-                self.move_file(
-                    self.cache["PDF_TEMP_FILENAME"],
+                self.browser_print_to_pdf(
                     order["items"][item_sku_id]["snapshot"]["pdf"],
                 )
                 self.write(
@@ -1073,15 +1084,12 @@ class AliExpressScraper(BaseScraper):
         order[
             "tracking_cache_file"
         ] = self.TRACKING_HTML_FILENAME_TEMPLATE.format(order_id=order["id"])
-        if os.access(order["tracking_cache_file"], os.R_OK):
-            with Path(order["tracking_cache_file"]).open(
-                encoding="utf-8",
-            ) as ali_ordre:
-                self.log.debug(
-                    "Loading individual order tracking data cache: %s",
-                    order["tracking_cache_file"],
-                )
-                return fromstring(ali_ordre.read())
+        if self.can_read(order["tracking_cache_file"]):
+            self.log.debug(
+                "Loading individual order tracking data cache: %s",
+                order["tracking_cache_file"],
+            )
+            return self.read(order["tracking_cache_file"], from_html=True)
         self.browser_visit_page(
             self.ORDER_TRACKING_URL.format(order["id"]),
             goto_url_after_login=False,
@@ -1105,13 +1113,13 @@ class AliExpressScraper(BaseScraper):
         )
         time.sleep(10)
 
-        with Path(order["tracking_cache_file"]).open(
-            "w",
-            encoding="utf-8",
-        ) as ali_ordre:
-            tracking_html = fromstring(self.browser.page_source)
-            ali_ordre.write(tostring(tracking_html).decode("utf-8"))
-        return tracking_html
+        tracking_source = self.browser.page_source
+        self.write(
+            Path(order["tracking_cache_file"]),
+            tracking_source,
+            html=True,
+        )
+        return parse_html(tracking_source)
 
     def browser_scrape_order_list_html(self):
         """
@@ -1223,9 +1231,7 @@ class AliExpressScraper(BaseScraper):
                 break
         brws.execute_script("window.scrollTo(0,document.body.scrollHeight)")
         self.log.info("All completed orders loaded (hopefully)")
-        with Path(self.ORDER_LIST_FILENAME).open("w", encoding="utf-8") as ali:
-            html = fromstring(brws.page_source)
-            ali.write(tostring(html).decode("utf-8"))
+        self.write(self.ORDER_LIST_FILENAME, brws.page_source, html=True)
         return brws.page_source
 
     # Browser util methods
@@ -1248,6 +1254,36 @@ class AliExpressScraper(BaseScraper):
             msg,
         )
 
+    def reparse_cache_files(self) -> list[Path]:
+        return sorted(cachestore.glob(self.cache["ORDERS"], "*/order.html"))
+
+    def reparse_cache_file(self, path: Path) -> None:
+        order_id = path.parent.name
+        json_filename = Path(
+            self.ORDER_FILENAME_TEMPLATE.format(order_id=order_id, ext="json"),
+        )
+        # Order list info (status, date, store) is only in the JSON
+        order = (
+            self.read(json_filename, from_json=True)
+            if self.can_read(json_filename)
+            else {"id": order_id}
+        )
+        order.update(
+            self.lxml_parse_individual_order(
+                parse_html(self.read(path)),
+                order_id,
+            ),
+        )
+        tracking_file = Path(
+            self.TRACKING_HTML_FILENAME_TEMPLATE.format(order_id=order_id),
+        )
+        if self.can_read(tracking_file):
+            order["tracking"] = self.lxml_parse_tracking_html(
+                order,
+                parse_html(self.read(tracking_file)),
+            )
+        self.write(json_filename, order, to_json=True)
+
     # Command functions, used in scrape.py
 
     def command_scrape(self):
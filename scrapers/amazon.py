@@ -1,7 +1,9 @@
 import argparse
 import base64
 import contextlib
+import copy
 import datetime
+import functools
 import math
 import os
 import re
@@ -11,15 +13,15 @@ from pathlib import Path
 from typing import TYPE_CHECKING, Final
 from urllib.parse import urlparse
 
-from lxml.html.soupparser import fromstring
 from selenium.common.exceptions import NoSuchElementException, TimeoutException
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.wait import WebDriverWait
 
-from . import settings
+from . import cachestore, settings
 from .base import BaseScraper, PagePart
+from .htmlparse import parse_html
 
 # pylint: disable=unused-import
 from .utils import AMBER, BLUE, GREEN, RED
@@ -30,9 +32,33 @@ if TYPE_CHECKING:
 
 class AmazonScraper(BaseScraper):
     TLD: Final[str] = "test"
+    # About the pace of the random 0-5 second sleeps this replaced
+    RATE_LIMIT: Final[float] = 0.4
+    # The form on the page Amazon shows instead when we go too fast
+    CAPTCHA_XPATH: Final[str] = "//form[contains(@action, 'validateCaptcha')]"
     YEARS: Final[list]
     # Xpath to individual order item parent element
     ORDER_CARD_XPATH: Final[str] = "//div[contains(@class, 'js-order-card')]"
+    SUBTOTAL_ROW_SPEC: Final[dict] = {
+        "text": {},
+        "columns": {
+            "css": "div",
+            "all": True,
+            "fields": {"text": {}, "content": {"prop": "textContent"}},
+        },
+    }
+    SUBTOTALS_SPEC: Final[dict] = {
+        "popover": {
+            "css": ".a-popover-content .a-row",
+            "all": True,
+            "fields": SUBTOTAL_ROW_SPEC,
+        },
+        "subtotals": {
+            "css": "#od-subtotals .a-row",
+            "all": True,
+            "fields": SUBTOTAL_ROW_SPEC,
+        },
+    }
 
     def command_to_std_json(self):
         structure = self.get_structure(
@@ -43,270 +69,279 @@ class AmazonScraper(BaseScraper):
             f"https://www.amazon.{self.TLD}/"
             "-/en/gp/product/{item_id}/?ie=UTF8",
         )
-        orders = []
+        self.output_schema_json(structure, self.std_json_orders())
 
+    @functools.cached_property
+    def order_list_orders(self) -> dict:
+        """The orders in all cached order lists, by order id"""
         orig_orders = {}
         for order_list_json in self.cache["ORDER_LISTS"].glob(
             "order-list-*.json",
         ):
             orig_orders.update(self.read(order_list_json, from_json=True))
+        return orig_orders
 
-        # pylint: disable=consider-using-dict-items,consider-iterating-dictionary
-        for order_id in orig_orders:
-            self.log.debug("Processing order %s", order_id)
-            if order_id.startswith("D01-"):
-                self.log.debug("Skipping digital order")
-                continue
-            try:
-                order_date = (
-                    datetime.datetime.strptime(
-                        orig_orders[order_id]["date_from_order_list"],
-                        "%Y-%m-%d %H:%M:%S",
-                    )
-                    .astimezone()
-                    .date()
-                    .isoformat()
+    def std_json_orders(self):
+        """Yields the orders for command_to_std_json, one at a time"""
+        return self.std_json_cached(
+            (
+                self.cache["ORDERS"] / order_id / "order.json"
+                for order_id in self.order_list_orders
+                # Skip digital orders
+                if not order_id.startswith("D01-")
+            ),
+            self.cache["ORDER_LISTS"].glob("order-list-*.json"),
+        )
+
+    def std_json_order(self, order_json: Path) -> list[dict]:
+        """Converts the order in order_json for the JSON export"""
+        order_id = order_json.parent.name
+        self.log.debug("Processing order %s", order_id)
+        orig_order = copy.deepcopy(self.order_list_orders[order_id])
+        try:
+            order_date = (
+                datetime.datetime.strptime(
+                    orig_order["date_from_order_list"],
+                    "%Y-%m-%d %H:%M:%S",
                 )
-            except ValueError:
-                order_date = (
-                    datetime.datetime.strptime(
-                        orig_orders[order_id]["date_from_order_list"],
-                        "%Y-%m-%d %H:%M:%S%z",
-                    )
-                    .astimezone()
-                    .date()
-                    .isoformat()
+                .astimezone()
+                .date()
+                .isoformat()
+            )
+        except ValueError:
+            order_date = (
+                datetime.datetime.strptime(
+                    orig_order["date_from_order_list"],
+                    "%Y-%m-%d %H:%M:%S%z",
                 )
+                .astimezone()
+                .date()
+                .isoformat()
+            )
 
-            order = {
-                "id": order_id,
-                "date": order_date,
-                "items": [],
-                "attachments": [],
-                "extra_data": {},
-            }
-            if "items" in orig_orders[order_id]:
-                del orig_orders[order_id]["items"]
+        order = {
+            "id": order_id,
+            "date": order_date,
+            "items": [],
+            "attachments": [],
+            "extra_data": {},
+        }
+        if "items" in orig_order:
+            del orig_order["items"]
 
-            current_order = self.read(
-                self.cache["ORDERS"] / Path(f"{order_id}/order.json"),
-                from_json=True,
-            )
+        current_order = self.read(order_json, from_json=True)
 
-            del orig_orders[order_id]["date_from_order_list"]
-            del current_order["date_from_order_list"]
-
-            for attachment in current_order["attachments"]:
-                if "path" in attachment:
-                    # Some links are sometimes added as attachments
-                    attachment_dict = {
-                        "name": attachment["text"],
-                        "path": attachment["file"],
-                        "comment": attachment["href"],
-                    }
-                    order["attachments"].append(attachment_dict)
-
-            del current_order["attachments"]
-
-            orderhtml = self.cache["ORDERS"] / Path(f"{order_id}/order.html")
-
-            if self.can_read(orderhtml):
-                orderhtmldict = {
-                    "name": "Order HTML",  # orderhtml.name,
-                    "path": (
-                        Path(orderhtml)
-                        .relative_to(self.cache["BASE"])
-                        .as_posix()
-                    ),
-                    "comment": "HTML Scrape of order page",
+        del orig_order["date_from_order_list"]
+        del current_order["date_from_order_list"]
+
+        for attachment in current_order["attachments"]:
+            if "path" in attachment:
+                # Some links are sometimes added as attachments
+                attachment_dict = {
+                    "name": attachment["text"],
+                    "path": attachment["file"],
+                    "comment": attachment["href"],
                 }
-                order["attachments"].append(orderhtmldict)
+                order["attachments"].append(attachment_dict)
 
-            for item in current_order["items"].items():
-                item_id = item[0]
-                item_orig_dict = item[1]
+        del current_order["attachments"]
 
-                if "name_from_item" in item_orig_dict:
-                    name = item_orig_dict["name_from_item"]
-                else:
-                    name = item_orig_dict["name_from_order"]
-
-                item_dict = {
-                    "id": item_id,
-                    "name": name,
-                    "quantity": item_orig_dict["quantity"],
-                    "total": item_orig_dict["total"],
-                    "extra_data": {},
-                    "attachments": [],
-                }
+        orderhtml = self.cache["ORDERS"] / Path(f"{order_id}/order.html")
 
-                if "thumbnail_from_item" in item_orig_dict:
-                    item_dict["thumbnail"] = item_orig_dict[
-                        "thumbnail_from_item"
-                    ]
-                elif "thumbnail_from_order" in item_orig_dict:
-                    item_dict["thumbnail"] = item_orig_dict[
-                        "thumbnail_from_order"
-                    ]
-
-                if "pdf" in item_orig_dict:
-                    item_dict["attachments"].append(
-                        {
-                            "name": "PDF print",
-                            "path": item_orig_dict["pdf"],
-                            "comment": "PDF print of item page",
-                        },
-                    )
+        if self.can_read(orderhtml):
+            orderhtmldict = {
+                "name": "Order HTML",  # orderhtml.name,
+                "path": (
+                    Path(orderhtml)
+                    .relative_to(self.cache["BASE"])
+                    .as_posix()
+                ),
+                "comment": "HTML Scrape of order page",
+            }
+            order["attachments"].append(orderhtmldict)
 
-                order["items"].append(item_dict)
-
-            del current_order["items"]
-
-            prices_to_remove = []
-            for price_re_name_pair in [
-                (r"payment grand total", "total"),
-                (r"^shipping", "shipping"),
-                (r"total before (vat|tax)", "subtotal"),
-                (r"estimated vat|estimated tax to be collected", "tax"),
-            ]:
-                for value_name in current_order["pricing"]:
-                    if re.search(
-                        price_re_name_pair[0],
-                        value_name,
-                        re.IGNORECASE,
-                    ):
-                        if price_re_name_pair[1] not in order:
-                            self.log.debug(
-                                "'%s' is '%s'",
-                                value_name,
-                                price_re_name_pair[1],
-                            )
-                            order[price_re_name_pair[1]] = current_order[
-                                "pricing"
-                            ][value_name]
-                            prices_to_remove.append(value_name)
-                        else:
-                            self.log.error(
-                                RED("'%s' would overwrite '%s'"),
-                                value_name,
-                                price_re_name_pair[1],
-                            )
+        for item in current_order["items"].items():
+            item_id = item[0]
+            item_orig_dict = item[1]
 
-            # Secondary values
-            for price_re_name_pair in [
-                # We prefeer Payment Grand Total
-                (r"^grand total", "total"),
-                (r"postage|packing", "shipping"),
-                (r"subtotal", "subtotal"),
-            ]:
-                for value_name in current_order["pricing"]:
-                    if re.search(
-                        price_re_name_pair[0],
-                        value_name,
-                        re.IGNORECASE,
-                    ):
-                        if price_re_name_pair[1] not in order:
-                            self.log.debug(
-                                "'%s' is '%s'",
-                                value_name,
-                                price_re_name_pair[1],
-                            )
-                            order[price_re_name_pair[1]] = current_order[
-                                "pricing"
-                            ][value_name]
-                            prices_to_remove.append(value_name)
-                        else:
-                            self.log.debug(
-                                "'%s' could be '%s', but was already taken",
-                                value_name,
-                                price_re_name_pair[1],
-                            )
-                            prices_to_remove.append(value_name)
-                            if "pricing" not in order["extra_data"]:
-                                order["extra_data"]["pricing"] = {}
-                            order["extra_data"]["pricing"][
-                                value_name
-                            ] = current_order["pricing"][value_name]
-
-            # Tertiary values
-            for price_re_name_pair in [
-                # We prefeer Grand Total
-                (r"^total:", "total"),
-            ]:
-                for value_name in current_order["pricing"]:
-                    if re.search(
-                        price_re_name_pair[0],
-                        value_name,
-                        re.IGNORECASE,
-                    ):
-                        if price_re_name_pair[1] not in order:
-                            self.log.debug(
-                                "'%s' is '%s'",
-                                value_name,
-                                price_re_name_pair[1],
-                            )
-                            order[price_re_name_pair[1]] = current_order[
-                                "pricing"
-                            ][value_name]
-                            prices_to_remove.append(value_name)
-                        else:
-                            self.log.debug(
-                                "'%s' could be '%s', but was already taken",
-                                value_name,
-                                price_re_name_pair[1],
-                            )
-                            prices_to_remove.append(value_name)
-                            if "pricing" not in order["extra_data"]:
-                                order["extra_data"]["pricing"] = {}
-                            order["extra_data"]["pricing"][
-                                value_name
-                            ] = current_order["pricing"][value_name]
-
-            if "total" not in order:
-                order["total"] = orig_orders[order_id]["total_from_order_list"]
+            if "name_from_item" in item_orig_dict:
+                name = item_orig_dict["name_from_item"]
             else:
-                order["extra_data"]["pricing"][
-                    "total_from_order_list"
-                ] = orig_orders[order_id]["total_from_order_list"]
-            del orig_orders[order_id]["total_from_order_list"]
-            del current_order["total_from_order_list"]
-
-            for value_name in prices_to_remove:
-                del current_order["pricing"][value_name]
-
-            prices_to_remove = []
-            prices_re_to_move = [
-                r"refund",
-                r"import fees deposit",
-                r"promotion applied",
-                r"free shipping",
-            ]
+                name = item_orig_dict["name_from_order"]
 
-            for value_name_re in prices_re_to_move:
-                for key in current_order["pricing"]:
-                    if re.search(value_name_re, key, re.IGNORECASE):
-                        prices_to_remove.append(key)
-                        order["extra_data"]["pricing"][key] = current_order[
-                            "pricing"
-                        ][key]
+            item_dict = {
+                "id": item_id,
+                "name": name,
+                "quantity": item_orig_dict["quantity"],
+                "total": item_orig_dict["total"],
+                "extra_data": {},
+                "attachments": [],
+            }
 
-            for value_name in prices_to_remove:
-                del current_order["pricing"][value_name]
+            if "thumbnail_from_item" in item_orig_dict:
+                item_dict["thumbnail"] = item_orig_dict[
+                    "thumbnail_from_item"
+                ]
+            elif "thumbnail_from_order" in item_orig_dict:
+                item_dict["thumbnail"] = item_orig_dict[
+                    "thumbnail_from_order"
+                ]
+
+            if "pdf" in item_orig_dict:
+                item_dict["attachments"].append(
+                    {
+                        "name": "PDF print",
+                        "path": item_orig_dict["pdf"],
+                        "comment": "PDF print of item page",
+                    },
+                )
 
-            assert current_order["pricing"] == {}, current_order["pricing"]
-            del current_order["pricing"]
+            order["items"].append(item_dict)
 
-            order["extra_data"]["shipping_address"] = current_order[
-                "shipping_address"
-            ]
-            del current_order["shipping_address"]
+        del current_order["items"]
 
-            assert orig_orders[order_id] == {}, orig_orders[order_id]
-            assert current_order == {}, current_order
-            orders.append(order)
+        prices_to_remove = []
+        for price_re_name_pair in [
+            (r"payment grand total", "total"),
+            (r"^shipping", "shipping"),
+            (r"total before (vat|tax)", "subtotal"),
+            (r"estimated vat|estimated tax to be collected", "tax"),
+        ]:
+            for value_name in current_order["pricing"]:
+                if re.search(
+                    price_re_name_pair[0],
+                    value_name,
+                    re.IGNORECASE,
+                ):
+                    if price_re_name_pair[1] not in order:
+                        self.log.debug(
+                            "'%s' is '%s'",
+                            value_name,
+                            price_re_name_pair[1],
+                        )
+                        order[price_re_name_pair[1]] = current_order[
+                            "pricing"
+                        ][value_name]
+                        prices_to_remove.append(value_name)
+                    else:
+                        self.log.error(
+                            RED("'%s' would overwrite '%s'"),
+                            value_name,
+                            price_re_name_pair[1],
+                        )
 
-        structure["orders"] = orders
-        self.output_schema_json(structure)
+        # Secondary values
+        for price_re_name_pair in [
+            # We prefeer Payment Grand Total
+            (r"^grand total", "total"),
+            (r"postage|packing", "shipping"),
+            (r"subtotal", "subtotal"),
+        ]:
+            for value_name in current_order["pricing"]:
+                if re.search(
+                    price_re_name_pair[0],
+                    value_name,
+                    re.IGNORECASE,
+                ):
+                    if price_re_name_pair[1] not in order:
+                        self.log.debug(
+                            "'%s' is '%s'",
+                            value_name,
+                            price_re_name_pair[1],
+                        )
+                        order[price_re_name_pair[1]] = current_order[
+                            "pricing"
+                        ][value_name]
+                        prices_to_remove.append(value_name)
+                    else:
+                        self.log.debug(
+                            "'%s' could be '%s', but was already taken",
+                            value_name,
+                            price_re_name_pair[1],
+                        )
+                        prices_to_remove.append(value_name)
+                        if "pricing" not in order["extra_data"]:
+                            order["extra_data"]["pricing"] = {}
+                        order["extra_data"]["pricing"][
+                            value_name
+                        ] = current_order["pricing"][value_name]
+
+        # Tertiary values
+        for price_re_name_pair in [
+            # We prefeer Grand Total
+            (r"^total:", "total"),
+        ]:
+            for value_name in current_order["pricing"]:
+                if re.search(
+                    price_re_name_pair[0],
+                    value_name,
+                    re.IGNORECASE,
+                ):
+                    if price_re_name_pair[1] not in order:
+                        self.log.debug(
+                            "'%s' is '%s'",
+                            value_name,
+                            price_re_name_pair[1],
+                        )
+                        order[price_re_name_pair[1]] = current_order[
+                            "pricing"
+                        ][value_name]
+                        prices_to_remove.append(value_name)
+                    else:
+                        self.log.debug(
+                            "'%s' could be '%s', but was already taken",
+                            value_name,
+                            price_re_name_pair[1],
+                        )
+                        prices_to_remove.append(value_name)
+                        if "pricing" not in order["extra_data"]:
+                            order["extra_data"]["pricing"] = {}
+                        order["extra_data"]["pricing"][
+                            value_name
+                        ] = current_order["pricing"][value_name]
+
+        if "total" not in order:
+            order["total"] = orig_order["total_from_order_list"]
+        else:
+            order["extra_data"]["pricing"][
+                "total_from_order_list"
+            ] = orig_order["total_from_order_list"]
+        del orig_order["total_from_order_list"]
+        del current_order["total_from_order_list"]
+
+        for value_name in prices_to_remove:
+            del current_order["pricing"][value_name]
+
+        prices_to_remove = []
+        prices_re_to_move = [
+            r"refund",
+            r"import fees deposit",
+            r"promotion applied",
+            r"free shipping",
+        ]
+
+        for value_name_re in prices_re_to_move:
+            for key in current_order["pricing"]:
+                if re.search(value_name_re, key, re.IGNORECASE):
+                    prices_to_remove.append(key)
+                    order["extra_data"]["pricing"][key] = current_order[
+                        "pricing"
+                    ][key]
+
+        for value_name in prices_to_remove:
+            del current_order["pricing"][value_name]
+
+        assert current_order["pricing"] == {}, current_order["pricing"]
+        del current_order["pricing"]
+
+        order["extra_data"]["shipping_address"] = current_order[
+            "shipping_address"
+        ]
+        del current_order["shipping_address"]
+
+        assert orig_order == {}, orig_order
+        assert current_order == {}, current_order
+        return [order]
 
     # Scraper commands and __init__
     def command_scrape(self) -> None:
@@ -323,17 +358,53 @@ class AmazonScraper(BaseScraper):
         if self.AMZ_ORDERS:
             self.log.debug("Scraping only order IDs: %s", self.AMZ_ORDERS)
         count = 0
+        to_parse = []
         for year in self.YEARS:
             self.log.debug("Year: %s", year)
             for order_id in order_lists[year]:
                 if self.skip_order(order_id, count):
                     continue
                 count += 1
-                self.log.debug("Parsing order id %s", order_id)
-                self.__parse_order(order_id, order_lists[year][order_id])
-                # Write order to json here?
+                to_parse.append((order_id, order_lists[year][order_id]))
+
+        def parse_order(scraper: AmazonScraper, order: tuple[str, dict]):
+            scraper.log.debug("Parsing order id %s", order[0])
+            scraper.__parse_order(*order)
+
+        self.browser_pool_map(
+            parse_order,
+            to_parse,
+            f"https://www.amazon.{self.TLD}/gp/css/order-history",
+        )
         self.browser_safe_quit()
 
+    def reparse_cache_files(self) -> list[Path]:
+        # Order details are scraped live, only the order lists are reparsed
+        return sorted(
+            cachestore.glob(self.cache["ORDER_LISTS"], "order-list-*-0.html"),
+        )
+
+    def reparse_cache_file(self, path: Path) -> None:
+        year = path.name.removeprefix("order-list-").removesuffix("-0.html")
+        if year.isdigit():
+            year = int(year)
+        order_lists_html = {}
+        start_index = 0
+        while self.can_read(
+            html_filename := self.part_to_filename(
+                PagePart.ORDER_LIST_HTML,
+                year=year,
+                start_index=start_index,
+            ),
+        ):
+            order_lists_html[(year, start_index)] = parse_html(
+                self.read(html_filename),
+            )
+            start_index += 10
+        self.__save_order_lists_to_json(
+            self.__lxml_parse_order_lists_html(order_lists_html),
+        )
+
     def __init__(self, options: argparse.Namespace):
         super().__init__(options, __name__)
         # pylint: disable=invalid-name
@@ -582,21 +653,17 @@ class AmazonScraper(BaseScraper):
             invoice_unavailable = re.match(r".+legal_invoice_help.+", href)
             if order_summary:
                 assert text != "", "Order summary text was empty"
-                self.remove(self.cache["PDF_TEMP_FILENAME"])
                 brws.switch_to.new_window("tab")
+                self.throttle(href)
                 brws.get(href)
+                self.browser_detect_captcha(href)
                 self.log.debug("Found order summary.")
-                self.browser.execute_script("window.print();")
-                self.wait_for_stable_file(self.cache["PDF_TEMP_FILENAME"])
+                self.browser_print_to_pdf(attachment_file)
                 attachment["file"] = str(
                     Path(attachment_file)
                     .relative_to(self.cache["BASE"])
                     .as_posix(),
                 )  # keep this
-                self.move_file(
-                    self.cache["PDF_TEMP_FILENAME"],
-                    attachment_file,
-                )
                 brws.close()
             elif download_pdf:
                 assert text != "", "PDF to download text was empty"
@@ -607,34 +674,20 @@ class AmazonScraper(BaseScraper):
                 self.log.debug(
                     "Opening PDF, waiting for it to download in background",
                 )
-                brws.switch_to.new_window()
-                # Can't use .get(...) here, since Selenium appears to
-                # be confused by the fact that Firefox downloads the PDF
-                brws.execute_script(
-                    """
-                    setTimeout(() => {
-                        document.location.href = arguments[0];
-                    }, "500");
-                    """,
-                    href,
-                )
-                ## Look for PDF in folder
-                pdf = list(self.cache["TEMP"].glob("*.pdf"))
-                wait_count = 0
-                while not pdf:
-                    pdf = list(self.cache["TEMP"].glob("*.pdf"))
-                    time.sleep(3)
-                    wait_count += 1
-                    if wait_count > 60:  # noqa: PLR2004
-                        self.log.error(
-                            RED(
-                                "We have been waiting for a PDF for 3 minutes,"
-                                " something is wrong...",
-                            ),
-                        )
-                        raise NotImplementedError
+                with self.watch_files("*.pdf") as watcher:
+                    brws.switch_to.new_window()
+                    # Can't use .get(...) here, since Selenium appears to
+                    # be confused by the fact that Firefox downloads the PDF
+                    brws.execute_script(
+                        """
+                        setTimeout(() => {
+                            document.location.href = arguments[0];
+                        }, "500");
+                        """,
+                        href,
+                    )
+                    pdf = watcher.wait()
                 # We have a PDF, move it to  a proper name
-                self.wait_for_stable_file(pdf[0])
                 attachment["file"] = str(
                     Path(attachment_file)
                     .relative_to(self.cache["BASE"])
@@ -768,8 +821,9 @@ class AmazonScraper(BaseScraper):
             "Saving cache to %s and appending to html list",
             cache_file,
         )
-        self.rand_sleep()
-        return self.write(cache_file, self.browser.page_source, html=True)
+        page_source = self.browser.page_source
+        self.write(cache_file, page_source, html=True)
+        return parse_html(page_source)
 
     def __load_order_lists_html(self) -> dict[int, str]:  # FIN
         """
@@ -819,7 +873,7 @@ class AmazonScraper(BaseScraper):
                                 year,
                                 start_index,
                             )
-                            order_list_html[(year, start_index)] = fromstring(
+                            order_list_html[(year, start_index)] = parse_html(
                                 self.read(html_filename),
                             )
                             start_index += 10
@@ -880,9 +934,26 @@ class AmazonScraper(BaseScraper):
                     order_list_html,
                 )
                 start_index += 10
-                self.rand_sleep()
         return order_list_html
 
+    def browser_visit_page(self, url: str, **kwargs):
+        brws = super().browser_visit_page(url, **kwargs)
+        self.browser_detect_captcha(url)
+        return brws
+
+    def browser_detect_captcha(self, url: str) -> None:
+        """
+        Slows down requests to Amazon if it shows a CAPTCHA instead of
+        url, and waits for the user to solve it.
+        """
+        if not self.find_elements(By.XPATH, self.CAPTCHA_XPATH):
+            return
+        self.rate_limit_backoff(url)
+        self.log.error(
+            RED("Amazon is showing a CAPTCHA, solve it and press enter."),
+        )
+        input()
+
     def browser_login(self, _):
         """
         Uses Selenium to log in
@@ -897,33 +968,27 @@ class AmazonScraper(BaseScraper):
 
             wait = WebDriverWait(brws, 10)
             try:
-                self.rand_sleep()
                 username = wait.until(
                     EC.presence_of_element_located((By.ID, "ap_email")),
                 )
                 username.send_keys(username_data)
-                self.rand_sleep()
                 wait.until(
                     EC.element_to_be_clickable((By.ID, "continue")),
                 ).click()
-                self.rand_sleep()
                 password = wait.until(
                     EC.presence_of_element_located((By.ID, "ap_password")),
                 )
                 password.send_keys(password_data)
-                self.rand_sleep()
                 remember = wait.until(
                     EC.presence_of_element_located((By.NAME, "rememberMe")),
                 )
                 remember.click()
-                self.rand_sleep()
                 sign_in = wait.until(
                     EC.presence_of_element_located(
                         (By.ID, "auth-signin-button"),
                     ),
                 )
                 sign_in.click()
-                self.rand_sleep()
 
             except TimeoutException:
                 self.browser_safe_quit()
@@ -938,6 +1003,7 @@ class AmazonScraper(BaseScraper):
             re.match(self.LOGIN_PAGE_RE, self.browser.current_url)
             or "transactionapproval" in self.browser.current_url
         ):
+            self.rate_limit_backoff()
             self.log.error("Login to Amazon was not successful.")
             self.log.error(
                 RED(
@@ -990,8 +1056,8 @@ class AmazonScraper(BaseScraper):
         ).text.strip()
         order["shipping_address"] = shipping_info
         brws.execute_script("window.scrollTo(0,0)")
-        subtotals: list[WebElement] = []
-        subtotals_element: list[WebElement] = self.find_element(
+        popover = False
+        subtotals_element: WebElement = self.find_element(
             By.CSS_SELECTOR,
             "#od-subtotals",
         )
@@ -1004,41 +1070,29 @@ class AmazonScraper(BaseScraper):
                 self.log.debug("Found popover - moving to")
                 ActionChains(brws).move_to_element(poptrig).click().perform()
                 time.sleep(1)
-                subtotals: list[WebElement] = self.find_elements(
-                    By.CSS_SELECTOR,
-                    ".a-popover-content .a-row",
-                )
+                popover = True
 
         except NoSuchElementException:
             pass
-        subtotals = subtotals + self.find_elements(
-            By.CSS_SELECTOR,
-            "#od-subtotals .a-row",
-        )
         order["pricing"] = {}
 
         time.sleep(1)
 
+        page = self.browser_extract(self.SUBTOTALS_SPEC)
+        subtotals = page["popover"] if popover else []
+        subtotals = subtotals + page["subtotals"]
+
         for subtotal in subtotals:
-            price_columns: list[WebElement] = subtotal.find_elements(
-                By.CSS_SELECTOR,
-                "div",
-            )
+            price_columns = subtotal["columns"]
 
             if len(price_columns) == 2:  # noqa: PLR2004
-                self.log.debug("Subtotal text: %s", subtotal.text)
-                price_name = price_columns[0].text.strip()
-                price_value = price_columns[1].text.strip()
+                self.log.debug("Subtotal text: %s", subtotal["text"])
+                price_name = price_columns[0]["text"]
+                price_value = price_columns[1]["text"]
                 if price_name != "" and price_value != "":
-                    # Refunds etc may be hidden, use this trick to get the text
-                    price_name = self.browser.execute_script(
-                        "return arguments[0].textContent",
-                        price_columns[0],
-                    ).strip()
-                    price_value = self.browser.execute_script(
-                        "return arguments[0].textContent",
-                        price_columns[1],
-                    ).strip()
+                    # Refunds etc may be hidden, use textContent to get the text
+                    price_name = price_columns[0]["content"].strip()
+                    price_value = price_columns[1]["content"].strip()
                 if price_name != "" and price_value != "":
                     self.log.debug(
                         "price_name: %s, price_value: %s",
@@ -1189,7 +1243,7 @@ class AmazonScraper(BaseScraper):
         self.log.debug("Saved order page HTML to file")
         return order
 
-    def browser_scrape_item_page(
+    def browser_scrape_item_page(  # noqa: PLR0915
         self,
         item_id: str,
         item_dict: dict,
@@ -1199,7 +1253,10 @@ class AmazonScraper(BaseScraper):
         brws = self.browser
         self.log.debug("New tab for item %s", item_id)
         brws.switch_to.new_window()
-        brws.get(self.ITEM_URL_TEMPLATE.format(item_id=item_id))
+        item_url = self.ITEM_URL_TEMPLATE.format(item_id=item_id)
+        self.throttle(item_url)
+        brws.get(item_url)
+        self.browser_detect_captcha(item_url)
         item_dict["removed"] = False
 
         if "Page Not Found" not in self.browser.title:
@@ -1317,15 +1374,8 @@ class AmazonScraper(BaseScraper):
 
                 self.__append_thumnails_to_item_html()
                 self.log.debug("Printing page to PDF")
-                for pdf in self.cache["TEMP"].glob("*.pdf"):
-                    # Remove old/random PDFs
-                    os.remove(pdf)
-                brws.execute_script("window.print();")
-
-                self.wait_for_stable_file(self.cache["PDF_TEMP_FILENAME"])
-
-                self.move_file(self.cache["PDF_TEMP_FILENAME"], item_pdf_file)
-                self.log.debug("PDF moved to cache")
+                self.browser_print_to_pdf(item_pdf_file)
+                self.log.debug("PDF saved to cache")
             else:
                 self.log.debug("Found item PDF for %s, not printing", item_id)
             item_dict["pdf"] = str(
@@ -0,0 +1,184 @@
+"""
+Incrementally updated zip archive for exports.
+
+A manifest with the size and mtime of the source of every entry is kept
+in the cache. On export only new files are appended, the archive is
+only rewritten if entries were changed or removed. Files that are
+already compressed (PDFs, images) are stored, not deflated.
+
+Entries are read and deflated in a thread pool (zlib releases the GIL),
+a bounded number of entries ahead of one writer that adds them to the
+archive in order with zipwriter.ZipWriter. HTML stored compressed in the
+cache (see cachestore) is added as plain HTML.
+"""
+import json
+import logging
+import math
+import os
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+from . import cachestore
+from .zipwriter import ZipWriter, compress_entry
+
+# Already compressed, deflating them again is wasted time
+STORED_SUFFIXES = {
+    ".7z",
+    ".gif",
+    ".gz",
+    ".jpeg",
+    ".jpg",
+    ".pdf",
+    ".png",
+    ".webp",
+    ".zip",
+}
+
+log = logging.getLogger(__name__)
+
+
+def compress_type(path: Path) -> int:
+    if path.suffix.lower() in STORED_SUFFIXES:
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def fingerprint(path: Path) -> list[int]:
+    stat = (cachestore.stored_path(path) or Path(path)).stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def read_entry(
+    path: Path,
+    name: str,
+    level: int,
+) -> tuple[zipfile.ZipInfo, bytes, int, int]:
+    """
+    Reads the cache file path for the archive entry name, and deflates
+    it unless it is already compressed. See zipwriter.compress_entry.
+    """
+    zinfo = zipfile.ZipInfo.from_file(cachestore.stored_path(path), name)
+    zinfo.compress_type = compress_type(path)
+    return compress_entry(zinfo, cachestore.read_bytes(path), level)
+
+
+class ExportArchive:
+    """
+    A zip archive at path, with a manifest of its entries at
+    manifest_path. See update.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        manifest_path: Path,
+        *,
+        level: int = 6,
+        workers: int = 0,
+    ):
+        self.path = Path(path)
+        self.manifest_path = Path(manifest_path)
+        self.level = level
+        self.workers = workers or os.cpu_count() or 1
+
+    def load_manifest(self) -> dict[str, list[int]]:
+        """
+        Returns the entries of the manifest, or {} if the archive
+        was changed or removed after the manifest was written.
+        """
+        if not self.path.is_file() or not self.manifest_path.is_file():
+            return {}
+        try:
+            with self.manifest_path.open(encoding="utf-8") as file:
+                manifest = json.load(file)
+        except json.decoder.JSONDecodeError:
+            log.warning("Could not read %s, ignoring it", self.manifest_path)
+            return {}
+        if manifest.get("archive") != fingerprint(self.path):
+            log.info("%s has changed since last export", self.path.name)
+            return {}
+        return manifest["entries"]
+
+    def save_manifest(self, entries: dict[str, list[int]]) -> None:
+        with self.manifest_path.open("w", encoding="utf-8") as file:
+            json.dump(
+                {"archive": fingerprint(self.path), "entries": entries},
+                file,
+            )
+
+    def write_entries(
+        self,
+        zip_file: ZipWriter,
+        files: dict[str, Path],
+        names: list[str],
+    ) -> None:
+        per_count = max(10, math.ceil(len(names) / 20))
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+
+            def submit(name: str) -> Future:
+                return executor.submit(
+                    read_entry,
+                    files[name],
+                    name,
+                    self.level,
+                )
+
+            # Compress a few entries ahead of the writer, not all of
+            # them, so we do not keep the whole archive in memory
+            pending = deque(submit(name) for name in names[: self.workers * 4])
+            ahead = iter(names[self.workers * 4 :])
+            count = 0
+            while pending:
+                future = pending.popleft()
+                if (next_name := next(ahead, None)) is not None:
+                    pending.append(submit(next_name))
+                if count % per_count == 0:
+                    log.info(
+                        "Added %s of %s files to %s",
+                        count,
+                        len(names),
+                        self.path.name,
+                    )
+                zip_file.write(*future.result())
+                count += 1
+
+    def update(self, files: dict[str, Path]) -> None:
+        """
+        Makes the archive contain exactly files (archive name -> source
+        file), appending new files and rewriting the archive if any
+        entries changed or were removed.
+        """
+        old_entries = self.load_manifest()
+        entries = {name: fingerprint(path) for name, path in files.items()}
+        removed = old_entries.keys() - entries.keys()
+        changed = {
+            name
+            for name in entries.keys() & old_entries.keys()
+            if entries[name] != old_entries[name]
+        }
+        if old_entries and not removed and not changed:
+            new = [name for name in entries if name not in old_entries]
+            log.info(
+                "Appending %s new files to %s, %s unchanged",
+                len(new),
+                self.path.name,
+                len(old_entries),
+            )
+            if new:
+                with ZipWriter(self.path, "a") as zip_file:
+                    self.write_entries(zip_file, files, new)
+        else:
+            if old_entries:
+                log.info(
+                    "%s files changed and %s removed, rewriting %s",
+                    len(changed),
+                    len(removed),
+                    self.path.name,
+                )
+            temp_path = self.path.with_name(self.path.name + ".tmp")
+            with ZipWriter(temp_path, "w") as zip_file:
+                self.write_entries(zip_file, files, list(entries))
+            temp_path.replace(self.path)
+        self.save_manifest(entries)
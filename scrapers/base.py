@@ -1,25 +1,28 @@
 import argparse
 import base64
+import collections
 import contextlib
-import csv
-import datetime
+import copy
 import decimal
-import json
+import functools
+import inspect
 import logging
-import math
 import os
 import pprint
-import random
+import queue
 import re
 import shutil
 import time
 import urllib.request
-import zipfile
-from datetime import date
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import (
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
 from decimal import Decimal
 from enum import Enum
 from getpass import getpass
-from json.encoder import JSONEncoder
 from logging import Logger
 from pathlib import Path
 from typing import Any
@@ -27,9 +30,9 @@ from urllib.parse import urlparse
 
 import filetype
 import requests
-from jsonschema import ValidationError, validate
+from cssselect import HTMLTranslator
 from lxml.etree import tostring
-from lxml.html.soupparser import fromstring
+from lxml.html import HtmlElement
 from price_parser import Price
 from selenium import webdriver
 from selenium.common.exceptions import (
@@ -37,16 +40,118 @@ from selenium.common.exceptions import (
     WebDriverException,
 )
 from selenium.webdriver.common.by import By
+from selenium.webdriver.common.print_page_options import PrintOptions
 from selenium.webdriver.firefox.options import Options
 from selenium.webdriver.firefox.service import Service as FirefoxService
 from selenium.webdriver.remote.webelement import WebElement
-from webdriver_manager.core.driver_cache import DriverCacheManager
-from webdriver_manager.firefox import GeckoDriverManager as FirefoxDriverManager
 
-from . import settings
+from . import (
+    blobstore,
+    cachestore,
+    driver,
+    fileio,
+    jsoncodec,
+    settings,
+)
+from .archive import ExportArchive
+from .cacheindex import CacheIndex
+from .convertcache import ConversionCache
+from .filewatch import FileWatcher
+from .htmlparse import parse_html
+from .jsonexport import JSONExportWriter
+from .ratelimit import RateLimiter
 
 # pylint: disable=unused-import
 from .utils import AMBER, BLUE, RED
+from .validation import OrderStreamValidator, validate_structure
+
+# Runs a extraction spec (see BaseScraper.browser_extract) in the browser
+EXTRACT_JS = """
+function find(context, field) {
+    if (field.css === undefined && field.xpath === undefined) {
+        return [context];
+    }
+    if (field.css !== undefined) {
+        return Array.from(context.querySelectorAll(field.css));
+    }
+    const result = document.evaluate(
+        field.xpath,
+        context,
+        null,
+        XPathResult.ORDERED_NODE_SNAPSHOT_TYPE,
+        null
+    );
+    const nodes = [];
+    for (let i = 0; i < result.snapshotLength; i++) {
+        nodes.push(result.snapshotItem(i));
+    }
+    return nodes;
+}
+function value(element, field) {
+    if (field.fields !== undefined) {
+        return extract(element, field.fields);
+    }
+    if (field.attr !== undefined) {
+        return element.getAttribute(field.attr);
+    }
+    const prop = field.prop === undefined ? "innerText" : field.prop;
+    const val = element[prop];
+    if (typeof val === "string" && prop.endsWith("Text")) {
+        return val.trim();
+    }
+    return val === undefined ? null : val;
+}
+function extract(context, fields) {
+    const out = {};
+    for (const [name, field] of Object.entries(fields)) {
+        const nodes = find(context, field);
+        if (field.all) {
+            out[name] = nodes.map((node) => value(node, field));
+        } else {
+            out[name] = nodes.length ? value(nodes[0], field) : null;
+        }
+    }
+    return out;
+}
+return extract(arguments[1] || document, arguments[0]);
+"""
+
+# Elements that give line breaks in innerText
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "caption", "dd", "div",
+    "dl", "dt", "figcaption", "figure", "footer", "form", "h1", "h2", "h3",
+    "h4", "h5", "h6", "header", "hr", "li", "main", "nav", "ol", "p", "pre",
+    "section", "table", "tbody", "tfoot", "thead", "tr", "ul",
+}  # fmt: skip
+# Elements that are not rendered, and so have no innerText
+HIDDEN_TAGS = {"head", "noscript", "script", "style", "template", "title"}
+
+
+@functools.lru_cache(maxsize=256)
+def css_to_xpath(css: str) -> str:
+    # Like querySelectorAll, only match below the element, not itself
+    return HTMLTranslator().css_to_xpath(css, prefix="descendant::")
+
+
+# The scraper used by the worker processes of command_reparse_cache
+# and std_json_cached
+PROCESS_SCRAPER: dict[str, "BaseScraper"] = {}
+
+
+def process_init(scraper: "BaseScraper") -> None:
+    PROCESS_SCRAPER["scraper"] = scraper
+
+
+def reparse_file(path: Path) -> str | None:
+    try:
+        PROCESS_SCRAPER["scraper"].reparse_cache_file(path)
+    except Exception as exc:  # noqa: BLE001
+        return f"{type(exc).__name__}: {exc}"
+    return None
+
+
+def convert_file(path: Path) -> list[dict]:
+    return PROCESS_SCRAPER["scraper"].std_json_order(path)
 
 
 class PagePart(Enum):
@@ -59,6 +164,9 @@ class PagePart(Enum):
 class BaseScraper:
     browser: webdriver.Firefox = None
     browser_status: str = "no-created"
+    browser_profile: Path | None = None
+    browser_pool: list["BaseScraper"] | None = None
+    pool_worker: bool = False
     orders: list
     username: str
     password: str
@@ -66,6 +174,8 @@ class BaseScraper:
     log: Logger
     options: argparse.Namespace
     LOGIN_PAGE_RE: str = r".+login.example.com.*"
+    # Max requests per second when WS_RATE_LIMIT is not set, 0 is no limit
+    RATE_LIMIT: float = 0
     name: str = "Base"
     simple_name: str = "base"
     tla: str = "BSE"
@@ -78,23 +188,36 @@ class BaseScraper:
         self.options = options
         self.log = logging.getLogger(logname)
         self.log.setLevel(options.loglevel)
+        self.rate_limiter = RateLimiter(
+            settings.RATE_LIMIT or self.RATE_LIMIT,
+            settings.RATE_LIMIT_BURST,
+            settings.RATE_LIMITS,
+        )
+        # Replaced by the index of the shop's cache in setup_cache
+        self.cache_index = CacheIndex()
         # pylint: disable=invalid-name
         self.makedir(Path(settings.CACHE_BASE))
         self.log.debug("Init complete: %s/%s", __name__, logname)
 
     def valid_json(self, structure):
-        with settings.JSON_SCHEMA.open(encoding="utf-8") as schema_file:
-            schema = json.load(schema_file)
-            try:
-                validate(instance=structure, schema=schema)
-            except ValidationError as vde:
-                self.log.error(  # noqa: TRY400
-                    RED("JSON failed validation: %s at %s"),
-                    vde.message,
-                    vde.json_path,
-                )
-                return False
-        return True
+        errors = validate_structure(
+            structure,
+            settings.JSON_SCHEMA,
+            settings.JSON_VALIDATOR,
+        )
+        for path, message in errors:
+            self.log.error(
+                RED("JSON failed validation: %s at %s"),
+                message,
+                path,
+            )
+        if errors:
+            self.log.error(
+                RED("%s validation errors in %s"),
+                len(errors),
+                structure.get("metadata", {}).get("branch_name"),
+            )
+        return not errors
 
     def get_structure(self, name, branch_name, order_url, item_url):
         return {
@@ -174,76 +297,257 @@ class BaseScraper:
         value_curr_dict.update(curr_dict)
         return value_curr_dict
 
-    def output_schema_json(self, structure):
-        # Validate json structure
-        self.log.debug("Validating JSON structure")
-        if self.valid_json(structure):
-            self.makedir(settings.OUTPUT_FOLDER)
-            json_file_path = Path(
-                settings.OUTPUT_FOLDER,
-                self.simple_name + ".json",
-            ).resolve()
-            zip_file_path = json_file_path.with_suffix(".zip")
-            self.log.debug(
-                "Removing old output file %s and %s from %s",
+    def order_files(self, order: dict) -> dict[str, Path]:
+        """
+        Returns the files referenced by order.
+
+            Returns:
+                files (dict[str, Path]): archive name to cache file
+        """
+        files_from_to = {}
+        for attach in order.get("attachments", []):
+            files_from_to[attach["path"]] = self.cache["BASE"] / attach["path"]
+        for item in order["items"]:
+            if "thumbnail" in item:
+                files_from_to[item["thumbnail"]] = (
+                    self.cache["BASE"] / item["thumbnail"]
+                )
+            for attach in item.get("attachments", []):
+                files_from_to[attach["path"]] = (
+                    self.cache["BASE"] / attach["path"]
+                )
+        return files_from_to
+
+    def share_order_files(self, order: dict, seen: dict) -> None:
+        """
+        Points the thumbnails and attachments of order that are hardlinks
+        of a file already in the export (see blobstore) at that file, so
+        the zip has it once. seen maps (st_dev, st_ino) to archive name.
+        """
+
+        def shared_name(name: str) -> str:
+            try:
+                stat = (self.cache["BASE"] / name).stat()
+            except FileNotFoundError:
+                return name
+            return seen.setdefault((stat.st_dev, stat.st_ino), name)
+
+        for attach in order.get("attachments", []):
+            attach["path"] = shared_name(attach["path"])
+        for item in order["items"]:
+            if "thumbnail" in item:
+                item["thumbnail"] = shared_name(item["thumbnail"])
+            for attach in item.get("attachments", []):
+                attach["path"] = shared_name(attach["path"])
+
+    def std_json_order(self, source: Path) -> list[dict]:
+        """
+        Converts the order(s) in source for the JSON export. Runs in a
+        worker process, see std_json_cached.
+        """
+        raise NotImplementedError
+
+    def std_json_cached(
+        self,
+        sources: Iterable[Path],
+        dependencies: Iterable[Path] = (),
+    ) -> Iterator[dict]:
+        """
+        Yields the orders std_json_order(source) returns for every source,
+        in order. Orders converted at the last export are used if the
+        source, the files the orders reference, the scraper code and
+        dependencies are unchanged, the rest are converted in parallel.
+        """
+        cache = ConversionCache(
+            self.cache["BASE"] / "std-json-cache",
+            self.cache["BASE"],
+            [Path(__file__), Path(inspect.getfile(type(self))), *dependencies],
+        )
+        max_workers = self.workers if self.workers > 1 else os.cpu_count()
+        with contextlib.ExitStack() as stack:
+            executor = None
+            # (source, orders from cache or None, Future or None)
+            pending = collections.deque()
+            for source in sources:
+                orders = cache.load(source)
+                future = None
+                if orders is None:
+                    if executor is None:
+                        # Only start the workers when something changed
+                        executor = stack.enter_context(
+                            ProcessPoolExecutor(
+                                max_workers=max_workers,
+                                initializer=process_init,
+                                initargs=(self,),
+                            ),
+                        )
+                    future = executor.submit(convert_file, source)
+                pending.append((source, orders, future))
+                # Keep at most a few orders per worker in memory
+                while pending and (
+                    pending[0][2] is None or len(pending) > max_workers * 4
+                ):
+                    yield from self.std_json_result(cache, *pending.popleft())
+            while pending:
+                yield from self.std_json_result(cache, *pending.popleft())
+        cache.prune()
+
+    def std_json_result(
+        self,
+        cache: ConversionCache,
+        source: Path,
+        orders: list[dict] | None,
+        future: Future | None,
+    ) -> list[dict]:
+        if future is None:
+            return orders
+        orders = future.result()
+        files_from_to = {}
+        for order in orders:
+            files_from_to.update(self.order_files(order))
+        cache.save(source, orders, files_from_to)
+        return orders
+
+    def output_schema_json(self, structure, orders=None):
+        """
+        Validates and writes the export to OUTPUT_FOLDER, one order
+        at a time, and updates the .zip with the files it references.
+
+        orders can be any iterable, i.e. a generator that converts one
+        order at a time, and is used instead of structure["orders"].
+        """
+        self.makedir(settings.OUTPUT_FOLDER)
+        json_file_path = Path(
+            settings.OUTPUT_FOLDER,
+            self.simple_name + ".json",
+        ).resolve()
+        zip_file_path = json_file_path.with_suffix(".zip")
+        validator = OrderStreamValidator(
+            settings.JSON_SCHEMA,
+            settings.JSON_VALIDATOR,
+        )
+        files_from_to = {}
+        shared_files = {}
+        self.log.debug("Writing JSON to %s", json_file_path)
+        with JSONExportWriter(
+            json_file_path,
+            structure["metadata"],
+            settings.JSON_INDENT or None,
+        ) as writer:
+            for order in structure["orders"] if orders is None else orders:
+                self.share_order_files(order, shared_files)
+                validator.add(order)
+                writer.write(order)
+                files_from_to.update(self.order_files(order))
+            errors = validator.finish(structure)
+            if errors:
+                writer.discard()
+        if errors:
+            for path, message in errors:
+                self.log.error(
+                    RED("JSON failed validation: %s at %s"),
+                    message,
+                    path,
+                )
+            self.log.error(
+                RED("%s validation errors, keeping old %s"),
+                len(errors),
                 json_file_path.name,
-                zip_file_path.name,
-                json_file_path.parent,
             )
+            return
 
-            self.remove(json_file_path)
+        manifest_path = self.cache["BASE"] / "export-manifest.json"
+        if files_from_to:
+            logo = Path(f"logos/{self.simple_name}.png")
+            if self.can_read(logo):
+                files_from_to["logo.png"] = logo
+                self.log.debug("Adding %s as logo.png", logo.name)
+            else:
+                self.log.warning(
+                    AMBER("Found no %s in logos/"),
+                    logo.name,
+                )
+            self.log.debug(
+                "Updating %s with %s files",
+                zip_file_path,
+                len(files_from_to),
+            )
+            ExportArchive(
+                zip_file_path,
+                manifest_path,
+                level=settings.EXPORT_DEFLATE_LEVEL,
+                workers=settings.EXPORT_WORKERS,
+            ).update(files_from_to)
+        else:
+            self.log.warning(AMBER("No files to add to zip, not creating"))
             self.remove(zip_file_path)
+            self.remove(manifest_path)
 
-            self.log.debug("Generating zip file list... ")
-            files_from_to = []
-            for order in structure["orders"]:
-                if "attachments" in order:
-                    for attach in order["attachments"]:
-                        orig_file = self.cache["BASE"] / attach["path"]
-                        files_from_to.append((orig_file, attach["path"]))
-                for item in order["items"]:
-                    if "thumbnail" in item:
-                        orig_file = self.cache["BASE"] / item["thumbnail"]
-                        files_from_to.append((orig_file, item["thumbnail"]))
-                    if "attachments" in item:
-                        for attach in item["attachments"]:
-                            orig_file = self.cache["BASE"] / attach["path"]
-                            files_from_to.append((orig_file, attach["path"]))
-
-            count_files = len(files_from_to)
-            if count_files > 0:
-                self.log.debug(
-                    "Copying %s files to %s",
-                    count_files,
-                    zip_file_path,
-                )
-                per_count = max(10, math.ceil(count_files / 20))
-                with zipfile.ZipFile(zip_file_path, "a") as zip_file:
-                    for count, data in enumerate(files_from_to):
-                        if count % per_count == 0:
-                            self.log.info(
-                                "Added %s of %s files to %s",
-                                count,
-                                count_files,
-                                zip_file_path.name,
-                            )
-                        zip_file.write(data[0], data[1])
-                    logo = Path(f"logos/{self.simple_name}.png")
-                    if self.can_read(logo):
-                        zip_file.write(logo, "logo.png")
-                        self.log.debug("Added %s as logo.png", logo.name)
-                    else:
-                        self.log.warning(
-                            AMBER("Found no %s in logos/"),
-                            logo.name,
-                        )
-            else:
-                self.log.warning(AMBER("No files to add to zip, not creating"))
-            self.log.debug("Writing JSON to %s", json_file_path)
-            with json_file_path.open("w", encoding="utf-8") as json_file:
-                json_file.write(json.dumps(structure, indent=4))
+        self.log.info("Export successful")
+
+    def __getstate__(self):
+        # The browser can not be sent to other processes
+        state = self.__dict__.copy()
+        state.pop("browser", None)
+        state.pop("browser_pool", None)
+        state["browser_status"] = "no-created"
+        return state
+
+    def reparse_cache_files(self) -> list[Path]:
+        """
+        Returns the cached HTML files command_reparse_cache should
+        give to reparse_cache_file. Implemented by shops that parse
+        saved HTML.
+        """
+        raise NotImplementedError
+
+    def reparse_cache_file(self, path: Path) -> None:
+        """
+        Rebuilds the JSON from the cached HTML file path, using only
+        the shop's lxml parsers. Runs in a worker process.
+        """
+        raise NotImplementedError
 
-            self.log.info("Export successful")
+    def command_reparse_cache(self) -> None:
+        """
+        Rebuilds the order JSON of all cached HTML pages in parallel,
+        without starting a browser. Useful after fixing a parser.
+        """
+        paths = self.reparse_cache_files()
+        if not paths:
+            self.log.warning(AMBER("Found no cached HTML to reparse"))
+            return
+        max_workers = self.workers if self.workers > 1 else os.cpu_count()
+        self.log.info(
+            "Reparsing %s cached files using %s processes",
+            len(paths),
+            max_workers,
+        )
+        failed = 0
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=process_init,
+            initargs=(self,),
+        ) as executor:
+            for path, error in zip(
+                paths,
+                executor.map(
+                    reparse_file,
+                    paths,
+                    chunksize=max(1, len(paths) // (max_workers * 4)),
+                ),
+                strict=True,
+            ):
+                if error:
+                    failed += 1
+                    self.log.error(RED("Failed to reparse %s: %s"), path, error)
+                else:
+                    self.log.debug("Reparsed %s", path)
+        self.log.info(
+            "Reparse complete, %s ok, %s failed",
+            len(paths) - failed,
+            failed,
+        )
 
     def setup_cache(self, base_folder: Path):
         self.cache: dict[str, Path] = {
@@ -266,6 +570,14 @@ class BaseScraper:
         self.cache.update(
             {"IMG_TEMP_FILENAME": self.cache["TEMP"] / "temporary.jpg"},
         )
+        if settings.CACHE_INDEX:
+            # TEMP changes all the time, it is not indexed
+            self.cache_index = CacheIndex(
+                self.cache["BASE"],
+                self.cache["BASE"] / "cache-index.json",
+                skip=[self.cache["TEMP"]],
+            ).build()
+            self.cache_index.save()
 
     def find_element(
         self,
@@ -335,20 +647,19 @@ class BaseScraper:
         """
         if self.browser_status != "created":
             self.log.debug("Loading Firefox webdriver binary")
-            os.environ["WDM_LOG"] = str(logging.NOTSET)
-
             service = FirefoxService(
-                executable_path=FirefoxDriverManager(
-                    cache_manager=DriverCacheManager(),  #  , version="v0.33.0"
-                ).install(),
+                executable_path=driver.geckodriver_path(
+                    refresh=getattr(self.options, "refresh_driver", False),
+                ),
             )
             self.log.debug("Initializing browser")
             options = Options()
 
             # Configure printing
+            profile = self.browser_profile or settings.FF_PROFILE_PATH
             options.add_argument("-profile")
-            options.add_argument(str(settings.FF_PROFILE_PATH))
-            options.set_preference("profile", str(settings.FF_PROFILE_PATH))
+            options.add_argument(str(profile))
+            options.set_preference("profile", str(profile))
             options.set_preference("print.always_print_silent", value=True)
             options.set_preference("print_printer", settings.PDF_PRINTER)
             self.log.debug("Printer set to %s", settings.PDF_PRINTER)
@@ -427,15 +738,20 @@ class BaseScraper:
     def browser_get_json(self, url: str) -> dict:
         self.browser_visit(url)
         content = self.browser.find_element(By.XPATH, "//pre").text
-        return json.loads(content)
+        return jsoncodec.loads(content)
 
     def browser_safe_quit(self):
         """
         Safely closed the browser instance. (without exceptions)
+        Browser sessions from browser_pool_start are always closed,
+        --no-close-browser only keeps the main browser open.
         """
+        self.browser_pool_close()
+        if not self.pool_worker:
+            self.rate_limit_log_stats()
         try:
             if self.browser_status == "created":
-                if self.options.no_close_browser:
+                if self.options.no_close_browser and not self.pool_worker:
                     self.log.info(
                         "Not closing browser because of --no-close-browser",
                     )
@@ -446,8 +762,149 @@ class BaseScraper:
         except WebDriverException:
             pass
 
+    @property
+    def workers(self) -> int:
+        return max(1, getattr(self.options, "workers", 1) or 1)
+
+    def browser_pool_start(self, count: int, cookie_url: str) -> None:
+        """
+        Starts count isolated browser sessions in addition to the main
+        browser. Each session is a shallow copy of this scraper with its
+        own copy of the Firefox profile, download folder,
+        PDF_TEMP_FILENAME and options. Cookies from the main browser
+        (after visiting cookie_url, logging in if required) are copied to
+        every session.
+
+        The rate limiter and cache index are shared by all sessions, so
+        the rate limit is per host and not per session. The rate limiter
+        takes a lock, and the cache index only adds and removes names
+        in sets, which is atomic.
+        """
+        if self.browser_pool:
+            return
+        self.browser_visit_page(cookie_url, goto_url_after_login=True)
+        cookies = self.browser.get_cookies()
+        self.log.debug(
+            "Starting %s browser sessions, sharing %s cookies",
+            count,
+            len(cookies),
+        )
+        self.browser_pool = []
+        for number in range(count):
+            worker_dir = self.cache["TEMP"] / f"worker-{number}"
+            profile = worker_dir / "profile"
+            shutil.rmtree(worker_dir, ignore_errors=True)
+            shutil.copytree(
+                settings.FF_PROFILE_PATH,
+                profile,
+                ignore=shutil.ignore_patterns(
+                    "lock",
+                    ".parentlock",
+                    "parent.lock",
+                ),
+            )
+            downloads = worker_dir / "downloads"
+            self.makedir(downloads)
+
+            worker = copy.copy(self)
+            worker.browser = None
+            worker.browser_status = "no-created"
+            worker.browser_pool = None
+            worker.pool_worker = True
+            worker.browser_profile = profile
+            worker.options = copy.copy(self.options)
+            worker.cache = dict(self.cache)
+            worker.cache.update(
+                {
+                    "TEMP": downloads,
+                    "PDF_TEMP_FILENAME": downloads / "temporary.pdf",
+                    "IMG_TEMP_FILENAME": downloads / "temporary.jpg",
+                },
+            )
+            brws = worker.browser_get_instance()
+            worker.throttle(cookie_url)
+            brws.get(cookie_url)
+            brws.delete_all_cookies()
+            for cookie in cookies:
+                with contextlib.suppress(WebDriverException):
+                    brws.add_cookie(cookie)
+            self.browser_pool.append(worker)
+
+    def browser_pool_close(self) -> None:
+        if not self.browser_pool:
+            return
+        self.log.debug("Closing %s browser sessions", len(self.browser_pool))
+        for worker in self.browser_pool:
+            worker.browser_safe_quit()
+            # The copied profile and downloads
+            shutil.rmtree(worker.cache["TEMP"].parent, ignore_errors=True)
+        self.browser_pool = None
+
+    def browser_pool_map(
+        self,
+        func: Callable[["BaseScraper", Any], Any],
+        items: Iterable,
+        cookie_url: str,
+    ) -> None:
+        """
+        Calls func(scraper, item) for every item. With --workers 1 this
+        is a plain loop using this scraper, otherwise items are
+        dispatched across a pool of browser sessions (see
+        browser_pool_start), each session handling one item at a time.
+        """
+        items = list(items)
+        count = min(self.workers, len(items))
+        if count <= 1:
+            for item in items:
+                func(self, item)
+            return
+        self.browser_pool_start(count, cookie_url)
+        idle: queue.Queue[BaseScraper] = queue.Queue()
+        for worker in self.browser_pool:
+            idle.put(worker)
+
+        def run(item):
+            worker = idle.get()
+            try:
+                return func(worker, item)
+            finally:
+                idle.put(worker)
+
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            # Consume the results so exceptions are raised here
+            for _ in executor.map(run, items):
+                pass
+
+    def throttle(self, url: str | None = None) -> None:
+        """
+        Waits until we are allowed another request to the host of url
+        (default: the current browser url). See WS_RATE_LIMIT.
+        """
+        self.rate_limiter.wait(url or self.browser.current_url)
+
+    def rate_limit_backoff(self, url: str | None = None) -> None:
+        """
+        Call when a interrupt (CAPTCHA, login wall) is detected, to
+        slow down requests to the host of url (default: current url).
+        """
+        self.rate_limiter.backoff(url or self.browser.current_url)
+
+    def rate_limit_log_stats(self) -> None:
+        for host, stats in self.rate_limiter.stats().items():
+            self.log.info(
+                "Rate limit %s: %s requests, waited %s times for %ss,"
+                " %s backoffs, now %s requests/s",
+                host,
+                stats["requests"],
+                stats["waits"],
+                stats["waited"],
+                stats["backoffs"],
+                stats["rate"],
+            )
+
     def browser_visit(self, url: str):
         brws = self.browser_get_instance()
+        self.throttle(url)
         brws.get(url)
         self.browser_detect_handle_interrupt(url)
         return brws
@@ -470,6 +927,7 @@ class BaseScraper:
                 browser: (WebDriver) the browser instance
         """
         self.browser = self.browser_get_instance()
+        self.throttle(url)
         self.browser.get(url)
         if default_login_detect:
             self.browser_login_required(url, goto_url_after_login, do_login)
@@ -546,7 +1004,8 @@ class BaseScraper:
             filename.unlink()
 
     def download_url_to_file(self, url: str, output: Path):
-        output.parent.mkdir(exist_ok=True)
+        self.makedir(output.parent)
+        blobstore.unshare(output)
         req = urllib.request.Request(  # noqa: S310
             url,
             data=None,
@@ -560,6 +1019,8 @@ class BaseScraper:
             "wb",
         ) as output_handle:
             shutil.copyfileobj(response, output_handle)
+        self.cache_index.add(output)
+        self.store_blob(output)
 
     def find_or_download(
         self,
@@ -572,7 +1033,7 @@ class BaseScraper:
         If not found, downloads file to folder/prefix{name}. If not PNG/JPG
         suffix, raises NotImplementedError.
         """
-        folder.mkdir(exist_ok=True)
+        self.makedir(folder)
 
         # self.log.debug(
         #    "find_or_download: url: %s, prefix: %s, folder: %s",
@@ -581,7 +1042,7 @@ class BaseScraper:
         #    folder,
         # )
 
-        if existing_files := list(Path(folder).glob(f"{prefix}*")):
+        if existing_files := self.glob_cache(folder, f"{prefix}*"):
             if len(existing_files) > 1:
                 msg = f"Found multiple files matching {prefix}"
                 raise RuntimeError(msg)
@@ -633,7 +1094,10 @@ class BaseScraper:
         if new_file_path.suffix != should_have_suffix:
             new_file_path = new_file_path.with_suffix(should_have_suffix)
         self.log.debug("Moving downloaded file to %s", new_file_path)
-        return image_path.rename(new_file_path)
+        new_file_path = image_path.rename(new_file_path)
+        self.cache_index.add(new_file_path)
+        self.store_blob(new_file_path)
+        return new_file_path
 
     def external_download_image(
         self,
@@ -655,7 +1119,7 @@ class BaseScraper:
             folder,
             url,
         )
-        if not list(Path(folder).glob(glob)):
+        if not self.glob_cache(folder, glob):
             self.clear_folder(folder)
             headers = {
                 "User-Agent": (
@@ -686,35 +1150,36 @@ class BaseScraper:
         # A file was found, nothing downloaded
         return None
 
+    def watch_files(
+        self,
+        glob: str = "*",
+        folder: Path | None = None,
+    ) -> FileWatcher:
+        """
+        Returns a FileWatcher for glob in folder (default TEMP). Use it
+        as a context manager around the click/print that creates the
+        file, and call wait() to get the completed file(s).
+        """
+        if folder is None:
+            folder = self.cache["TEMP"]
+        return FileWatcher(folder, glob)
+
     def wait_for_files(
         self,
         glob: str,
         folder: Path | None = None,
     ) -> list[Path]:
-        if folder is None:
-            folder = self.cache["TEMP"]
-        files = list(folder.glob(glob))
-        wait_count = 0
-        while not files:
-            files = list(folder.glob(glob))
-            time.sleep(3)
-            wait_count += 1
-            if wait_count > 60:  # noqa: PLR2004
-                self.log.error(
+        with self.watch_files(glob, folder) as watcher:
+            try:
+                return watcher.wait()
+            except TimeoutError:
+                self.log.error(  # noqa: TRY400
                     RED(
                         "We have been waiting for a file for 3 minutes,"
                         " something is wrong...",
                     ),
                 )
-                msg = f"{folder}/{glob}"
-                raise NotImplementedError(msg)
-        return files
-
-    def rand_sleep(self, min_seconds: int = 0, max_seconds: int = 5) -> None:
-        """
-        Wait rand(min_seconds(0), max_seconds(5)), so we don't spam Amazon.
-        """
-        time.sleep(random.randint(min_seconds, max_seconds))  # noqa: S311
+                raise
 
     def move_file(
         self,
@@ -739,23 +1204,56 @@ class BaseScraper:
                 time.sleep(3)
                 continue
             break
+        self.cache_index.discard(old_path)
+        self.cache_index.add(new_path)
+        self.store_blob(new_path)
+
+    def store_blob(self, path: Path | str) -> None:
+        """
+        Replaces path with a hardlink to an identical file in the cache,
+        if there is one. See blobstore.
+        """
+        path = Path(path)
+        if settings.CACHE_DEDUPLICATE and path.parent != self.cache["TEMP"]:
+            blobstore.store(path, Path(settings.CACHE_BASE) / "blobs")
 
     def makedir(self, path: Path | str) -> None:
+        path = Path(path)
+        # The folders we create, to add them to the cache index
+        created = []
+        folder = path
+        while not folder.exists() and folder != folder.parent:
+            created.append(folder)
+            folder = folder.parent
         with contextlib.suppress(FileExistsError):
             path.mkdir(parents=True)
+        self.cache_index.add_folders(created[::-1])
 
     def remove(self, path: Path | str) -> bool:
         if isinstance(path, str):
             path = Path(path).resolve()
+        path = cachestore.stored_path(path) or path
         try:
             path.unlink()
         except FileNotFoundError:
             return False
         else:
             return True
+        finally:
+            self.cache_index.discard(path)
 
     def can_read(self, path: Path | str):
-        return os.access(path, os.R_OK)
+        found = [self.cache_index.exists(v) for v in cachestore.variants(path)]
+        if None not in found:
+            return any(found)
+        return os.access(cachestore.stored_path(path) or path, os.R_OK)
+
+    def glob_cache(self, folder: Path, pattern: str) -> list[Path]:
+        """Like list(folder.glob(pattern)), from the index if it can"""
+        found = self.cache_index.glob(folder, pattern)
+        if found is None:
+            return list(Path(folder).glob(pattern))
+        return found
 
     def write(
         self,
@@ -774,20 +1272,29 @@ class BaseScraper:
         if from_base64:
             content = base64.b64decode(content, validate=True)
         if to_json:
-            content = json.dumps(content, indent=4, cls=WSJSONEncoder)
+            content = jsoncodec.dumps(content)
+        if html and not isinstance(content, str):
+            # Pages from the browser are saved as is, only serialize trees
+            content = tostring(content).decode("utf-8")
         if html:
-            html_element = fromstring(content)
-            content = tostring(html_element).decode("utf-8")
+            # Compressed according to WS_CACHE_COMPRESSION
+            written = cachestore.write_text(path, content)
+            for variant in cachestore.variants(path):
+                self.cache_index.discard(variant)
+            self.cache_index.add(written)
+            return content
         if binary:
             write_mode += "b"
             kwargs = {}
+            blobstore.unshare(path)
         with path.open(
             write_mode,
             **kwargs,
         ) as file:
             file.write(content)
-        if html:
-            return html_element
+        self.cache_index.add(path)
+        if binary:
+            self.store_blob(path)
         return content
 
     @classmethod
@@ -807,58 +1314,189 @@ class BaseScraper:
         from_csv=False,
         **kwargs,
     ) -> Any:
-        if isinstance(path, str):
-            path = Path(path)
-        with path.open(encoding="utf-8-sig") as file:
-            if from_csv:
-                return list(csv.DictReader(file, **kwargs))
-            contents: str = file.read()
-            if from_json:
-                try:
-                    contents = json.loads(contents)
-                except json.decoder.JSONDecodeError as jde:
-                    cls.log.exception("Encountered error when reading %s", path)
-                    msg = f"Encountered error when reading {path}"
-                    raise OSError(
-                        msg,
-                        jde,
-                    ) from jde
-            elif from_html:
-                contents = fromstring(contents)
-            return contents
+        return fileio.read(
+            path,
+            from_json=from_json,
+            from_html=from_html,
+            from_csv=from_csv,
+            **kwargs,
+        )
 
-    def wait_for_stable_file(self, filename: Path | str):
-        while not self.can_read(filename):
-            self.log.debug("File does not exist yet: %s", filename.name)
-            time.sleep(1)
-        size_stable = False
-        counter = 10
-        while not size_stable:
-            sz1 = filename.stat().st_size
-            time.sleep(2)
-            sz2 = filename.stat().st_size
-            time.sleep(2)
-            sz3 = filename.stat().st_size
-            size_stable = (sz1 == sz2 == sz3) and sz1 + sz2 + sz3 > 0
-            self.log.debug(
-                "Watching for stable file size larger than 0 bytes: %s %s"
-                " %s %s",
-                sz1,
-                sz2,
-                sz3,
-                Path(filename).name,
-            )
-            counter -= 1
-            if counter == 0:
-                msg = (
-                    f"Waited 40 seconds for {filename} to be stable, never"
-                    " stabilized."
-                )
-                raise OSError(
-                    msg,
+    def browser_print_to_pdf(self, output: Path | str) -> Path:
+        """
+        Prints the current page to output as PDF.
+
+        Uses the WebDriver print command and writes the PDF directly
+        to output. If WS_PDF_BACKEND is printer, or the print command
+        fails, prints with window.print() to PDF_TEMP_FILENAME and
+        moves the file when it is complete.
+
+            Returns:
+                output (Path): the path to the PDF
+        """
+        output = Path(output)
+        if settings.PDF_BACKEND == "webdriver":
+            print_options = PrintOptions()
+            print_options.background = False
+            print_options.shrink_to_fit = True
+            try:
+                pdf = self.browser.print_page(print_options)
+            except WebDriverException as wde:
+                self.log.warning(
+                    AMBER("WebDriver print failed, using printer: %s"),
+                    wde.msg,
                 )
+            else:
+                self.write(output, pdf, from_base64=True, binary=True)
+                self.log.debug("Printed %s", output.name)
+                return output
+        self.remove(self.cache["PDF_TEMP_FILENAME"])
+        with self.watch_files(self.cache["PDF_TEMP_FILENAME"].name) as watcher:
+            self.browser.execute_script("window.print();")
+            watcher.wait()
+        self.move_file(self.cache["PDF_TEMP_FILENAME"], output)
+        return output
+
+    def wait_for_stable_file(self, filename: Path | str):
+        filename = Path(filename)
+        self.wait_for_files(filename.name, filename.parent)
         self.log.debug("File %s appears stable.", filename)
 
+    @classmethod
+    def extract_spec(cls, spec: dict) -> dict:
+        """
+        Normalizes a extraction spec, expanding CSS selector strings
+        to {"css": selector}.
+        """
+        normalized = {}
+        for name, field in spec.items():
+            if isinstance(field, str):
+                field = {"css": field}  # noqa: PLW2901
+            elif "fields" in field:
+                field = {  # noqa: PLW2901
+                    **field,
+                    "fields": cls.extract_spec(field["fields"]),
+                }
+            normalized[name] = field
+        return normalized
+
+    def browser_extract(
+        self,
+        spec: dict,
+        element: WebElement | None = None,
+    ) -> dict:
+        """
+        Extracts data from the current page (or below element) using
+        one execute_script call.
+
+        spec maps names to CSS selector strings or dicts with keys
+            css/xpath: selector, relative to the parent. If both are
+                missing, the parent element itself is used
+            all: return a list of all matches, not just the first
+            attr: return this attribute
+            prop: return this DOM property (default innerText, stripped)
+            fields: a nested spec, evaluated for each match
+
+        Missing elements give None (or [] with all).
+
+            Returns:
+                data (dict): the extracted data, keyed like spec
+        """
+        return self.browser_get_instance().execute_script(
+            EXTRACT_JS,
+            self.extract_spec(spec),
+            element,
+        )
+
+    def browser_snapshot(self, path: Path | str) -> HtmlElement:
+        """
+        Saves the current page source to path, with links made absolute
+        so it can be parsed without the browser.
+
+            Returns:
+                html (HtmlElement): the parsed page
+        """
+        brws = self.browser_get_instance()
+        html = parse_html(brws.page_source)
+        html.make_links_absolute(brws.current_url)
+        self.write(path, html, html=True)
+        return html
+
+    @classmethod
+    def lxml_text(cls, element: HtmlElement) -> str:
+        """
+        Approximates innerText for a lxml element: whitespace is
+        collapsed, block elements and <br> give line breaks.
+        """
+        parts = []
+
+        def walk(element: HtmlElement, *, tail: bool = True) -> None:
+            tag = element.tag if isinstance(element.tag, str) else None
+            if tag and tag not in HIDDEN_TAGS:
+                if tag == "br" or tag in BLOCK_TAGS:
+                    parts.append("\n")
+                elif tag in ("td", "th"):
+                    parts.append(" ")
+                parts.append(element.text or "")
+                for child in element:
+                    walk(child)
+                if tag in BLOCK_TAGS:
+                    parts.append("\n")
+            if tail:
+                parts.append(element.tail or "")
+
+        walk(element, tail=False)
+        lines = (" ".join(line.split()) for line in "".join(parts).split("\n"))
+        return "\n".join(line for line in lines if line)
+
+    @classmethod
+    def lxml_find(cls, element: HtmlElement, field: dict) -> list:
+        if "css" in field:
+            return element.xpath(css_to_xpath(field["css"]))
+        if "xpath" in field:
+            return element.xpath(field["xpath"])
+        return [element]
+
+    @classmethod
+    def lxml_extract(cls, spec: dict, element: HtmlElement) -> dict:
+        """
+        Extracts data from a parsed page (or element) with the same
+        spec as browser_extract, so parsing can be done without the
+        browser from a saved page.
+
+        The DOM properties innerText and textContent are emulated, for
+        other properties (href, src, ...) the attribute is used.
+
+            Returns:
+                data (dict): the extracted data, keyed like spec
+        """
+
+        def value(node: HtmlElement, field: dict) -> Any:
+            if "fields" in field:
+                return extract(node, field["fields"])
+            if "attr" in field:
+                return node.get(field["attr"])
+            prop = field.get("prop", "innerText")
+            if prop == "innerText":
+                return cls.lxml_text(node)
+            if prop == "textContent":
+                return node.text_content()
+            if prop == "className":
+                return node.get("class", "")
+            return node.get(prop)
+
+        def extract(context: HtmlElement, fields: dict) -> dict:
+            out = {}
+            for name, field in fields.items():
+                nodes = cls.lxml_find(context, field)
+                if field.get("all"):
+                    out[name] = [value(node, field) for node in nodes]
+                else:
+                    out[name] = value(nodes[0], field) if nodes else None
+            return out
+
+        return extract(element, cls.extract_spec(spec))
+
     def browser_cleanup_page(
         # We are not modifying the values
         # pylint: disable=dangerous-default-value
@@ -922,62 +1560,3 @@ class BaseScraper:
                 "dd",
             ).text,
         )
-
-    def load_currency_to_nok_dict(
-        self,
-    ) -> dict[date, dict[str, tuple[int, str]]]:
-        input_csv = settings.CACHE_BASE / "EXR.csv"
-        self.log.debug("Loading currency conversion data from %s", input_csv)
-        index: dict = self.read(
-            input_csv,
-            from_csv=True,
-            delimiter=";",
-        )
-        data_dict = {}
-
-        for line in index:
-            date_name = date.fromisoformat(line["TIME_PERIOD"])
-            if date_name not in data_dict:
-                data_dict[date_name] = {}
-            data_dict[date_name][line["BASE_CUR"]] = (
-                Decimal(math.pow(10, int(line["UNIT_MULT"]))),
-                Price.fromstring(
-                    line["OBS_VALUE"],
-                    decimal_separator=",",
-                ).amount,
-            )
-
-        def daterange(start_date, end_date):
-            for num_days in range(int((end_date - start_date).days - 1)):
-                yield start_date + datetime.timedelta(num_days + 1)
-
-        sorted_data_dict = sorted(data_dict.keys())
-
-        prev_date = None
-        self.log.debug("Filling missing dates with previous valid date")
-        for idx, date_index in enumerate(sorted_data_dict):
-            if idx > 0:
-                for created_date_index in daterange(
-                    prev_date,
-                    date_index,
-                ):
-                    data_dict[str(created_date_index)] = data_dict[prev_date]
-                    prev_date = str(created_date_index)
-            prev_date = date_index
-
-        last_day = sorted_data_dict[len(sorted_data_dict) - 1]
-        today = datetime.datetime.now().astimezone().date()
-        if last_day < today:
-            for created_date_index in daterange(last_day, today):
-                data_dict[str(created_date_index)] = data_dict[last_day]
-            data_dict[str(today)] = data_dict[last_day]
-        return {str(key): value for (key, value) in data_dict.items()}
-
-
-class WSJSONEncoder(JSONEncoder):
-    def default(self, o):
-        if isinstance(o, Path):
-            return str(o)
-        if isinstance(o, datetime.datetime):
-            return str(o)
-        return super().default(o)
@@ -0,0 +1,92 @@
+"""
+Content addressed store for thumbnails, PDFs and other downloads.
+
+Every file stored is hardlinked as blobs/<xx>/<sha256><suffix> below
+CACHE_BASE, and a file with the same content already in the store
+replaces it with another hardlink. The same thumbnail or item PDF saved
+for many orders (or shops) then takes the space of one file, while the
+scrapers keep using their own paths. If the filesystem does not support
+hardlinks, files are left as they are.
+
+A blob is shared by all its paths, so a path must be unlinked before it
+is written again (see unshare), not overwritten in place.
+"""
+import hashlib
+import logging
+import os
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+# Only files with these suffixes are stored, HTML and JSON are
+# unique per order
+SUFFIXES = {".gif", ".jpeg", ".jpg", ".pdf", ".png", ".webp"}
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with Path(path).open("rb") as file:
+        while chunk := file.read(2**20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def blob_path(folder: Path, digest: str, suffix: str) -> Path:
+    return Path(folder) / digest[:2] / (digest + suffix.lower())
+
+
+def unshare(path: Path) -> None:
+    """Unlinks path if it is a stored blob, so writing it is safe"""
+    path = Path(path)
+    if path.is_file() and path.stat().st_nlink > 1:
+        path.unlink()
+
+
+def store(path: Path, folder: Path) -> Path | None:
+    """
+    Stores path in the blob folder, or replaces it with a hardlink to
+    the blob with the same content.
+
+        Returns:
+            blob (Path): the blob, or None if path is not stored
+    """
+    path = Path(path)
+    if path.suffix.lower() not in SUFFIXES or not path.is_file():
+        return None
+    blob = blob_path(folder, file_digest(path), path.suffix)
+    try:
+        if not blob.is_file():
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            os.link(path, blob)
+        elif not path.samefile(blob):
+            link = path.with_name(path.name + ".link")
+            link.unlink(missing_ok=True)
+            os.link(blob, link)
+            link.replace(path)
+            log.debug("%s is a copy of %s, linked it", path.name, blob.name)
+    except OSError as exc:
+        log.debug("Could not hardlink %s: %s", path, exc)
+        return None
+    return blob
+
+
+def store_folder(folder: Path, blob_folder: Path) -> tuple[int, int]:
+    """
+    Stores all files below folder.
+
+        Returns:
+            count (int): files stored
+            saved (int): bytes no longer used by duplicates
+    """
+    count = saved = 0
+    for path in sorted(Path(folder).glob("**/*")):
+        if path.suffix.lower() not in SUFFIXES or not path.is_file():
+            continue
+        before = path.stat()
+        if store(path, blob_folder) is None:
+            continue
+        count += 1
+        # Replaced by a link to a blob, the old file is gone
+        if before.st_nlink == 1 and not os.path.samestat(before, path.stat()):
+            saved += before.st_size
+    return count, saved
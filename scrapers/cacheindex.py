@@ -0,0 +1,196 @@
+"""
+In-memory index of the file names in a shop's cache.
+
+Built once per run with os.scandir, so checking if a file exists or
+finding files with a prefix does not touch the disk. The listing of
+every folder is saved with the folder's mtime, and on the next run
+only folders whose mtime has changed are listed again. Files written,
+moved and removed by the scraper helpers update the index, and so do
+folders created with BaseScraper.makedir.
+
+Folders the index does not know (skipped, created during the run or
+outside the cache) are looked up on disk as before.
+"""
+import fnmatch
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+from . import jsoncodec
+
+log = logging.getLogger(__name__)
+
+# A folder changed this close to when it was listed may change again
+# without a new mtime (coarse timestamps), so it is listed next run
+RACY_SECONDS = 2
+
+
+class CacheIndex:
+    """
+    Index of the files below root, persisted in index_path. Folders
+    in skip (and below them) are not indexed.
+    """
+
+    def __init__(
+        self,
+        root: Path | None = None,
+        index_path: Path | None = None,
+        skip: list[Path] | None = None,
+    ):
+        self.root = Path(root) if root else None
+        self.index_path = Path(index_path) if index_path else None
+        self.skip = {Path(path) for path in skip or []}
+        # folder -> names of the files in it
+        self.folders: dict[Path, set[str]] = {}
+        # folder -> names of the folders in it
+        self.dirs: dict[Path, set[str]] = {}
+        # relative folder -> the listing saved in index_path
+        self.entries: dict[str, dict] = {}
+        self.listed = 0
+        self.reused = 0
+
+    def build(self) -> "CacheIndex":
+        """
+        Indexes root, listing only the folders that changed since the
+        index was saved
+        """
+        saved = {}
+        if self.index_path:
+            try:
+                saved = jsoncodec.load(self.index_path)["folders"]
+            except (FileNotFoundError, KeyError, json.decoder.JSONDecodeError):
+                saved = {}
+        pending = [self.root]
+        while pending:
+            folder = pending.pop()
+            try:
+                mtime_ns = folder.stat().st_mtime_ns
+            except FileNotFoundError:
+                continue
+            key = folder.relative_to(self.root).as_posix()
+            entry = saved.get(key)
+            if entry is None or entry["mtime_ns"] != mtime_ns:
+                entry = self.list_folder(folder, mtime_ns)
+                self.listed += 1
+            else:
+                self.reused += 1
+            self.entries[key] = entry
+            self.folders[folder] = set(entry["files"])
+            self.dirs[folder] = set(entry["dirs"])
+            pending.extend(
+                folder / name
+                for name in entry["dirs"]
+                if folder / name not in self.skip
+            )
+        log.debug(
+            "Indexed %s: listed %s folders, %s unchanged",
+            self.root,
+            self.listed,
+            self.reused,
+        )
+        return self
+
+    def list_folder(self, folder: Path, mtime_ns: int) -> dict:
+        files, dirs = [], []
+        with os.scandir(folder) as scan:
+            for entry in scan:
+                (dirs if entry.is_dir() else files).append(entry.name)
+        if time.time_ns() - mtime_ns < RACY_SECONDS * 10**9:
+            mtime_ns = None
+        return {"mtime_ns": mtime_ns, "files": files, "dirs": dirs}
+
+    def save(self) -> None:
+        """Saves the listings made by build()"""
+        if not self.index_path:
+            return
+        tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+        jsoncodec.dump({"folders": self.entries}, tmp_path, indent=None)
+        tmp_path.replace(self.index_path)
+
+    def exists(self, path: Path) -> bool | None:
+        """
+        Returns if path is a file, or None if its folder is not indexed
+        """
+        path = Path(path)
+        names = self.folders.get(path.parent)
+        if names is None:
+            return None
+        return path.name in names
+
+    def below(self, folder: Path) -> list[Path] | None:
+        """
+        Returns folder and all folders below it, or None if any of them
+        is not indexed
+        """
+        found = []
+        pending = [folder]
+        while pending:
+            folder = pending.pop()
+            if folder not in self.folders:
+                return None
+            found.append(folder)
+            pending.extend(folder / name for name in self.dirs[folder])
+        return found
+
+    def glob(self, folder: Path, pattern: str) -> list[Path] | None:
+        """
+        Returns the files below folder matching pattern, sorted, or
+        None if a folder it needs is not indexed. The parts of pattern
+        before the last / match folder names, ** matches any number
+        of folders.
+        """
+        *dir_parts, file_part = pattern.split("/")
+        folders = [Path(folder)]
+        for part in dir_parts:
+            matched = []
+            for parent in folders:
+                if parent not in self.folders:
+                    return None
+                if part == "**":
+                    below = self.below(parent)
+                    if below is None:
+                        return None
+                    matched.extend(below)
+                else:
+                    matched.extend(
+                        parent / name
+                        for name in self.dirs[parent]
+                        if fnmatch.fnmatchcase(name, part)
+                    )
+            # ** can reach a folder more than one way
+            folders = list(dict.fromkeys(matched))
+        found = []
+        for parent in folders:
+            names = self.folders.get(parent)
+            if names is None:
+                return None
+            found.extend(
+                parent / name
+                for name in names
+                if fnmatch.fnmatchcase(name, file_part)
+            )
+        return sorted(found)
+
+    def add_folders(self, folders: list[Path]) -> None:
+        """
+        Indexes folders, new and empty, listed from the top. Folders
+        whose parent is not indexed are ignored.
+        """
+        for folder in map(Path, folders):
+            if folder.parent not in self.folders or folder in self.skip:
+                continue
+            self.dirs[folder.parent].add(folder.name)
+            self.folders.setdefault(folder, set())
+            self.dirs.setdefault(folder, set())
+
+    def add(self, path: Path) -> None:
+        path = Path(path)
+        if path.parent in self.folders:
+            self.folders[path.parent].add(path.name)
+
+    def discard(self, path: Path) -> None:
+        path = Path(path)
+        if path.parent in self.folders:
+            self.folders[path.parent].discard(path.name)
@@ -0,0 +1,151 @@
+"""
+Compressed storage of HTML in the cache.
+
+HTML is written compressed according to WS_CACHE_COMPRESSION, as
+i.e. order.html.gz, but always referred to by its plain name. Reading
+a plain name finds whichever variant exists, so caches written before
+compression (or with another method) keep working. migrate() rewrites
+a cache with the current method.
+"""
+import gzip
+import logging
+from collections.abc import Iterator
+from pathlib import Path
+
+from . import settings
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+log = logging.getLogger(__name__)
+
+
+def resolve_method(method: str) -> str:
+    if method == "zstd" and not zstandard:
+        log.warning("zstandard is not installed, compressing with gzip")
+        return "gzip"
+    return method
+
+
+METHOD = resolve_method(settings.CACHE_COMPRESSION)
+
+
+def variants(path: Path) -> list[Path]:
+    """The paths path may be stored as, plain first"""
+    path = Path(path)
+    return [path] + [
+        path.with_name(path.name + suffix) for suffix in SUFFIXES.values()
+    ]
+
+
+def stored_path(path: Path) -> Path | None:
+    """Returns the variant of path that exists, or None"""
+    for variant in variants(path):
+        if variant.is_file():
+            return variant
+    return None
+
+
+def exists(path: Path) -> bool:
+    return stored_path(path) is not None
+
+
+def plain_path(path: Path) -> Path:
+    """Returns the plain name of a (possibly compressed) cache file"""
+    path = Path(path)
+    for suffix in SUFFIXES.values():
+        if path.name.endswith(suffix):
+            return path.with_name(path.name.removesuffix(suffix))
+    return path
+
+
+def glob(folder: Path, pattern: str) -> Iterator[Path]:
+    """Like folder.glob(pattern), for the plain names of cache files"""
+    seen = set()
+    for suffix in ["", *SUFFIXES.values()]:
+        for path in Path(folder).glob(pattern + suffix):
+            plain = plain_path(path) if suffix else path
+            if plain not in seen:
+                seen.add(plain)
+                yield plain
+
+
+def compress(data: bytes, method: str) -> bytes:
+    if method == "gzip":
+        # mtime=0 so unchanged pages give identical files
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    if method == "zstd":
+        return zstandard.ZstdCompressor(level=9).compress(data)
+    return data
+
+
+def decompress(data: bytes, path: Path) -> bytes:
+    if path.name.endswith(SUFFIXES["gzip"]):
+        return gzip.decompress(data)
+    if path.name.endswith(SUFFIXES["zstd"]):
+        if not zstandard:
+            msg = f"zstandard is needed to read {path}"
+            raise ModuleNotFoundError(msg)
+        return zstandard.ZstdDecompressor().decompress(data)
+    return data
+
+
+def read_bytes(path: Path) -> bytes:
+    """Reads the cache file path, from whichever variant exists"""
+    variant = stored_path(path)
+    if variant is None:
+        msg = f"No such file in cache: {path}"
+        raise FileNotFoundError(msg)
+    return decompress(variant.read_bytes(), variant)
+
+
+def read_text(path: Path) -> str:
+    return read_bytes(path).decode("utf-8-sig")
+
+
+def write_bytes(path: Path, data: bytes, method: str = METHOD) -> Path:
+    """
+    Writes data to path compressed with method, and removes any other
+    variant of path so it can not be read instead.
+
+        Returns:
+            path (Path): the file written
+    """
+    path = Path(path)
+    target = path.with_name(path.name + SUFFIXES.get(method, ""))
+    target.write_bytes(compress(data, method))
+    for variant in variants(path):
+        if variant != target:
+            variant.unlink(missing_ok=True)
+    return target
+
+
+def write_text(path: Path, content: str, method: str = METHOD) -> Path:
+    return write_bytes(path, content.encode("utf-8"), method)
+
+
+def migrate(folder: Path, method: str = METHOD) -> tuple[int, int, int]:
+    """
+    Rewrites all HTML below folder compressed with method.
+
+        Returns:
+            count (int): files rewritten
+            before (int): their size before, in bytes
+            after (int): their size after, in bytes
+    """
+    count = before = after = 0
+    for path in glob(folder, "**/*.html"):
+        variant = stored_path(path)
+        if variant == path.with_name(path.name + SUFFIXES.get(method, "")):
+            continue
+        size = variant.stat().st_size
+        target = write_bytes(path, read_bytes(path), method)
+        count += 1
+        before += size
+        after += target.stat().st_size
+        log.debug("Rewrote %s", target)
+    return count, before, after
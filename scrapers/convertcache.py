@@ -0,0 +1,113 @@
+"""
+Cache of orders converted for the JSON export.
+
+Every source file (i.e. an order.json) gets a cache entry with the orders
+converted from it, and the size and mtime of the source, of the files the
+orders reference and of the code that converted them. On the next export
+the orders are read from the entry if none of these have changed, so only
+new or changed orders are converted again.
+"""
+import hashlib
+import json
+import logging
+from pathlib import Path
+
+from . import jsoncodec
+from .archive import fingerprint
+
+log = logging.getLogger(__name__)
+
+
+def maybe_fingerprint(path: Path) -> list[int] | None:
+    try:
+        return fingerprint(path)
+    except FileNotFoundError:
+        return None
+
+
+class ConversionCache:
+    """
+    Cache entries for sources below base, stored in folder. code is the
+    files the conversion depends on, any change to them makes every
+    entry stale.
+    """
+
+    def __init__(self, folder: Path, base: Path, code: list[Path]):
+        self.folder = Path(folder)
+        self.base = Path(base)
+        self.code = [maybe_fingerprint(path) for path in code]
+        self.used: set[Path] = set()
+        self.hits = 0
+        self.misses = 0
+        self.folder.mkdir(parents=True, exist_ok=True)
+
+    def entry_path(self, source: Path) -> Path:
+        key = Path(source).relative_to(self.base).as_posix()
+        return self.folder / (
+            hashlib.sha1(key.encode("utf-8"), usedforsecurity=False).hexdigest()
+            + ".json"
+        )
+
+    def load(self, source: Path) -> list[dict] | None:
+        """
+        Returns the orders converted from source, or None if there are
+        none or anything they were converted from has changed.
+        """
+        entry_path = self.entry_path(source)
+        self.used.add(entry_path)
+        try:
+            entry = jsoncodec.load(entry_path)
+        except (FileNotFoundError, json.decoder.JSONDecodeError):
+            self.misses += 1
+            return None
+        if (
+            entry["code"] != self.code
+            or entry["source"] != maybe_fingerprint(source)
+            or any(
+                maybe_fingerprint(self.base / name) != value
+                for name, value in entry["files"].items()
+            )
+        ):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["orders"]
+
+    def save(
+        self,
+        source: Path,
+        orders: list[dict],
+        files: dict[str, Path],
+    ) -> None:
+        """
+        Saves the orders converted from source. files are the files
+        the orders reference (archive name -> file).
+        """
+        entry_path = self.entry_path(source)
+        self.used.add(entry_path)
+        jsoncodec.dump(
+            {
+                "code": self.code,
+                "source": maybe_fingerprint(source),
+                "files": {
+                    Path(path).relative_to(self.base).as_posix(): (
+                        maybe_fingerprint(path)
+                    )
+                    for path in files.values()
+                },
+                "orders": orders,
+            },
+            entry_path,
+            indent=None,
+        )
+
+    def prune(self) -> None:
+        """Removes entries for sources that were not loaded or saved"""
+        for entry_path in self.folder.glob("*.json"):
+            if entry_path not in self.used:
+                entry_path.unlink()
+        log.info(
+            "Converted %s order files, %s unchanged since last export",
+            self.misses,
+            self.hits,
+        )
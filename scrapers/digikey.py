@@ -1,9 +1,9 @@
 # ruff: noqa: C901,ERA001,PLR0912,PLR0915
-import json
 from datetime import datetime
 from pathlib import Path
 from typing import Final
 
+from . import jsoncodec
 from .base import BaseScraper
 
 
@@ -51,8 +51,9 @@ class DigikeyScraper(BaseScraper):
                 self.log.error(msg)
                 raise ValueError(msg)
 
-        with (self.cache["ORDER_LISTS"] / "invoices.json").open() as f:
-            invoices_json = json.load(f)
+        invoices_json = jsoncodec.load(
+            self.cache["ORDER_LISTS"] / "invoices.json",
+        )
 
         orders: dict[str] = {}
         for invoice in invoices_json:
@@ -114,8 +115,9 @@ class DigikeyScraper(BaseScraper):
                 raise ValueError(msg)
             orders[order_number] = order
 
-        with (self.cache["ORDER_LISTS"] / "invoiceDetails.json").open() as f:
-            invoice_details_json = json.load(f)
+        invoice_details_json = jsoncodec.load(
+            self.cache["ORDER_LISTS"] / "invoiceDetails.json",
+        )
 
         for details in invoice_details_json:
             order_number = str(details["orderNumber"])
@@ -202,9 +204,15 @@ class DigikeyScraper(BaseScraper):
 
                 for file in self.cache["TEMP"].glob("*"):
                     if file.name == "temporary.pdf":
-                        file.rename(item_folder / "attachment-item-scrape.pdf")
+                        self.move_file(
+                            file,
+                            item_folder / "attachment-item-scrape.pdf",
+                        )
                     else:
-                        file.rename(item_folder / f"attachment-{file.name}")
+                        self.move_file(
+                            file,
+                            item_folder / f"attachment-{file.name}",
+                        )
 
             item["attachments"] = get_files(item_folder)
 
@@ -246,9 +254,12 @@ class DigikeyScraper(BaseScraper):
             "https://www.digikey.no/OrderHistory/ReviewOrder/{order_id}",
             "https://www.digikey.no/no/products/detail/-/-/{item_id}",
         )
+        self.output_schema_json(structure, self.std_json_orders())
+
+    def std_json_orders(self):
+        """Yields the orders for command_to_std_json, one at a time"""
         scrape_data = self.command_scrape()
         self.pprint(scrape_data, 260)
-        structure["orders"] = []
         for order_id, scraped_data in scrape_data.items():
             order = {
                 "id": str(order_id),
@@ -355,8 +366,7 @@ class DigikeyScraper(BaseScraper):
                 del scraped_data[d]
             assert scraped_data == {}, f"scraped_data is empty: {scraped_data}"
             # self.pprint(order)
-            structure["orders"].append(order)
-        self.output_schema_json(structure)
+            yield order
 
     # Class init
     def __init__(self, options: dict):
@@ -51,6 +51,7 @@ class DistrelecScraper(BaseScraper):
         time.sleep(1)
 
         if self.find_element(By.CSS_SELECTOR, "iframe#main-iframe"):
+            self.rate_limit_backoff(expected_url)
             self.log.error(
                 AMBER("Please complete captcha and press enter: ..."),
             )
@@ -59,13 +60,13 @@ class DistrelecScraper(BaseScraper):
         if ens:
             self.log.INFO("Closing cookie banner")
             ens.click()
-            self.rand_sleep(0, 2)
+            time.sleep(1)
 
         signup = self.find_element(By.CSS_SELECTOR, "button.btn-close-signup")
         if signup and signup.is_displayed():
             self.log.debug("Closing mailing list popup")
             signup.click()
-            self.rand_sleep(0, 2)
+            time.sleep(1)
 
         if re.match(self.LOGIN_PAGE_RE, self.browser.current_url):
             self.browser_login(expected_url)
@@ -100,16 +101,13 @@ class DistrelecScraper(BaseScraper):
         if username_data and password_data:
             username = brws.find_element(By.ID, "j_username")
             password = brws.find_element(By.ID, "j_password")
-            self.rand_sleep()
             username.send_keys(username_data)
-            self.rand_sleep()
             password.send_keys(password_data)
 
         # button type submit, class either of ...
         submit = brws.find_element(
             By.CSS_SELECTOR, "button.b-login.js-login-button",
         )
-        self.rand_sleep()
         submit.click()
         try:
             WebDriverWait(brws, 10).until_not(
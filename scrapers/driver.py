@@ -0,0 +1,102 @@
+"""
+Finds the geckodriver binary for Selenium.
+
+webdriver_manager resolves the geckodriver version on every call, which
+may query GitHub. We run it once, and save the path it gave and the
+version of Firefox it was for in CACHE_BASE/geckodriver.json. Later runs
+use the saved driver without webdriver_manager, until Firefox is updated
+or we are asked to refresh (scraper.py --refresh-driver).
+"""
+import functools
+import json
+import logging
+import os
+import subprocess
+from pathlib import Path
+
+from webdriver_manager.core.driver_cache import DriverCacheManager
+from webdriver_manager.core.os_manager import OperationSystemManager
+from webdriver_manager.firefox import GeckoDriverManager as FirefoxDriverManager
+
+from . import jsoncodec, settings
+
+log = logging.getLogger(__name__)
+
+RECORD_PATH = Path(settings.CACHE_BASE) / "geckodriver.json"
+
+
+def firefox_version() -> str | None:
+    """The version of the installed Firefox, or None if not found"""
+    return OperationSystemManager().get_browser_version_from_os("firefox")
+
+
+def geckodriver_version(path: str) -> str | None:
+    try:
+        result = subprocess.run(  # noqa: S603
+            [path, "--version"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    # geckodriver 0.33.0 (a80e5fd61076 2023-04-02 18:31 +0000)
+    return result.stdout.split()[1] if result.stdout else None
+
+
+def load_record() -> dict | None:
+    try:
+        return jsoncodec.load(RECORD_PATH)
+    except (FileNotFoundError, json.decoder.JSONDecodeError):
+        return None
+
+
+@functools.cache
+def geckodriver_path(*, refresh: bool = False) -> str:
+    """
+    Returns the path to geckodriver, from the saved record if it is
+    still valid, else from webdriver_manager. Cached, so a run with
+    several browsers only resolves once.
+    """
+    firefox = firefox_version()
+    record = load_record()
+    if (
+        not refresh
+        and record
+        and Path(record["path"]).is_file()
+        # If we can not tell the version, trust the record
+        and (firefox is None or record["firefox"] == firefox)
+    ):
+        log.debug(
+            "Using geckodriver %s (%s) for Firefox %s",
+            record["version"],
+            record["path"],
+            record["firefox"],
+        )
+        return record["path"]
+
+    log.debug("Resolving geckodriver for Firefox %s", firefox)
+    os.environ["WDM_LOG"] = str(logging.NOTSET)
+    try:
+        path = FirefoxDriverManager(
+            cache_manager=DriverCacheManager(),  #  , version="v0.33.0"
+        ).install()
+    except Exception:
+        # Offline, rate limited by GitHub ...
+        if record and Path(record["path"]).is_file():
+            log.warning(
+                "Could not resolve geckodriver, using %s",
+                record["path"],
+                exc_info=True,
+            )
+            return record["path"]
+        raise
+    jsoncodec.dump(
+        {
+            "path": path,
+            "version": geckodriver_version(path),
+            "firefox": firefox,
+        },
+        RECORD_PATH,
+    )
+    return path
@@ -4,15 +4,20 @@ import re
 import sys
 from datetime import datetime as dtdt
 from pathlib import Path
+from typing import TYPE_CHECKING, Final
 
+from lxml.html import HtmlElement
 from selenium.common.exceptions import NoSuchElementException
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.by import By
-from selenium.webdriver.remote.webelement import WebElement
 
+from . import cachestore
 from .base import BaseScraper
 from .utils import AMBER
 
+if TYPE_CHECKING:
+    from selenium.webdriver.remote.webelement import WebElement
+
 
 class EbayScraper(BaseScraper):
     # Scrape comand and __init__
@@ -381,16 +386,7 @@ class EbayScraper(BaseScraper):
             )
 
         self.log.debug("Printing page to PDF")
-        self.remove(self.cache["PDF_TEMP_FILENAME"])
-
-        self.b.execute_script("window.print();")
-        self.wait_for_stable_file(
-            self.cache["PDF_TEMP_FILENAME"],
-        )
-        self.move_file(
-            self.cache["PDF_TEMP_FILENAME"],
-            item_pdf_file,
-        )
+        self.browser_print_to_pdf(item_pdf_file)
 
         if self.b.current_window_handle != item_page_handle:
             self.b.close()
@@ -433,66 +429,15 @@ class EbayScraper(BaseScraper):
             url = f"https://www.ebay.com/mye/myebay/purchase?filter=year_filter:{keyword}"
             self.log.debug("Scraping order data from %s", url)
             self.browser_visit_page_v2(url)
-            # loop all order cards
-            orders = {}
-            csss = ".m-order-card"
-            for order_card in self.browser.find_elements(By.CSS_SELECTOR, csss):
-                # .m-order-card .secondaryMessage .primary__item--wrapper
-                order_id = order_date = order_total = None
-                csss = ".secondaryMessage .primary__item--wrapper"
-                for pitem in order_card.find_elements(By.CSS_SELECTOR, csss):
-                    spans = pitem.find_elements(
-                        By.CSS_SELECTOR,
-                        ".primary__item--item-text",
-                    )
-                    label = spans[0].text
-                    value = spans[1].text
-                    if label.startswith("Order number"):
-                        order_id = value
-                    elif label.startswith("Order total"):
-                        order_total = self.get_value_currency("total", value)
-                    elif label.startswith("Order date"):
-                        order_date = datetime.datetime.strptime(  # noqa: DTZ007 (unknown timezone)
-                            value,
-                            # Feb 11, 2017
-                            "%b %d, %Y",
-                        )
-                    else:
-                        msg = f"Unexpected order label: {label} {value}"
-                        raise ValueError(msg)
-                if not all([order_id, order_date, order_total]):
-                    msg = (
-                        "Missing order id/date/total: "
-                        f"{order_id}/{order_date}/{order_total}"
-                    )
-                    raise ValueError(msg)
-
-                xpath = ".//a[text()='View order details']"
-                order_details_a = order_card.find_element(By.XPATH, xpath)
-                order = {
-                    "id": order_id,
-                    "date": order_date,
-                    "total": order_total,
-                    "url": order_details_a.get_attribute("href"),
-                    "items": [],
-                }
-
-                for item_card in order_card.find_elements(
-                    By.CSS_SELECTOR,
-                    ".m-item-card",
-                ):
-                    item_id = None
-                    for div in item_card.find_elements(By.TAG_NAME, "div"):
-                        if item_id := div.get_attribute("input-listing-id"):
-                            break
-                    item = {
-                        "id": item_id,
-                    }
-
+            html = self.browser_snapshot(json_file.with_suffix(".html"))
+            orders, thumb_urls = self.lxml_parse_order_list(html)
+            for order_id, order in orders.items():
+                for item in order["items"]:
+                    item_id = item["id"]
                     if thumbnail := self.browser_get_item_thumb(
                         order_id,
                         item_id,
-                        item_card,
+                        thumb_urls[order_id, item_id],
                     ):
                         item["thumbnail"] = thumbnail
 
@@ -501,75 +446,102 @@ class EbayScraper(BaseScraper):
                         item_id,
                     ):
                         item["pdf"] = pdf
+            self.write(json_file, orders, to_json=True)
+            order_list_data.update(orders)
+        return order_list_data
 
-                    xpath = './/div[contains(@class, "item-info-title")]/div'
-                    item["name"] = item_card.find_element(
-                        By.XPATH,
-                        xpath,
-                    ).text
+    def lxml_parse_order_list(
+        self,
+        html: HtmlElement,
+    ) -> tuple[dict, dict[tuple[str, str], str]]:
+        """
+        Parses a saved order list page.
 
-                    xpath = (
-                        ".//div[contains(@class, "
-                        '"item-info-additionalPrice")]/div'
-                    )
-                    item["total"] = self.get_value_currency(
-                        "total",
-                        item_card.find_element(
-                            By.XPATH,
-                            xpath,
-                        ).text,
+            Returns:
+                orders (dict): orders, by order id
+                thumb_urls (dict): thumbnail URLs, by (order id, item id)
+        """
+        page = self.lxml_extract(self.ORDER_LIST_SPEC, html)
+        orders = {}
+        thumb_urls = {}
+        for order_card in page["orders"]:
+            # .m-order-card .secondaryMessage .primary__item--wrapper
+            order_id = order_date = order_total = None
+            for pitem in order_card["labels"]:
+                label, value = pitem["texts"][:2]
+                if label.startswith("Order number"):
+                    order_id = value
+                elif label.startswith("Order total"):
+                    order_total = self.get_value_currency("total", value)
+                elif label.startswith("Order date"):
+                    order_date = datetime.datetime.strptime(  # noqa: DTZ007 (unknown timezone)
+                        value,
+                        # Feb 11, 2017
+                        "%b %d, %Y",
                     )
+                else:
+                    msg = f"Unexpected order label: {label} {value}"
+                    raise ValueError(msg)
+            if not all([order_id, order_date, order_total]):
+                msg = (
+                    "Missing order id/date/total: "
+                    f"{order_id}/{order_date}/{order_total}"
+                )
+                raise ValueError(msg)
 
-                    xpath = (
-                        ".//div[contains(@class, "
-                        '"item-info-aspectValuesList")]/div'
-                    )
+            order = {
+                "id": order_id,
+                "date": order_date,
+                "total": order_total,
+                "url": order_card["url"],
+                "items": [],
+            }
 
-                    def aspect_to_key(aspect):
-                        parts = aspect.split(":", 1)
-                        label = parts[0].strip()
-                        value = parts[1].strip()
-                        if label.lower() in ["amount", "quantity"]:
-                            # Amount <-> 1 Pcs
-                            # Quantity <-> 3
-                            v = re.match(r"\d*", value)
-                            return "quantity", v.group(0)
-                        return "sku", f"{label}: {value}"
-
-                    aspects = item_card.find_elements(By.XPATH, xpath)
-                    if len(aspects) == 0:
-                        # quantity = 1, no sku
-                        item["sku"] = None
-                        item["quantity"] = 1
-                    else:
-                        if order_id not in self.aspects:
-                            self.aspects[order_id] = {}
-                        if item_id not in self.aspects[order_id]:
-                            self.aspects[order_id][item_id] = []
-                        self.aspects[order_id][item_id] = [
-                            a.text for a in aspects
-                        ]
-                    """
-                    if len(aspects) < 3:  # noqa: PLR2004
-                        for aspect in aspects:
-                            key, value = aspect_to_key(aspect.text)
-                            item[key] = value
-                        if "sku" not in item:
-                            item["sku"] = None
-                        elif "quantity" not in item:
-                            item["quantity"] = 1
-                    else:
-                        msg = "Unexpected aspects (>2): " + str(
-                            [a.text for a in aspects],
-                        )
-                        raise ValueError(msg)
-                    """
-                    order["items"].append(item)
+            for item_card in order_card["items"]:
+                item_id = item_card["id"]
+                item = {
+                    "id": item_id,
+                }
 
-                orders[order_id] = order
-            self.write(json_file, orders, to_json=True)
-            order_list_data.update(orders)
-        return order_list_data
+                thumb_urls[order_id, item_id] = item_card["thumb_url"]
+                item["name"] = item_card["name"]
+
+                item["total"] = self.get_value_currency(
+                    "total",
+                    item_card["total"],
+                )
+
+                aspects = item_card["aspects"]
+                if len(aspects) == 0:
+                    # quantity = 1, no sku
+                    item["sku"] = None
+                    item["quantity"] = 1
+                else:
+                    if order_id not in self.aspects:
+                        self.aspects[order_id] = {}
+                    self.aspects[order_id][item_id] = aspects
+                    # Kept in the order list JSON, so reparsing keeps them
+                    item["extra_data"] = {"aspects": aspects}
+                order["items"].append(item)
+
+            orders[order_id] = order
+        return orders, thumb_urls
+
+    def reparse_cache_files(self) -> list[Path]:
+        return sorted(cachestore.glob(self.cache["ORDER_LISTS"], "*.html"))
+
+    def reparse_cache_file(self, path: Path) -> None:
+        self.aspects = {}
+        orders, _ = self.lxml_parse_order_list(self.read(path, from_html=True))
+        for order_id, order in orders.items():
+            for item in order["items"]:
+                thumb_file = self.file_item_thumb(order_id, item["id"])
+                if self.can_read(thumb_file):
+                    item["thumbnail"] = thumb_file
+                pdf_file = self.file_item_pdf(order_id, item["id"])
+                if self.can_read(pdf_file):
+                    item["pdf"] = pdf_file
+        self.write(path.with_suffix(".json"), orders, to_json=True)
 
     def browser_get_item_pdf(self, order_id: str, item_id: str) -> Path | None:
         pdf_file = self.file_item_pdf(order_id, item_id)
@@ -593,10 +565,10 @@ class EbayScraper(BaseScraper):
         self,
         order_id: str,
         item_id: str,
-        item_card_element: WebElement,
+        thumb_url: str,
     ) -> Path | None:
         thumb_file = self.file_item_thumb(order_id, item_id)
-        thumb_file.parent.mkdir(exist_ok=True)
+        self.makedir(thumb_file.parent)
         if self.can_read(thumb_file):
             self.log.debug(
                 "Found thumbnail for item %s: %s",
@@ -610,11 +582,6 @@ class EbayScraper(BaseScraper):
                 item_id,
             )
             return None
-        image_element = item_card_element.find_element(
-            By.CSS_SELECTOR,
-            ".m-image img",
-        )
-        thumb_url = image_element.get_attribute("src")
         # Ebay "missing" images
         # https://i.ebayimg.com/images/g/unknown
         # https://i.ebayimg.com/images/g/JuIAAOSwXj5XG5VC/s-l*.webp
@@ -679,6 +646,7 @@ class EbayScraper(BaseScraper):
 
     def browser_detect_handle_interrupt(self, expected_url) -> None:
         if "login" in self.b.current_url or "signin" in self.b.current_url:
+            self.rate_limit_backoff(expected_url)
             self.log.error(
                 AMBER(
                     "Please manyally login to eBay, "
@@ -705,85 +673,91 @@ class EbayScraper(BaseScraper):
         structure["metadata"][
             "comment"
         ] = "Order totals may be wrong on older orders"
-        orders = []
-        for order_json_handle in self.cache["ORDERS"].glob("**/order.json"):
-            self.log.debug("Processing %s", order_json_handle.parent.name)
-            order_input = self.read(order_json_handle, from_json=True)
-            order = {
-                "id": order_input["id"],
-                "date": dtdt.strptime(  # noqa: DTZ007
-                    order_input["date"],
-                    "%Y-%m-%d %H:%M:%S",
+        self.output_schema_json(structure, self.std_json_orders())
+
+    def std_json_orders(self):
+        """Yields the orders for command_to_std_json, one at a time"""
+        return self.std_json_cached(
+            sorted(self.glob_cache(self.cache["ORDERS"], "**/order.json")),
+        )
+
+    def std_json_order(self, order_json_handle: Path) -> list[dict]:
+        """Converts the order in order_json_handle for the JSON export"""
+        self.log.debug("Processing %s", order_json_handle.parent.name)
+        order_input = self.read(order_json_handle, from_json=True)
+        order = {
+            "id": order_input["id"],
+            "date": dtdt.strptime(  # noqa: DTZ007
+                order_input["date"],
+                "%Y-%m-%d %H:%M:%S",
+            )
+            .date()
+            .strftime("%Y-%m-%d"),
+            "total": order_input["total"],
+            "extra_data": order_input["extra_data"],
+        }
+        order["extra_data"].update(order_input["orderinfo"])
+        for payment_line in order_input["payment_lines"]:
+            if payment_line[0] == "VAT*":
+                order["tax"] = self.get_value_currency(
+                    payment_line[0],
+                    payment_line[1],
+                )
+            elif payment_line[0] == "Shipping":
+                order["shipping"] = self.get_value_currency(
+                    payment_line[0],
+                    payment_line[1],
                 )
-                .date()
-                .strftime("%Y-%m-%d"),
-                "total": order_input["total"],
-                "extra_data": order_input["extra_data"],
+            elif " item" in payment_line[0]:
+                m = re.match(r"(\d*) items?", payment_line[0])
+                order["extra_data"]["num_items"] = int(m.group(1))
+            else:
+                self.log.warning(
+                    "Unknown payment: %s: %s",
+                    payment_line[0],
+                    payment_line[1],
+                )
+                if "payment" not in order["extra_data"]:
+                    order["extra_data"]["payment"] = {}
+                order["extra_data"]["payment"][
+                    payment_line[0]
+                ] = payment_line[1]
+        order["items"] = []
+        for item_input in order_input["items"]:
+            item = {
+                "id": item_input["id"],
+                "name": item_input["name"],
+                "total": item_input["total"],
+                "quantity": int(item_input["quantity"]),
+                "extra_data": {},
             }
-            order["extra_data"].update(order_input["orderinfo"])
-            for payment_line in order_input["payment_lines"]:
-                if payment_line[0] == "VAT*":
-                    order["tax"] = self.get_value_currency(
-                        payment_line[0],
-                        payment_line[1],
-                    )
-                elif payment_line[0] == "Shipping":
-                    order["shipping"] = self.get_value_currency(
-                        payment_line[0],
-                        payment_line[1],
-                    )
-                elif " item" in payment_line[0]:
-                    m = re.match(r"(\d*) items?", payment_line[0])
-                    order["extra_data"]["num_items"] = int(m.group(1))
-                else:
-                    self.log.warning(
-                        "Unknown payment: %s: %s",
-                        payment_line[0],
-                        payment_line[1],
-                    )
-                    if "payment" not in order["extra_data"]:
-                        order["extra_data"]["payment"] = {}
-                    order["extra_data"]["payment"][
-                        payment_line[0]
-                    ] = payment_line[1]
-            order["items"] = []
-            for item_input in order_input["items"]:
-                item = {
-                    "id": item_input["id"],
-                    "name": item_input["name"],
-                    "total": item_input["total"],
-                    "quantity": int(item_input["quantity"]),
-                    "extra_data": {},
-                }
-                if "extra_data" in item_input:
-                    item["extra_data"] = item_input["extra_data"]
-
-                if "thumbnail" in item_input:
-                    item["thumbnail"] = (
-                        Path(item_input["thumbnail"])
-                        .relative_to(self.cache["BASE"])
-                        .as_posix()
-                    )
-                if "pdf" in item_input:
-                    item["attachments"] = []
-                    item["attachments"].append(
-                        {
-                            "name": "Item PDF",
-                            "path": (
-                                Path(item_input["pdf"])
-                                .relative_to(self.cache["BASE"])
-                                .as_posix()
-                            ),
-                        },
-                    )
+            if "extra_data" in item_input:
+                item["extra_data"] = item_input["extra_data"]
+
+            if "thumbnail" in item_input:
+                item["thumbnail"] = (
+                    Path(item_input["thumbnail"])
+                    .relative_to(self.cache["BASE"])
+                    .as_posix()
+                )
+            if "pdf" in item_input:
+                item["attachments"] = []
+                item["attachments"].append(
+                    {
+                        "name": "Item PDF",
+                        "path": (
+                            Path(item_input["pdf"])
+                            .relative_to(self.cache["BASE"])
+                            .as_posix()
+                        ),
+                    },
+                )
 
-                if "sku" in item_input and item_input["sku"]:
-                    item["variation"] = item_input["sku"]
-                order["items"].append(item)
+            if "sku" in item_input and item_input["sku"]:
+                item["variation"] = item_input["sku"]
+            order["items"].append(item)
 
-            orders.append(order)
-        structure["orders"] = orders
-        self.output_schema_json(structure)
+        return [order]
 
     def __init__(self, options: dict):
         super().__init__(options, __name__)
@@ -797,6 +771,59 @@ class EbayScraper(BaseScraper):
         # TEMP / PDF_TEMP_FILENAME / IMG_TEMP_FILENAME
         super().setup_cache(base_folder)
 
+    ORDER_LIST_SPEC: Final[dict] = {
+        "orders": {
+            "css": ".m-order-card",
+            "all": True,
+            "fields": {
+                "labels": {
+                    "css": ".secondaryMessage .primary__item--wrapper",
+                    "all": True,
+                    "fields": {
+                        "texts": {
+                            "css": ".primary__item--item-text",
+                            "all": True,
+                        },
+                    },
+                },
+                "url": {
+                    "xpath": ".//a[text()='View order details']",
+                    "prop": "href",
+                },
+                "items": {
+                    "css": ".m-item-card",
+                    "all": True,
+                    "fields": {
+                        "id": {
+                            "css": "div[input-listing-id]",
+                            "attr": "input-listing-id",
+                        },
+                        "thumb_url": {"css": ".m-image img", "prop": "src"},
+                        "name": {
+                            "xpath": (
+                                './/div[contains(@class, "item-info-title")]'
+                                "/div"
+                            ),
+                        },
+                        "total": {
+                            "xpath": (
+                                ".//div[contains(@class, "
+                                '"item-info-additionalPrice")]/div'
+                            ),
+                        },
+                        "aspects": {
+                            "xpath": (
+                                ".//div[contains(@class, "
+                                '"item-info-aspectValuesList")]/div'
+                            ),
+                            "all": True,
+                        },
+                    },
+                },
+            },
+        },
+    }
+
     def setup_templates(self) -> None:
         self.ORDER_LIST_START = "https://www.ebay.com/mye/myebay/purchase"
         self.ORDER_LIST_JSON_FILENAME = (
@@ -0,0 +1,168 @@
+"""
+Reading files from the cache and the output folder.
+
+Kept apart from base so scripts that only read the export (shopstats,
+json_to_csv) do not import Selenium.
+
+iter_json_list reads the orders of an export one at a time, with the
+byte offset of each, so read_json_at can read a single order again
+later without holding the export in memory.
+"""
+import codecs
+import csv
+import json
+import logging
+import re
+from collections.abc import Iterator
+from pathlib import Path
+from typing import IO, Any
+
+from . import cachestore, jsoncodec
+
+log = logging.getLogger(__name__)
+
+# Bytes read at a time when streaming JSON
+CHUNK_SIZE = 2**16
+DECODER = json.JSONDecoder()
+NOT_WHITESPACE = re.compile(r"[^ \t\n\r]")
+
+
+def read(
+    path: Path | str,
+    *,
+    from_json=False,
+    from_html=False,
+    from_csv=False,
+    **kwargs,
+) -> Any:
+    if isinstance(path, str):
+        path = Path(path)
+    if from_csv:
+        with path.open(encoding="utf-8-sig") as file:
+            return list(csv.DictReader(file, **kwargs))
+    # HTML may be stored compressed, see cachestore
+    contents: str = cachestore.read_text(path)
+    if from_json:
+        try:
+            contents = jsoncodec.loads(contents)
+        except json.decoder.JSONDecodeError as jde:
+            log.exception("Encountered error when reading %s", path)
+            msg = f"Encountered error when reading {path}"
+            raise OSError(
+                msg,
+                jde,
+            ) from jde
+    elif from_html:
+        # Imports lxml, only needed for HTML
+        from .htmlparse import parse_html  # noqa: PLC0415
+
+        contents = parse_html(contents)
+    return contents
+
+
+class JSONStream:
+    """
+    Decodes JSON values one at a time from the binary file, reading
+    only as much of it as needed, and keeps track of the byte offset
+    each value starts at.
+    """
+
+    def __init__(self, file: IO[bytes]):
+        self.file = file
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.pos = 0
+        # Byte offset in file of buffer[pos]
+        self.offset = file.tell()
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Reads more of the file, returns False at the end"""
+        if self.eof:
+            return False
+        data = self.file.read(CHUNK_SIZE)
+        self.eof = not data
+        self.buffer = self.buffer[self.pos :] + self.decoder.decode(
+            data,
+            final=self.eof,
+        )
+        self.pos = 0
+        return not self.eof
+
+    def consume(self, end: int) -> None:
+        self.offset += len(self.buffer[self.pos : end].encode("utf-8"))
+        self.pos = end
+
+    def peek(self) -> str:
+        """Skips whitespace, and returns the next char ("" at the end)"""
+        while True:
+            match = NOT_WHITESPACE.search(self.buffer, self.pos)
+            if match:
+                self.consume(match.start())
+                return self.buffer[self.pos]
+            self.consume(len(self.buffer))
+            if not self.fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            msg = f"Expected {char!r}"
+            raise json.decoder.JSONDecodeError(msg, self.buffer, self.pos)
+        self.consume(self.pos + 1)
+
+    def value(self) -> tuple[int, Any]:
+        """Returns the next value, and the byte offset it starts at"""
+        self.peek()
+        while True:
+            try:
+                value, end = DECODER.raw_decode(self.buffer, self.pos)
+            except json.decoder.JSONDecodeError:
+                # Probably cut off at the end of the buffer
+                if self.fill():
+                    continue
+                raise
+            # A number may continue in the next chunk
+            if end == len(self.buffer) and self.fill():
+                continue
+            offset = self.offset
+            self.consume(end)
+            return offset, value
+
+
+def iter_json_list(
+    path: Path | str,
+    key: str,
+    other: dict | None = None,
+) -> Iterator[tuple[int, Any]]:
+    """
+    Yields (byte offset, item) for each item in the list key of the JSON
+    object in path, one at a time. The other members of the object are
+    put in other, if given.
+    """
+    with Path(path).open("rb") as file:
+        if file.read(len(codecs.BOM_UTF8)) != codecs.BOM_UTF8:
+            file.seek(0)
+        stream = JSONStream(file)
+        stream.expect("{")
+        while stream.peek() != "}":
+            _, name = stream.value()
+            stream.expect(":")
+            if name == key:
+                stream.expect("[")
+                while stream.peek() != "]":
+                    yield stream.value()
+                    if stream.peek() == ",":
+                        stream.expect(",")
+                stream.expect("]")
+            else:
+                _, value = stream.value()
+                if other is not None:
+                    other[name] = value
+            if stream.peek() == ",":
+                stream.expect(",")
+
+
+def read_json_at(file: IO[bytes], offset: int) -> Any:
+    """Reads the JSON value at the byte offset in file"""
+    file.seek(offset)
+    return JSONStream(file).value()[1]
@@ -0,0 +1,205 @@
+"""
+Detects when files (downloads, prints) have been completely written.
+
+On Linux we use inotify to get told the moment a file is closed after
+writing or renamed into place (Firefox downloads to .part files). On
+other platforms, or if inotify is not avaliable, we poll the folder and
+wait for the file size to be stable.
+"""
+import contextlib
+import ctypes
+import ctypes.util
+import fnmatch
+import logging
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# struct inotify_event { int wd; uint32_t mask, cookie, len; char name[]; }
+INOTIFY_EVENT = struct.Struct("iIII")
+
+# Files that are still being written by the browser
+PARTIAL_SUFFIXES = (".part", ".crdownload", ".tmp")
+
+log = logging.getLogger(__name__)
+
+
+def _load_libc():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(
+            ctypes.util.find_library("c") or "libc.so.6",
+            use_errno=True,
+        )
+    except OSError:
+        return None
+    if not hasattr(libc, "inotify_init1"):
+        return None
+    return libc
+
+
+LIBC = _load_libc()
+
+
+class FileWatcher:
+    """
+    Waits for files matching glob in folder to be completely written.
+
+    Start watching before triggering the download or print, so no
+    events are missed:
+
+        with FileWatcher(folder, "*.pdf") as watcher:
+            element.click()
+            files = watcher.wait()
+
+    Files that already exist are reported once their size has been
+    stable for stable_seconds.
+    """
+
+    def __init__(
+        self,
+        folder: Path,
+        glob: str = "*",
+        *,
+        timeout: float = 180,
+        poll_interval: float = 0.25,
+        stable_seconds: float = 2,
+    ):
+        self.folder = Path(folder)
+        self.glob = glob
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.stable_seconds = stable_seconds
+        self.fd: int | None = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    @property
+    def using_inotify(self) -> bool:
+        return self.fd is not None
+
+    def start(self) -> None:
+        if self.fd is not None or LIBC is None:
+            return
+        fd = LIBC.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            log.debug(
+                "inotify_init1 failed: %s",
+                os.strerror(ctypes.get_errno()),
+            )
+            return
+        wd = LIBC.inotify_add_watch(
+            fd,
+            os.fsencode(self.folder),
+            IN_CLOSE_WRITE | IN_MOVED_TO,
+        )
+        if wd < 0:
+            log.debug(
+                "inotify_add_watch failed for %s: %s",
+                self.folder,
+                os.strerror(ctypes.get_errno()),
+            )
+            os.close(fd)
+            return
+        self.fd = fd
+
+    def close(self) -> None:
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def matches(self, name: str) -> bool:
+        return not name.endswith(PARTIAL_SUFFIXES) and fnmatch.fnmatch(
+            name,
+            self.glob,
+        )
+
+    def _read_events(self, timeout: float) -> list[Path]:
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        completed = []
+        offset = 0
+        while offset < len(data):
+            _wd, _mask, _cookie, length = INOTIFY_EVENT.unpack_from(
+                data,
+                offset,
+            )
+            offset += INOTIFY_EVENT.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+            if name and self.matches(name):
+                completed.append(self.folder / name)
+        return completed
+
+    def _stable_files(
+        self,
+        sizes: dict[Path, tuple[int, float]],
+        now: float,
+    ) -> set[Path]:
+        """
+        Catches files that were complete before we started watching,
+        and is all we have when polling.
+        """
+        stable = set()
+        for path in self.folder.glob(self.glob):
+            if not self.matches(path.name):
+                continue
+            try:
+                size = path.stat().st_size
+            except FileNotFoundError:
+                continue
+            if path not in sizes or sizes[path][0] != size:
+                sizes[path] = (size, now)
+            elif size > 0 and now - sizes[path][1] >= self.stable_seconds:
+                stable.add(path)
+        return stable
+
+    def wait(self) -> list[Path]:
+        """
+        Blocks until at least one matching file is completely written.
+
+            Returns:
+                files (list[Path]): the completed files
+        """
+        deadline = time.monotonic() + self.timeout
+        # path -> (size, monotonic time when we first saw that size)
+        sizes: dict[Path, tuple[int, float]] = {}
+        completed: set[Path] = set()
+        while True:
+            if self.using_inotify:
+                for path in self._read_events(self.poll_interval):
+                    with contextlib.suppress(FileNotFoundError):
+                        if path.stat().st_size > 0:
+                            completed.add(path)
+            else:
+                time.sleep(self.poll_interval)
+            now = time.monotonic()
+            completed |= self._stable_files(sizes, now)
+            completed = {path for path in completed if path.exists()}
+            if completed:
+                return sorted(completed)
+            if now > deadline:
+                msg = (
+                    f"Waited {self.timeout} seconds for {self.folder}/"
+                    f"{self.glob}, no complete file found"
+                )
+                raise TimeoutError(msg)
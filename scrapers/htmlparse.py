@@ -0,0 +1,54 @@
+"""
+Parses HTML from the browser and the cache.
+
+lxml's own HTML parser is many times faster than soupparser (which runs
+BeautifulSoup first), so it is used by default. If it can not parse the
+page, or gives a tree without a body, we fall back to soupparser.
+"""
+import logging
+
+from lxml import etree
+from lxml.html import HtmlElement, document_fromstring, soupparser
+
+log = logging.getLogger(__name__)
+
+
+def is_broken(tree: HtmlElement) -> bool:
+    """
+    A page from a webshop always has something in <body>, if not
+    the parser has probably given up somewhere.
+    """
+    body = tree.find("body")
+    return body is None or len(body) == 0
+
+
+def lxml_parse(content: str | bytes) -> HtmlElement:
+    try:
+        return document_fromstring(content)
+    except ValueError:
+        # lxml does not accept str with a <?xml encoding=...?> declaration
+        if isinstance(content, str):
+            return document_fromstring(content.encode("utf-8"))
+        raise
+
+
+def soup_parse(content: str | bytes) -> HtmlElement:
+    return soupparser.fromstring(content)
+
+
+def parse_html(content: str | bytes) -> HtmlElement:
+    """
+    Parses a HTML page, using lxml and falling back to soupparser.
+
+        Returns:
+            html (HtmlElement): the root (<html>) element
+    """
+    try:
+        tree = lxml_parse(content)
+    except (etree.ParserError, ValueError) as exc:
+        log.debug("lxml failed to parse HTML (%s), using soupparser", exc)
+        return soup_parse(content)
+    if is_broken(tree):
+        log.debug("lxml gave a HTML tree without body, using soupparser")
+        return soup_parse(content)
+    return tree
@@ -1,6 +1,5 @@
 import contextlib
 import email.header
-import json
 import logging
 import os
 import re
@@ -12,7 +11,7 @@ from bs4 import BeautifulSoup
 from imapclient import IMAPClient
 from imapclient.exceptions import LoginError
 
-from . import settings
+from . import jsoncodec, settings
 
 
 class IMAPScraper:
@@ -175,4 +174,4 @@ class IMAPScraper:
             "w",
             encoding="utf-8",
         ) as file:
-            file.write(json.dumps(list(orders), indent=4))
+            file.write(jsoncodec.dumps(list(orders)))
@@ -0,0 +1,87 @@
+"""
+Writes the JSON export one order at a time.
+
+The orders are never held in memory as one list or serialized as one
+string, so memory use does not grow with the number of orders. The
+output is written to a temporary file that only replaces the old
+export when all orders are written and the export is kept.
+"""
+import json
+import logging
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+
+class JSONExportWriter:
+    """
+    Writes {"metadata": ..., "orders": [...]} to path, with the same
+    formatting as json.dumps(structure, indent=indent). Use as a context
+    manager, and call discard() to keep the old export.
+    """
+
+    def __init__(self, path: Path, metadata: dict, indent: int | None = 4):
+        self.path = Path(path)
+        self.temp_path = self.path.with_name(self.path.name + ".tmp")
+        self.metadata = metadata
+        self.indent = indent
+        self.count = 0
+        self.discarded = False
+        self.file = None
+
+    def dumps(self, obj: object, level: int) -> str:
+        """
+        Returns obj as JSON, indented as if it was level deep in the
+        export. Strings in JSON never contain raw newlines, so any
+        newline is indentation.
+        """
+        content = json.dumps(obj, indent=self.indent)
+        if self.indent is None:
+            return content
+        return content.replace("\n", "\n" + " " * self.indent * level)
+
+    def newline(self, level: int) -> str:
+        if self.indent is None:
+            return ""
+        return "\n" + " " * self.indent * level
+
+    def separator(self, level: int) -> str:
+        return "," + (self.newline(level) or " ")
+
+    def __enter__(self):
+        self.file = self.temp_path.open("w", encoding="utf-8")
+        self.file.write(
+            "{"
+            + self.newline(1)
+            + '"metadata": '
+            + self.dumps(self.metadata, 1)
+            + self.separator(1)
+            + '"orders": [',
+        )
+        return self
+
+    def write(self, order: dict) -> None:
+        self.file.write(
+            (self.separator(2) if self.count else self.newline(2))
+            + self.dumps(order, 2),
+        )
+        self.count += 1
+
+    def discard(self) -> None:
+        self.discarded = True
+
+    def __exit__(self, exc_type, *_):
+        if exc_type or self.discarded:
+            self.file.close()
+            self.temp_path.unlink()
+            log.debug("Discarded %s", self.temp_path.name)
+            return
+        self.file.write(
+            (self.newline(1) if self.count else "")
+            + "]"
+            + self.newline(0)
+            + "}",
+        )
+        self.file.close()
+        self.temp_path.replace(self.path)
+        log.debug("Wrote %s orders to %s", self.count, self.path)
@@ -1,7 +1,6 @@
 # ruff: noqa: C901,ERA001,PLR0912,PLR0915
 import base64
 import contextlib
-import json
 import time
 from datetime import datetime
 from pathlib import Path
@@ -36,6 +35,7 @@ class JulaScraper(BaseScraper):
             expected_url == "https://www.jula.no/account/mine-innkjop/"
             and "returnPath" in self.browser.current_url
         ):
+            self.rate_limit_backoff(expected_url)
             self.log.error(
                 "Please log in to Jula.no manually and then press enter",
             )
@@ -51,11 +51,10 @@ class JulaScraper(BaseScraper):
 
         order_list_path = self.cache["ORDER_LISTS"] / "order_list.json"
         if order_list_path.is_file():
-            with order_list_path.open() as order_list_file:
-                order_list = json.load(order_list_file)
-                order_ids = {x["id"] for x in order_list}
-                for order_id in order_ids:
-                    self.log.debug("Loaded list order id %s", order_id)
+            order_list = self.read(order_list_path, from_json=True)
+            order_ids = {x["id"] for x in order_list}
+            for order_id in order_ids:
+                self.log.debug("Loaded list order id %s", order_id)
 
         if not self.options.use_cached_orderlist:
             self.log.debug("Downloading order list")
@@ -84,19 +83,17 @@ class JulaScraper(BaseScraper):
             x["id"] for x in order_list
         }  # recalculate in case we downloaded any
 
-        with order_list_path.open("w") as order_list_file:
-            json.dump(order_list, order_list_file, indent=4)
+        self.write(order_list_path, order_list, to_json=True)
 
         orders = {}
 
-        for order_file_path in list(self.cache["ORDERS"].glob("*.json")):
-            with order_file_path.open() as order_file:
-                order_data = json.load(order_file)
-                oid = order_data["transactionHead"]["orderId"]
-                self.log.debug("Loaded order data for id %s", oid)
-                with contextlib.suppress(KeyError):
-                    order_ids.remove(oid)
-                orders[oid] = order_data
+        for order_file_path in self.glob_cache(self.cache["ORDERS"], "*.json"):
+            order_data = self.read(order_file_path, from_json=True)
+            oid = order_data["transactionHead"]["orderId"]
+            self.log.debug("Loaded order data for id %s", oid)
+            with contextlib.suppress(KeyError):
+                order_ids.remove(oid)
+            orders[oid] = order_data
 
         for order_id in order_ids:
             # there are order number we have not scraped to disk
@@ -107,17 +104,18 @@ class JulaScraper(BaseScraper):
             oid = order_data["transactionHead"]["orderId"]
             self.pprint(order_data)
             self.log.debug("Downloaded order data for id %s", oid)
-            with (self.cache["ORDERS"] / (oid + ".json")).open(
-                "w",
-            ) as order_json_file:
-                json.dump(order_data, order_json_file, indent=4)
+            self.write(
+                self.cache["ORDERS"] / (oid + ".json"),
+                order_data,
+                to_json=True,
+            )
             orders[oid] = order_data
 
         for order in orders.values():
             # Cache thumbnails
             oid = order["transactionHead"]["orderId"]
             order_folder: Path = self.cache["ORDERS"] / oid
-            order_folder.mkdir(exist_ok=True)
+            self.makedir(order_folder)
             for line in order["lines"]:
                 iid = line["variantId"]
                 for format_ in line["mainImage"]["formats"]:
@@ -260,27 +258,15 @@ class JulaScraper(BaseScraper):
             self.log.debug("Dokument: %s", doc.text)
             if "PDF" in doc.text:
                 self.log.warning("We should download and save: %s", doc.text)
-                doc.click()
-                counter = 10
-                files = []
-                while True:
-                    files = list(self.cache["TEMP"].glob("*"))
-                    if files:
-                        break
-                    time.sleep(4)
-                    counter -= 1
-                    if counter == 0:
-                        msg = "Waited 40 seconds for file to appead"
-                        raise RuntimeError(
-                            msg,
-                        )
+                with self.watch_files() as watcher:
+                    doc.click()
+                    files = watcher.wait()
                 if len(files) > 1:
                     msg = "More than one file found"
                     raise RuntimeError(
                         msg,
                     )
                 file = files[0]
-                self.wait_for_stable_file(file)
                 kind = filetype.guess(file)
                 if kind.mime != "application/pdf" or kind.extension != "pdf":
                     msg = f"Not PDF: {kind.mime} {kind.extension}"
@@ -303,7 +289,7 @@ class JulaScraper(BaseScraper):
                     )
                 ).resolve()
                 self.log.debug("Moving attachment to %s", attachment_file)
-                file.rename(attachment_file)
+                self.move_file(file, attachment_file)
 
         self.browser.execute_script(
             """
@@ -347,32 +333,10 @@ class JulaScraper(BaseScraper):
                         el.style.fontFamily = "unset";
                         }
                     );
-                window.print();
             """,
         )
-        # Wait for pdf print
-        counter = 10
-        while True:
-            files = list(self.cache["TEMP"].glob("*"))
-            if files:
-                break
-            time.sleep(4)
-            counter -= 1
-            if counter == 0:
-                msg = "Waited 40 seconds for file to appead"
-                raise RuntimeError(
-                    msg,
-                )
-        if len(files) > 1:
-            msg = "More than one file found"
-            raise RuntimeError(
-                msg,
-            )
-        file = files[0]
-        self.wait_for_stable_file(file)
-
         self.log.debug("Item PDF to %s", pdf_file)
-        file.rename(pdf_file)
+        self.browser_print_to_pdf(pdf_file)
 
     def command_to_std_json(self):
         """
@@ -385,7 +349,10 @@ class JulaScraper(BaseScraper):
             "https://www.jula.no/account/mine-innkjop/{order_id}/",
             "https://www.jula.no/catalog/-{item_id}/",
         )
-        structure["orders"] = []
+        self.output_schema_json(structure, self.std_json_orders())
+
+    def std_json_orders(self):
+        """Yields the orders for command_to_std_json, one at a time"""
         scraped_data = self.command_scrape()
         for soi, scraped_order in scraped_data.items():
             # del order["mainImage"]
@@ -508,9 +475,7 @@ class JulaScraper(BaseScraper):
 
             # self.pprint(scraped_order)
             # self.pprint(order)
-            structure["orders"].append(order)
-        # self.valid_json(structure)
-        self.output_schema_json(structure)
+            yield order
 
     # Class init
     def __init__(self, options: dict):
@@ -1,7 +1,6 @@
 # pylint: disable=unused-import
 import base64
 import contextlib
-import json
 import re
 import time
 from datetime import datetime
@@ -20,6 +19,7 @@ from selenium.webdriver.common.by import By
 
 from scrapers.utils import AMBER, RED
 
+from . import jsoncodec
 from .base import BaseScraper
 
 if TYPE_CHECKING:
@@ -89,15 +89,7 @@ class KjellScraper(BaseScraper):
             ):
                 self.browser_cleanup_item_page()
                 self.log.debug("Printing page to PDF")
-                self.remove(self.cache["PDF_TEMP_FILENAME"])
-
-                brws.execute_script("window.print();")
-                self.wait_for_stable_file(self.cache["PDF_TEMP_FILENAME"])
-
-                self.move_file(
-                    self.cache["PDF_TEMP_FILENAME"],
-                    item_pdf_file,
-                )
+                self.browser_print_to_pdf(item_pdf_file)
             else:
                 self.log.debug("Skipping item PDF for %s", item_id)
         else:
@@ -448,15 +440,13 @@ class KjellScraper(BaseScraper):
                     for pdf in self.cache["TEMP"].glob("*.pdf"):
                         # Remove old/random PDFs
                         pdf.unlink()
-                    a_element.click()
-                    self.log.debug(
-                        "Opening PDF, waiting for it to download in background",
-                    )
-                    pdf = list(self.cache["TEMP"].glob("*.pdf"))
-                    while not pdf:
-                        pdf = list(self.cache["TEMP"].glob("*.pdf"))
-                        self.log.debug("No pdf, waiting 3 sec")
-                        time.sleep(3)
+                    with self.watch_files("*.pdf") as watcher:
+                        a_element.click()
+                        self.log.debug(
+                            "Opening PDF, waiting for it to download in"
+                            " background",
+                        )
+                        pdf = watcher.wait()
                     if len(pdf) > 1:
                         msg = (
                             "Found multiple PDFs after download, unknown"
@@ -466,8 +456,6 @@ class KjellScraper(BaseScraper):
                             msg,
                         )
 
-                    self.wait_for_stable_file(pdf[0])
-
                     self.log.debug(
                         "Found %s, saving as %s.pdf (%s.pdf)",
                         pdf[0].name,
@@ -524,7 +512,7 @@ class KjellScraper(BaseScraper):
         )
 
         content = self.browser.find_element(By.XPATH, "//pre").text
-        shop_data = json.loads(content)
+        shop_data = jsoncodec.loads(content)
         self.write(self.ORDER_LIST_JSON_FILENAME, shop_data, to_json=True)
         return shop_data
 
@@ -609,7 +597,7 @@ class KjellScraper(BaseScraper):
             pass
         self.browser_safe_quit()
 
-    def command_to_std_json(self):  # noqa: PLR0912, PLR0915, C901
+    def command_to_std_json(self):
         """
         Convert all data we have to a JSON that validates with schema,
          and a .zip with all attachments
@@ -621,11 +609,12 @@ class KjellScraper(BaseScraper):
             "https://www.kjell.com/no/mine-sider/mine-kjop#{order_id}",
             "https://www.kjell.com/-p{item_id}",
         )
+        self.output_schema_json(structure, self.std_json_orders())
 
+    def std_json_orders(self):  # noqa: PLR0912, PLR0915, C901
+        """Yields the orders for command_to_std_json, one at a time"""
         kjell_json = self.read(self.ORDER_LIST_JSON_FILENAME, from_json=True)[0]
 
-        orders = []
-
         for orig_order in kjell_json["completed"]["items"]:
             order_id = orig_order["transactionNumber"]
             try:
@@ -662,7 +651,7 @@ class KjellScraper(BaseScraper):
             order_cache_dir = self.cache["ORDERS"] / Path(order_id)
             files = {}
 
-            for file in order_cache_dir.glob("*"):
+            for file in self.glob_cache(order_cache_dir, "*"):
                 if file.name.endswith(".missing"):
                     continue
                 file_item_id = re.match(
@@ -778,10 +767,7 @@ class KjellScraper(BaseScraper):
             del orig_order["shippingFee"]["exclVat"]
             del orig_order["lineItems"]
             order_object["extra_data"] = orig_order
-            orders.append(order_object)
-
-        structure["orders"] = orders
-        self.output_schema_json(structure)
+            yield order_object
 
     # Class init
     def __init__(self, options: dict):
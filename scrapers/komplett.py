@@ -7,12 +7,13 @@ from datetime import datetime
 from pathlib import Path
 from typing import TYPE_CHECKING, Final
 
+from lxml.html import HtmlElement
 from selenium.common.exceptions import (
-    NoSuchElementException,
     WebDriverException,
 )
 from selenium.webdriver.common.by import By
 
+from . import cachestore
 from .base import BaseScraper
 
 # pylint: disable=unused-import
@@ -26,6 +27,59 @@ class KomplettScraper(BaseScraper):
     tla: Final[str] = "KMP"
     name: Final[str] = "Komplett"
     simple_name: Final[str] = "komplett"
+    ORDER_LIST_SPEC: Final[dict] = {
+        "orders": {
+            "xpath": "//section[contains(@class,'tidy-orders-list')]"
+            "/article/table/tbody/tr",
+            "all": True,
+            "fields": {
+                "id": "td.order-number",
+                "status": "td.status",
+            },
+        },
+    }
+    ORDER_SPEC: Final[dict] = {
+        "infos": {
+            "css": "div.order div.order-details div.info-row table",
+            "all": True,
+            "fields": {
+                "type": "caption",
+                "rows": {
+                    "css": "tbody tr",
+                    "all": True,
+                    "fields": {
+                        "label": "th",
+                        "value": "td",
+                        "link": "td a",
+                    },
+                },
+            },
+        },
+        "items": {
+            "css": "div.order table.products-table tbody tr.table-row",
+            "all": True,
+            "fields": {
+                "child": {"css": ".child", "prop": "className"},
+                "name": "td.description-col p.webtext1",
+                "href": {
+                    "xpath": ".//td[contains(@class,'description-col')]"
+                    "//p[contains(@class,'webtext1')]/ancestor::a",
+                    "prop": "href",
+                },
+                "description": "td.description-col p.webtext2",
+                "sku": "td.description-col p.sku-text",
+                "quantity": "td.quantity-container",
+                "price": "td.price",
+                "total": "td.total",
+                "thumb_url": {"css": "td.image-col img", "prop": "src"},
+            },
+        },
+        "pricing": {
+            "css": "div.order div.product-list-footer table tr",
+            "all": True,
+            "fields": {"tds": {"css": "td", "all": True}},
+        },
+    }
 
     def __init__(self, options: dict):
         super().__init__(options, __name__)
@@ -55,199 +109,38 @@ class KomplettScraper(BaseScraper):
                 self.log.debug("Scraping order id %s", order_id)
                 self.browser_visit(f"https://www.komplett.no/orders/{order_id}")
 
-                order_infos: list[WebElement] = self.find_elements(
-                    By.CSS_SELECTOR,
-                    "div.order div.order-details div.info-row table",
-                )
-                assert len(order_infos) == 2, "Found !2 order info tables"
-                for order_info in order_infos:
-                    order_info_type = order_info.find_element(
-                        By.CSS_SELECTOR,
-                        "caption",
-                    ).text.strip()
-                    assert order_info_type in [
-                        "Ordredetaljer",
-                        "Levering",
-                    ], f"Unknown order_info_type: '{order_info_type}'"
-                    order_dict[order_info_type] = {}
-                    rows: list[WebElement] = order_info.find_elements(
-                        By.CSS_SELECTOR,
-                        "tbody tr",
-                    )
-                    for row in rows:
-                        label = row.find_element(By.TAG_NAME, "th").text.strip()
-                        value = row.find_element(By.TAG_NAME, "td")
-                        if anchor_element := self.find_element(
-                            By.TAG_NAME,
-                            "a",
-                            value,
-                        ):
-                            # td contains a anhor element, it is a link to a file
-                            value = anchor_element.text.strip()
-                            name_file_safe = base64.urlsafe_b64encode(
-                                value.encode("utf-8"),
-                            ).decode("utf-8")
-                            attachment_file = (
-                                Path(order_dir)
-                                / f"attachment-{name_file_safe}.pdf"
-                            )
-                            if label not in order_dict[order_info_type]:
-                                order_dict[order_info_type][label] = []
-                            order_dict[order_info_type][label].append(value)
-                            if self.can_read(attachment_file):
-                                self.log.debug(
-                                    "We already have the file for '%s' saved",
-                                    attachment_file.name,
-                                )
-                            else:
-                                self.log.debug("Downloading: %s", value)
-                                self.clear_folder()
-                                brws = self.browser_get_instance()
-                                old_handle = brws.current_window_handle
-                                anchor_element.click()
-                                time.sleep(2)
-                                not_auto_download = len(brws.window_handles) > 1
-                                if not_auto_download:
-                                    self.log.debug(
-                                        "PDF was not auto downloaded. Probably"
-                                        " 404.",
-                                    )
-                                    assert len(brws.window_handles) == 2
-                                    for handle in brws.window_handles:
-                                        if handle != old_handle:
-                                            brws.switch_to.window(handle)
-                                            break
-                                    brws.execute_script("window.print();")
-                                files = self.wait_for_files("*.pdf")
-                                if not_auto_download:
-                                    brws.close()
-                                    brws.switch_to.window(old_handle)
-                                assert (
-                                    len(files) == 1
-                                ), "Found more than one file when downloading"
-                                file = files[0]
-                                assert (
-                                    file.suffix == ".pdf"
-                                ), f"Found {file.suffix} when expecting PDF"
-                                self.move_file(file, attachment_file)
-                                self.log.debug(
-                                    "Saved '%s' for order id %s",
-                                    attachment_file.name,
-                                    order_id,
-                                )
-                        else:
-                            value = value.text.strip()
-                            # self.log.debug("%s: %s", label, value)
-                            order_dict[order_info_type][label] = value
-
-                if "items" not in order_dict:
-                    order_dict["items"] = []
-                item_id = None
-                for item_row in self.find_elements(
-                    By.CSS_SELECTOR,
-                    "div.order table.products-table tbody tr.table-row",
-                ):
-                    item_dict = {}
-                    # We do some hacks for items that have childs, like computer builds
-                    quantity = None
-                    price = None
-                    total = None
-                    skip_thumb = False
-                    if self.find_element(By.CSS_SELECTOR, ".child", item_row):
-                        quantity = 1
-                        price = "0"
-                        total = "0"
-                        skip_thumb = True
-
-                    description_td = item_row.find_element(
-                        By.CSS_SELECTOR,
-                        "td.description-col",
+                order_html = self.browser_snapshot(order_dir / "order.html")
+                details, attachments, thumbs = self.lxml_parse_order(order_html)
+                order_dict.update(details)
+                for link_text in attachments:
+                    name_file_safe = base64.urlsafe_b64encode(
+                        link_text.encode("utf-8"),
+                    ).decode("utf-8")
+                    attachment_file = (
+                        Path(order_dir) / f"attachment-{name_file_safe}.pdf"
                     )
-                    name_element = description_td.find_element(
-                        By.CSS_SELECTOR,
-                        "p.webtext1",
-                    )
-                    name = name_element.text.strip()
-                    if name == "Gavekort":
-                        item_id = "giftcard"
+                    if self.can_read(attachment_file):
+                        self.log.debug(
+                            "We already have the file for '%s' saved",
+                            attachment_file.name,
+                        )
                     else:
-                        anchor_element = name_element.find_element(
-                            By.XPATH,
-                            ".//ancestor::a",
+                        self.browser_download_attachment(
+                            link_text,
+                            attachment_file,
                         )
-                        href = anchor_element.get_attribute("href")
-                        item_id = re.match(r".*/product/(\d*).*", href).group(1)
-                        self.log.debug("Item ID: %s", item_id)
-                    try:
-                        description = description_td.find_element(
-                            By.CSS_SELECTOR,
-                            "p.webtext2",
-                        ).text.strip()
-                    except NoSuchElementException:
-                        description = ""
-                    try:
-                        int_ext_sku = description_td.find_element(
-                            By.CSS_SELECTOR,
-                            "p.sku-text",
-                        ).text.strip()
-                        ext_sku = re.sub(
-                            r"Varenr: .* / Prodnr:",
-                            "",
-                            int_ext_sku,
-                        ).strip()
-                    except NoSuchElementException:
-                        ext_sku = ""
-                    if quantity is None:
-                        quantity = item_row.find_element(
-                            By.CSS_SELECTOR,
-                            "td.quantity-container",
-                        ).text.strip()
-                        price = item_row.find_element(
-                            By.CSS_SELECTOR,
-                            "td.price",
-                        ).text.strip()
-                        total = item_row.find_element(
-                            By.CSS_SELECTOR,
-                            "td.total",
-                        ).text.strip()
-
-                    if item_id != "giftcard" and not skip_thumb:
-                        thumb_element_src: str = item_row.find_element(
-                            By.CSS_SELECTOR,
-                            "td.image-col img",
-                        ).get_attribute("src")
-                        self.browser_get_item_thumb(
-                            order_dir,
-                            item_id,
-                            thumb_element_src,
-                            order_page=True,
+                        self.log.debug(
+                            "Saved '%s' for order id %s",
+                            attachment_file.name,
+                            order_id,
                         )
-
-                    item_dict["id"] = item_id
-                    assert name
-                    assert description is not None
-                    assert ext_sku is not None
-                    assert price is not None
-                    assert quantity
-                    assert total is not None
-                    item_dict["name"] = name
-                    item_dict["description"] = description
-                    item_dict["ext_sku"] = ext_sku
-                    item_dict["quantity"] = quantity
-                    item_dict["price"] = price
-                    item_dict["total"] = total
-                    order_dict["items"].append(item_dict)
-                if "pricing" not in order_dict:
-                    order_dict["pricing"] = {}
-                for row in self.find_elements(
-                    By.CSS_SELECTOR,
-                    "div.order div.product-list-footer table tr",
-                ):
-                    tds = row.find_elements(By.CSS_SELECTOR, "td")
-
-                    order_dict["pricing"][tds[0].text.strip()] = tds[
-                        1
-                    ].text.strip()
+                for item_id, thumb_url in thumbs.items():
+                    self.browser_get_item_thumb(
+                        order_dir,
+                        item_id,
+                        thumb_url,
+                        order_page=True,
+                    )
 
                 for item in order_dict["items"]:
                     if item["id"] == "giftcard":
@@ -271,13 +164,138 @@ class KomplettScraper(BaseScraper):
             )
             self.browser_safe_quit()
 
+    def lxml_parse_order(  # noqa: C901, PLR0915
+        self,
+        html: HtmlElement,
+    ) -> tuple[dict, list[str], dict[str, str]]:
+        """
+        Parses a saved order page.
+
+            Returns:
+                order (dict): order details, items and pricing
+                attachments (list[str]): link texts of attached files
+                thumbs (dict[str, str]): thumbnail URLs, by item id
+        """
+        page = self.lxml_extract(self.ORDER_SPEC, html)
+        order_dict = {}
+        attachments = []
+        thumbs = {}
+        assert len(page["infos"]) == 2, "Found !2 order info tables"
+        for order_info in page["infos"]:
+            order_info_type = order_info["type"]
+            assert order_info_type in [
+                "Ordredetaljer",
+                "Levering",
+            ], f"Unknown order_info_type: '{order_info_type}'"
+            order_dict[order_info_type] = {}
+            for row in order_info["rows"]:
+                label = row["label"]
+                if row["link"] is not None:
+                    # td contains a anhor element, it is a link to a file
+                    if label not in order_dict[order_info_type]:
+                        order_dict[order_info_type][label] = []
+                    order_dict[order_info_type][label].append(row["link"])
+                    attachments.append(row["link"])
+                else:
+                    # self.log.debug("%s: %s", label, value)
+                    order_dict[order_info_type][label] = row["value"]
+
+        order_dict["items"] = []
+        item_id = None
+        for item_row in page["items"]:
+            item_dict = {}
+            # We do some hacks for items that have childs, like computer builds
+            quantity = None
+            price = None
+            total = None
+            skip_thumb = False
+            if item_row["child"] is not None:
+                quantity = 1
+                price = "0"
+                total = "0"
+                skip_thumb = True
+
+            name = item_row["name"]
+            if name == "Gavekort":
+                item_id = "giftcard"
+            else:
+                item_id = re.match(
+                    r".*/product/(\d*).*",
+                    item_row["href"],
+                ).group(1)
+                self.log.debug("Item ID: %s", item_id)
+            description = item_row["description"] or ""
+            ext_sku = re.sub(
+                r"Varenr: .* / Prodnr:",
+                "",
+                item_row["sku"] or "",
+            ).strip()
+            if quantity is None:
+                quantity = item_row["quantity"]
+                price = item_row["price"]
+                total = item_row["total"]
+
+            if item_id != "giftcard" and not skip_thumb:
+                thumbs[item_id] = item_row["thumb_url"]
+
+            item_dict["id"] = item_id
+            assert name
+            assert description is not None
+            assert ext_sku is not None
+            assert price is not None
+            assert quantity
+            assert total is not None
+            item_dict["name"] = name
+            item_dict["description"] = description
+            item_dict["ext_sku"] = ext_sku
+            item_dict["quantity"] = quantity
+            item_dict["price"] = price
+            item_dict["total"] = total
+            order_dict["items"].append(item_dict)
+        order_dict["pricing"] = {}
+        for row in page["pricing"]:
+            order_dict["pricing"][row["tds"][0]] = row["tds"][1]
+        return order_dict, attachments, thumbs
+
+    def browser_download_attachment(
+        self,
+        link_text: str,
+        attachment_file: Path,
+    ):
+        self.log.debug("Downloading: %s", link_text)
+        self.clear_folder()
+        brws = self.browser_get_instance()
+        old_handle = brws.current_window_handle
+        anchor_element: WebElement = brws.find_element(By.LINK_TEXT, link_text)
+        with self.watch_files("*.pdf") as watcher:
+            anchor_element.click()
+            time.sleep(2)
+            not_auto_download = len(brws.window_handles) > 1
+            if not_auto_download:
+                self.log.debug("PDF was not auto downloaded. Probably 404.")
+                assert len(brws.window_handles) == 2
+                for handle in brws.window_handles:
+                    if handle != old_handle:
+                        brws.switch_to.window(handle)
+                        break
+                self.browser_print_to_pdf(attachment_file)
+                brws.close()
+                brws.switch_to.window(old_handle)
+            else:
+                files = watcher.wait()
+                assert len(files) == 1, "Found more than one file"
+                file = files[0]
+                assert (
+                    file.suffix == ".pdf"
+                ), f"Found {file.suffix}, expected PDF"
+                self.move_file(file, attachment_file)
+
     def browser_scrape_order_list(self):
         if self.options.use_cached_orderlist and self.can_read(
             self.ORDER_LIST_JSON,
         ):
             order_dict = self.read(self.ORDER_LIST_JSON, from_json=True)
         else:
-            order_dict = {}
             brws = self.browser_visit("https://www.komplett.no/orders")
             brws.execute_script("window.scrollTo(0,document.body.scrollHeight)")
             time.sleep(2)
@@ -302,24 +320,46 @@ class KomplettScraper(BaseScraper):
                     "//span[normalize-space(text())='Vis mer']",
                 )
 
-            order_element: WebElement
-            for order_element in self.find_elements(
-                By.XPATH,
-                "//section[contains(@class,'tidy-orders-list')]/article/table/tbody/tr",
-            ):
-                order_id = order_element.find_element(
-                    By.CSS_SELECTOR,
-                    "td.order-number",
-                ).text.strip()
-                order_status = order_element.find_element(
-                    By.CSS_SELECTOR,
-                    "td.status",
-                ).text.strip()
-                order_dict[order_id] = {"status": order_status}
+            order_dict = self.lxml_parse_order_list(
+                self.browser_snapshot(self.ORDER_LIST_HTML),
+            )
 
         self.write(self.ORDER_LIST_JSON, order_dict, to_json=True)
         return order_dict
 
+    def lxml_parse_order_list(self, html: HtmlElement) -> dict:
+        page = self.lxml_extract(self.ORDER_LIST_SPEC, html)
+        return {
+            order["id"]: {"status": order["status"]} for order in page["orders"]
+        }
+
+    def reparse_cache_files(self) -> list[Path]:
+        files = sorted(cachestore.glob(self.cache["ORDERS"], "*/order.html"))
+        if self.can_read(self.ORDER_LIST_HTML):
+            files.append(self.ORDER_LIST_HTML)
+        return files
+
+    def reparse_cache_file(self, path: Path) -> None:
+        html = self.read(path, from_html=True)
+        if path == self.ORDER_LIST_HTML:
+            self.write(
+                self.ORDER_LIST_JSON,
+                self.lxml_parse_order_list(html),
+                to_json=True,
+            )
+            return
+        order_id = path.parent.name
+        order_json_file = path.parent / f"{order_id}.json"
+        # The status is from the order list
+        order_dict = (
+            self.read(order_json_file, from_json=True)
+            if self.can_read(order_json_file)
+            else {}
+        )
+        details, _, _ = self.lxml_parse_order(html)
+        order_dict.update(details)
+        self.write(order_json_file, order_dict, to_json=True)
+
     def browser_save_item_page(self, item_id: str, order_dir: Path):
         item_pdf_file = order_dir / f"item-{item_id}.pdf"
 
@@ -327,7 +367,7 @@ class KomplettScraper(BaseScraper):
             self.log.debug("Found PDf for item %s", item_id)
             return
         self.log.debug("Visiting item %s", item_id)
-        brws = self.browser_visit(
+        self.browser_visit(
             f"https://www.komplett.no/product/{item_id}?noredirect=true",
         )
         thumbs = self.find_elements(
@@ -348,12 +388,7 @@ class KomplettScraper(BaseScraper):
             ).get_attribute("src")
         self.browser_get_item_thumb(order_dir, item_id, thumb_src)
         self.browser_cleanup_item_page()
-        self.clear_folder()
-        brws.execute_script("window.print();")
-        files = self.wait_for_files("*.pdf")
-        assert len(files) == 1, "Got more than one file when printing item PDF"
-        file = files[0]
-        self.move_file(file, item_pdf_file)
+        self.browser_print_to_pdf(item_pdf_file)
         self.log.debug("Saved PDF print of item page for %s", item_id)
 
     def browser_get_item_thumb(self, order_dir, item_id, src, order_page=False):
@@ -603,6 +638,7 @@ class KomplettScraper(BaseScraper):
     def browser_detect_handle_interrupt(self, expected_url):
         brws = self.browser_get_instance()
         if "login" in brws.current_url:
+            self.rate_limit_backoff(expected_url)
             self.log.error(
                 AMBER(
                     "Please manyally login to eBay, "
@@ -614,6 +650,7 @@ class KomplettScraper(BaseScraper):
     def setup_templates(self):
         # pylint: disable=invalid-name
         self.ORDER_LIST_JSON = self.cache["BASE"] / "order_list.json"
+        self.ORDER_LIST_HTML = self.cache["BASE"] / "order_list.html"
         self.ORDER_FOLDER_TP = str(self.cache["BASE"] / "orders/{order_id}/")
 
     def command_to_std_json(self):
@@ -623,7 +660,10 @@ class KomplettScraper(BaseScraper):
             "https://www.komplett.no/orders/{order_id}",
             "https://www.komplett.no/product/{item_id}?noredirect=true",
         )
+        self.output_schema_json(structure, self.std_json_orders())
 
+    def std_json_orders(self):
+        """Yields the orders for command_to_std_json, one at a time"""
         order_lists: dict = self.read(self.ORDER_LIST_JSON, from_json=True)
         statuses = {x["status"] for x in order_lists.values()}
         known_statuses = ["Sendt", "Levert", "Kansellert"]
@@ -635,117 +675,119 @@ class KomplettScraper(BaseScraper):
                     status,
                 )
                 raise NotImplementedError
-        structure["orders"] = []
-        for order_id in [
-            key
-            for key, value in order_lists.items()
-            if value["status"] in export_statuses
-        ]:
-            self.log.debug("Processing order %s", order_id)
-            order_dir = Path(self.ORDER_FOLDER_TP.format(order_id=order_id))
-            orig_order = self.read(
-                order_dir / f"{order_id}.json",
-                from_json=True,
-            )
+        return self.std_json_cached(
+            (
+                Path(self.ORDER_FOLDER_TP.format(order_id=order_id))
+                / f"{order_id}.json"
+                for order_id, value in order_lists.items()
+                if value["status"] in export_statuses
+            ),
+            [self.ORDER_LIST_JSON],
+        )
 
-            order_dict = {
-                "id": order_id,
-                "date": (
-                    datetime.strptime(
-                        orig_order["Ordredetaljer"]["Bestilt"],
-                        "%d/%m/%Y %H:%M",
-                    )
-                    .astimezone()
-                    .date()
-                    .isoformat()
-                ),
-                "items": [],
+    def std_json_order(self, order_json: Path) -> list[dict]:
+        """Converts the order in order_json for the JSON export"""
+        order_id = order_json.stem
+        self.log.debug("Processing order %s", order_id)
+        order_dir = order_json.parent
+        orig_order = self.read(order_json, from_json=True)
+
+        order_dict = {
+            "id": order_id,
+            "date": (
+                datetime.strptime(
+                    orig_order["Ordredetaljer"]["Bestilt"],
+                    "%d/%m/%Y %H:%M",
+                )
+                .astimezone()
+                .date()
+                .isoformat()
+            ),
+            "items": [],
+            "extra_data": {},
+            "total": self.get_value_currency(
+                "total",
+                orig_order["pricing"]["Totalt"],
+                "NOK",
+            ),
+            "shipping": self.get_value_currency(
+                "total",
+                orig_order["pricing"]["Frakt"],
+                "NOK",
+            ),
+        }
+        for attachment in self.glob_cache(order_dir, "attachment-*.pdf"):
+            if "attachments" not in order_dict:
+                order_dict["attachments"] = []
+            name = base64.urlsafe_b64decode(
+                attachment.stem.split("-")[1],
+            ).decode("utf-8")
+            attachment_dict = {
+                "name": name,
+                "path": attachment.relative_to(
+                    self.cache["BASE"],
+                ).as_posix(),
+            }
+            order_dict["attachments"].append(attachment_dict)
+
+        del orig_order["Ordredetaljer"]["Bestilt"]
+        del orig_order["pricing"]["Totalt"]
+        del orig_order["pricing"]["Frakt"]
+        if orig_order["pricing"] != {}:
+            order_dict["extra_data"]["pricing"] = orig_order["pricing"]
+        del orig_order["pricing"]
+
+        for item in orig_order["items"]:
+            item_id = item["id"]
+            item_dict = {
+                "id": item_id,
+                "name": item["name"],
+                "quantity": int(item["quantity"]),
                 "extra_data": {},
                 "total": self.get_value_currency(
                     "total",
-                    orig_order["pricing"]["Totalt"],
+                    str(item["total"]),
                     "NOK",
                 ),
-                "shipping": self.get_value_currency(
+            }
+            del item["id"]
+            del item["name"]
+            del item["quantity"]
+            del item["total"]
+            if "price" in item:
+                item["price"] = self.get_value_currency(
                     "total",
-                    orig_order["pricing"]["Frakt"],
+                    str(item["price"]),
                     "NOK",
-                ),
-            }
-            for attachment in order_dir.glob("attachment-*.pdf"):
-                if "attachments" not in order_dict:
-                    order_dict["attachments"] = []
-                name = base64.urlsafe_b64decode(
-                    attachment.stem.split("-")[1],
-                ).decode("utf-8")
-                attachment_dict = {
-                    "name": name,
-                    "path": attachment.relative_to(
-                        self.cache["BASE"],
-                    ).as_posix(),
-                }
-                order_dict["attachments"].append(attachment_dict)
-
-            del orig_order["Ordredetaljer"]["Bestilt"]
-            del orig_order["pricing"]["Totalt"]
-            del orig_order["pricing"]["Frakt"]
-            if orig_order["pricing"] != {}:
-                order_dict["extra_data"]["pricing"] = orig_order["pricing"]
-            del orig_order["pricing"]
-
-            for item in orig_order["items"]:
-                item_id = item["id"]
-                item_dict = {
-                    "id": item_id,
-                    "name": item["name"],
-                    "quantity": int(item["quantity"]),
-                    "extra_data": {},
-                    "total": self.get_value_currency(
-                        "total",
-                        str(item["total"]),
-                        "NOK",
-                    ),
-                }
-                del item["id"]
-                del item["name"]
-                del item["quantity"]
-                del item["total"]
-                if "price" in item:
-                    item["price"] = self.get_value_currency(
-                        "total",
-                        str(item["price"]),
-                        "NOK",
-                    )
-                item_dict["extra_data"].update(item)
-                if item_id != "giftcard":
-                    assert self.can_read(
-                        order_dir / f"item-{item_id}.pdf",
-                    ), f"Can't read item PDF for {item_id}"
-                    item_dict["attachments"] = [
-                        {
-                            "name": "Item PDF",
-                            "path": (
-                                Path(order_dir / f"item-{item_id}.pdf")
-                                .relative_to(self.cache["BASE"])
-                                .as_posix()
-                            ),
-                        },
-                    ]
-                thumb = None
-                if self.can_read(order_dir / f"item-{item_id}-thumb.jpg"):
-                    thumb = order_dir / f"item-{item_id}-thumb.jpg"
-                elif self.can_read(
-                    order_dir / f"item-{item_id}-order-thumb.jpg",
-                ):
-                    thumb = order_dir / f"item-{item_id}-order-thumb.jpg"
-                if thumb:
-                    item_dict["thumbnail"] = (
-                        Path(thumb).relative_to(self.cache["BASE"]).as_posix()
-                    )
-                order_dict["items"].append(item_dict)
-            del orig_order["items"]
-            order_dict["extra_data"].update(orig_order)
-            # self.pprint(order_dict)
-            structure["orders"].append(order_dict)
-        # self.pprint(structure)
-        self.output_schema_json(structure)
+                )
+            item_dict["extra_data"].update(item)
+            if item_id != "giftcard":
+                assert self.can_read(
+                    order_dir / f"item-{item_id}.pdf",
+                ), f"Can't read item PDF for {item_id}"
+                item_dict["attachments"] = [
+                    {
+                        "name": "Item PDF",
+                        "path": (
+                            Path(order_dir / f"item-{item_id}.pdf")
+                            .relative_to(self.cache["BASE"])
+                            .as_posix()
+                        ),
+                    },
+                ]
+            thumb = None
+            if self.can_read(order_dir / f"item-{item_id}-thumb.jpg"):
+                thumb = order_dir / f"item-{item_id}-thumb.jpg"
+            elif self.can_read(
+                order_dir / f"item-{item_id}-order-thumb.jpg",
+            ):
+                thumb = order_dir / f"item-{item_id}-order-thumb.jpg"
+            if thumb:
+                item_dict["thumbnail"] = (
+                    Path(thumb).relative_to(self.cache["BASE"]).as_posix()
+                )
+            order_dict["items"].append(item_dict)
+        del orig_order["items"]
+        order_dict["extra_data"].update(orig_order)
+        # self.pprint(order_dict)
+        return [order_dict]
@@ -107,6 +107,7 @@ class PimoroniScraper(BaseScraper):
             time.sleep(0.5)
 
         if re.match(self.LOGIN_PAGE_RE, self.browser.current_url):
+            self.rate_limit_backoff(expected_url)
             self.browser_login(expected_url)
 
     def browser_login(self, _):
@@ -118,7 +119,6 @@ class PimoroniScraper(BaseScraper):
         if username_data and password_data:
             wait = WebDriverWait(brws, 10)
             try:
-                self.rand_sleep(0, 2)
                 xpath_sel = "//form[@id='customer_login']//input[@type='email']"
                 self.log.debug("Looking for %s", xpath_sel)
                 username = wait.until(
@@ -129,7 +129,6 @@ class PimoroniScraper(BaseScraper):
                 )
                 username.click()
                 username.send_keys(username_data)
-                self.rand_sleep(0, 2)
 
                 xpath_sel = (
                     "//form[@id='customer_login']//input[@type='password']"
@@ -143,7 +142,6 @@ class PimoroniScraper(BaseScraper):
                 )
                 password.click()
                 password.send_keys(password_data)
-                self.rand_sleep(0, 2)
 
                 xpath_sel = (
                     "//form[@id='customer_login']//button[contains(@class,"
@@ -156,7 +154,6 @@ class PimoroniScraper(BaseScraper):
                     ),
                     "Could not find " + xpath_sel,
                 ).click()
-                self.rand_sleep(0, 2)
 
             except TimeoutException:
                 self.log.exception(
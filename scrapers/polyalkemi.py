@@ -1,6 +1,7 @@
 # pylint: disable=unused-import
-import contextlib
+import copy
 import decimal
+import functools
 import re
 import time
 from datetime import datetime
@@ -9,12 +10,14 @@ from typing import Final
 
 import filetype
 import requests
+from lxml.html import HtmlElement
 from selenium.common.exceptions import (
     NoSuchElementException,
     NoSuchWindowException,
 )
 from selenium.webdriver.common.by import By
 
+from . import cachestore
 from .base import BaseScraper
 
 # pylint: disable=unused-import
@@ -26,6 +29,37 @@ class PolyalkemiScraper(BaseScraper):
     tla: Final[str] = "PAI"
     name: Final[str] = "Polyalkemi.no"
     simple_name: Final[str] = "polyalkemi.no"
+    ORDER_LIST_SPEC: Final[dict] = {
+        "orders": {
+            "css": "table.woocommerce-orders-table tbody tr",
+            "all": True,
+            "fields": {"cols": {"css": "td", "all": True}},
+        },
+    }
+    ORDER_SPEC: Final[dict] = {
+        "shipper": {"xpath": '//span[@class="beklager"]//strong'},
+        "trackingnumber": {"xpath": '//span[@class="beklager"]//a'},
+        "addresses": {"xpath": "//address", "all": True},
+        "items": {
+            "css": "table.order_details tbody tr",
+            "all": True,
+            "fields": {
+                "name": "td a",
+                "url": {"css": "td a", "prop": "href"},
+                "count": "td strong",
+            },
+        },
+        "summary": {
+            "css": "table.order_details tfoot tr",
+            "all": True,
+            "fields": {
+                "what": "th",
+                "about": "td",
+                "amount": "td span",
+                "tax": "td small span",
+            },
+        },
+    }
 
     # Random utility functions
 
@@ -38,6 +72,7 @@ class PolyalkemiScraper(BaseScraper):
         )
         # pylint: disable=invalid-name
         self.ORDER_LIST_FN = str(self.cache["ORDER_LISTS"] / "orders.json")
+        self.ORDER_LIST_HTML = str(self.cache["ORDER_LISTS"] / "orders.html")
         self.ORDER_DIR_TP = str(Path(self.cache["ORDERS"] / "{order_id}/"))
         self.ORDER_JSON_TP = str(Path(self.ORDER_DIR_TP) / "order.json")
         self.ORDER_INVOICE_TP = str(Path(self.ORDER_DIR_TP) / "faktura.pdf")
@@ -163,7 +198,7 @@ class PolyalkemiScraper(BaseScraper):
 
         return True
 
-    def browser_get_order_details(self, order):  # noqa: PLR0915
+    def browser_get_order_details(self, order):
         order_id = order["id"]
         order_dir = self.ORDER_DIR_TP.format(order_id=order_id)
         self.makedir(order_dir)
@@ -175,7 +210,6 @@ class PolyalkemiScraper(BaseScraper):
             return self.read(order_json, from_json=True)
         self.log.debug("Missing files for order %s, processing", order_id)
 
-        order_details = {}
         order_url = self.ORDER_URL.format(order_id=order_id)
         self.log.debug("Visiting %s", order_url)
         brws = self.browser_get_instance()
@@ -183,90 +217,56 @@ class PolyalkemiScraper(BaseScraper):
 
         self.browser_visit(order_url)
         self.log.debug("Scraping order details")
-        with contextlib.suppress(AttributeError):
-            order_details["shipper"] = self.find_element(
-                By.XPATH,
-                '//span[@class="beklager"]//strong',
-            ).text
-        with contextlib.suppress(AttributeError):
-            order_details["trackingnumber"] = self.find_element(
-                By.XPATH,
-                '//span[@class="beklager"]//a',
-            ).text
-        addresses = self.find_elements(By.XPATH, "//address")
-        order_details["billing_address"] = addresses[0].text
-        order_details["shipping_address"] = addresses[1].text
-
-        order_detail_table = self.find_element(
-            By.CSS_SELECTOR,
-            "table.order_details",
-        )
-        item_rows = self.find_elements(
-            By.CSS_SELECTOR,
-            "tbody tr",
-            order_detail_table,
+        order_details = self.lxml_parse_order(
+            self.browser_snapshot(Path(order_dir) / "order.html"),
         )
+        for item in order_details["items"]:
+            self.browser_save_item_page_pdf_and_thumb(order_id, item)
+        self.write(order_json, order_details, to_json=True)
+        self.log.debug("Saved order #%s to json", order_id)
+        self.browser.switch_to.window(handle)
+        return None
+
+    def lxml_parse_order(self, html: HtmlElement) -> dict:
+        page = self.lxml_extract(self.ORDER_SPEC, html)
+        order_details = {}
+        if page["shipper"] is not None:
+            order_details["shipper"] = page["shipper"]
+        if page["trackingnumber"] is not None:
+            order_details["trackingnumber"] = page["trackingnumber"]
+        order_details["billing_address"] = page["addresses"][0]
+        order_details["shipping_address"] = page["addresses"][1]
+
         order_details["items"] = []
-        for item_row in item_rows:
-            tds = self.find_elements(By.CSS_SELECTOR, "td", item_row)
-            a_element = self.find_element(By.CSS_SELECTOR, "a", tds[0])
-            url = a_element.get_attribute("href")
+        for item_row in page["items"]:
+            url = item_row["url"]
             item_id_regexp = r".*polyalkemi\.no/produkt/([^/]*)/?"
             href_parts = re.match(item_id_regexp, url)
             item_id = href_parts.group(1)
-            item_name = a_element.text
-            item_count = int(
-                self.find_element(
-                    By.CSS_SELECTOR,
-                    "strong",
-                    tds[0],
-                ).text.replace("\u00d7 ", ""),
-            )
+            item_count = int(item_row["count"].replace("\u00d7 ", ""))
             order_details["items"].append(
                 {
                     "id": item_id,
-                    "name": item_name,
+                    "name": item_row["name"],
                     "count": item_count,
                     "url": url,
                 },
             )
-        summary_rows = self.find_elements(
-            By.CSS_SELECTOR,
-            "tfoot tr",
-            order_detail_table,
-        )
-        for summary_row in summary_rows:
-            what = self.find_element(
-                By.CSS_SELECTOR,
-                "th",
-                summary_row,
-            ).text.lower()[:-1]
-            about = self.find_element(By.CSS_SELECTOR, "td", summary_row)
+        for summary_row in page["summary"]:
+            what = summary_row["what"].lower()[:-1]
             if what == "delsum":
-                order_details["subtotal"] = about.text
+                order_details["subtotal"] = summary_row["about"]
             elif what == "frakt":
-                span_amount = self.find_element(By.CSS_SELECTOR, "span", about)
-                order_details["shipping"] = span_amount.text
+                order_details["shipping"] = summary_row["amount"]
             elif what == "totalt":
-                span_amount = self.find_element(By.CSS_SELECTOR, "span", about)
-                order_details["total"] = span_amount.text
-                span_tax = self.find_element(
-                    By.CSS_SELECTOR,
-                    "small span",
-                    about,
-                )
-                order_details["tax"] = span_tax.text
+                order_details["total"] = summary_row["amount"]
+                order_details["tax"] = summary_row["tax"]
             elif what == "betalingsmetode":
                 # don't care
                 pass
             else:
                 self.log.error("Found unparsed row '%s'", what)
-        for item in order_details["items"]:
-            self.browser_save_item_page_pdf_and_thumb(order_id, item)
-        self.write(order_json, order_details, to_json=True)
-        self.log.debug("Saved order #%s to json", order_id)
-        self.browser.switch_to.window(handle)
-        return None
+        return order_details
 
     def browser_save_item_page_pdf_and_thumb(self, order_id, item):
         brws = self.browser_get_instance()
@@ -281,6 +281,7 @@ class PolyalkemiScraper(BaseScraper):
             ).resolve()
             if not self.can_read(item_thumb_file):
                 brws.switch_to.new_window("tab")
+                self.throttle(item["url"])
                 brws.get(item["url"])
                 tab_open = True
                 thumb_element = self.find_element(
@@ -327,15 +328,12 @@ class PolyalkemiScraper(BaseScraper):
                 self.log.debug("Making PDF for item %s", item["id"])
                 if not tab_open:
                     brws.switch_to.new_window("tab")
+                    self.throttle(item["url"])
                     brws.get(item["url"])
                 self.browser_cleanup_item_page()
                 self.log.debug("Printing page to PDF")
-                for pdf in self.cache["TEMP"].glob("*.pdf"):
-                    pdf.unlink()
-                brws.execute_script("window.print();")
-                self.wait_for_stable_file(self.cache["PDF_TEMP_FILENAME"])
-                self.move_file(self.cache["PDF_TEMP_FILENAME"], item_pdf_file)
-                self.log.debug("PDF moved to cache")
+                self.browser_print_to_pdf(item_pdf_file)
+                self.log.debug("PDF saved to cache")
                 brws.close()
                 time.sleep(2)
 
@@ -347,10 +345,12 @@ class PolyalkemiScraper(BaseScraper):
                 By.CSS_SELECTOR,
                 "form.login",
             )  # No ned to put in variable
+            self.rate_limit_backoff(expected_url)
             self.log.error(
                 RED("You need to login manually. Press enter when completed."),
             )
             input()
+            self.throttle(expected_url)
             brws.get(expected_url)
         except NoSuchElementException:
             self.log.debug("No login required")
@@ -368,16 +368,11 @@ class PolyalkemiScraper(BaseScraper):
 
         self.browser_visit(self.ORDER_LIST_URL)
         brws = self.browser_get_instance()
-        orders_table = brws.find_element(
-            By.CSS_SELECTOR,
-            "table.woocommerce-orders-table",
+        orders = self.lxml_parse_order_list(
+            self.browser_snapshot(self.ORDER_LIST_HTML),
         )
-        order_rows = orders_table.find_elements(By.CSS_SELECTOR, "tbody tr")
-        orders = []
-        for order_row in order_rows:
-            order_cols = order_row.find_elements(By.CSS_SELECTOR, "td")
-            order_id = order_cols[0].text[1:]
-
+        for row_number, order in enumerate(orders, start=1):
+            order_id = order["id"]
             order_dir = Path(self.cache["ORDERS"] / order_id)
             self.makedir(order_dir)
             if self.skip_order_pdf:
@@ -386,8 +381,10 @@ class PolyalkemiScraper(BaseScraper):
                 order_pdf_path = self.ORDER_INVOICE_TP.format(order_id=order_id)
                 if not self.can_read(order_pdf_path):
                     self.log.debug("Order invoice missing")
-                    order_faktura = order_cols[4].find_element(
+                    order_faktura = brws.find_element(
                         By.XPATH,
+                        "//table[contains(@class,'woocommerce-orders-table')]"
+                        f"/tbody/tr[{row_number}]/td[5]"
                         "//a[contains(text(),'Faktura')]",
                     )
 
@@ -397,23 +394,28 @@ class PolyalkemiScraper(BaseScraper):
                     self.log.debug(
                         "Opening PDF, waiting for it to download in background",
                     )
-                    order_faktura.click()
-                    time.sleep(2)
-                    pdf = list(self.cache["TEMP"].glob("*.pdf"))
-                    while not pdf:
-                        pdf = list(self.cache["TEMP"].glob("*.pdf"))
-                        time.sleep(3)
-                    self.wait_for_stable_file(pdf[0])
+                    with self.watch_files("*.pdf") as watcher:
+                        order_faktura.click()
+                        pdf = watcher.wait()
                     self.move_file(pdf[0], order_pdf_path)
+        self.write(self.ORDER_LIST_FN, orders, to_json=True)
+        self.browser_visit(self.ORDER_LIST_URL)
+        return orders
 
+    def lxml_parse_order_list(self, html: HtmlElement) -> list[dict]:
+        page = self.lxml_extract(self.ORDER_LIST_SPEC, html)
+        orders = []
+        for order_row in page["orders"]:
+            order_cols = order_row["cols"]
+            order_id = order_cols[0][1:]
             order_date = datetime.strptime(
-                order_cols[1].text,
+                order_cols[1],
                 "%d/%m/%Y",
             ).astimezone()
-            order_status = order_cols[2].text
+            order_status = order_cols[2]
 
             total_re = r"(-?)kr (\d*.*\.\d*) for (-?)(\d*) produkt(?:er|)"
-            total_parts = re.match(total_re, order_cols[3].text)
+            total_parts = re.match(total_re, order_cols[3])
             order_total = decimal.Decimal(f"{total_parts[1]}{total_parts[2]}")
             item_count = int(f"{total_parts[3]}{total_parts[4]}")
             self.log.debug(
@@ -433,10 +435,29 @@ class PolyalkemiScraper(BaseScraper):
                     "item_count": item_count,
                 },
             )
-        self.write(self.ORDER_LIST_FN, orders, to_json=True)
-        self.browser_visit(self.ORDER_LIST_URL)
         return orders
 
+    def reparse_cache_files(self) -> list[Path]:
+        files = sorted(cachestore.glob(self.cache["ORDERS"], "*/order.html"))
+        if self.can_read(self.ORDER_LIST_HTML):
+            files.append(Path(self.ORDER_LIST_HTML))
+        return files
+
+    def reparse_cache_file(self, path: Path) -> None:
+        html = self.read(path, from_html=True)
+        if path == Path(self.ORDER_LIST_HTML):
+            self.write(
+                self.ORDER_LIST_FN,
+                self.lxml_parse_order_list(html),
+                to_json=True,
+            )
+        else:
+            self.write(
+                self.ORDER_JSON_TP.format(order_id=path.parent.name),
+                self.lxml_parse_order(html),
+                to_json=True,
+            )
+
     # Command functions, used in scrape.py
     def command_scrape(self):
         """
@@ -451,7 +472,7 @@ class PolyalkemiScraper(BaseScraper):
         self.log.info("Scrape complete")
         self.browser_safe_quit()
 
-    def command_to_std_json(self):  # noqa: C901
+    def command_to_std_json(self):
         """
         Convert all data we have to a JSON that validates with schema,
          and a .zip with all attachments
@@ -463,145 +484,165 @@ class PolyalkemiScraper(BaseScraper):
             "https://polyalkemi.no/min-konto/view-order/{order_id}/",
             "https://polyalkemi.no/produkt/{item_id}/",
         )
-
-        order_list = self.read(self.ORDER_LIST_FN, from_json=True)
-        structure["orders"] = []
-        for order_orig in order_list:
+        self.output_schema_json(structure, self.std_json_orders())
+
+    @functools.cached_property
+    def order_list_orders(self) -> dict:
+        """The orders in the cached order list, by order id"""
+        return {
+            str(order["id"]): order
+            for order in self.read(self.ORDER_LIST_FN, from_json=True)
+        }
+
+    def std_json_orders(self):
+        """Yields the orders for command_to_std_json, one at a time"""
+        order_ids = []
+        for order_id, order_orig in self.order_list_orders.items():
             if (
                 not self.options.include_negative_orders
                 and order_orig["item_count"] < 0
             ):
                 self.log.warning(
                     AMBER("Skipping order %s since it has negative item count"),
-                    order_orig["id"],
+                    order_id,
                 )
                 continue
-            order_details_dict = self.read(
-                self.ORDER_JSON_TP.format(order_id=order_orig["id"]),
-                from_json=True,
-            )
-
-            order = {
-                "id": order_orig["id"],
-                "date": (
-                    datetime.strptime(order_orig["date"], "%Y-%m-%d %H:%M:%S")
-                    .astimezone()
-                    .date()
-                    .isoformat()
-                ),
-                "total": self.get_value_currency(
-                    "total",
-                    order_details_dict["total"],
-                    "NOK",
-                ),
-                "subtotal": self.get_value_currency(
-                    "subtotal",
-                    order_details_dict["subtotal"],
-                    "NOK",
-                ),
-                "tax": self.get_value_currency(
-                    "tax",
-                    order_details_dict["tax"],
-                    "NOK",
-                ),
-            }
-            if order_orig["item_count"] < 0:
-                # The price parser does not currently support negative values.
-                # We force the values to negative anywhere the item count
-                # is negative.
-                for value_name in ["total", "subtotal", "tax"]:
-                    if order[value_name]["value"][0] != "-":
-                        order[value_name]["value"] = (
-                            "-" + order[value_name]["value"]
-                        )
-                        self.log.debug(
-                            "Item count for order %s is negative, forcing %s"
-                            " negative.",
-                            order["id"],
-                            value_name,
-                        )
-
-            # Not part of negative orders
-            if "shipping" in order_details_dict:
-                order["shipping"] = self.get_value_currency(
-                    "shipping",
-                    order_details_dict["shipping"],
-                    "NOK",
-                )
-
-            order["items"] = []
+            order_ids.append(order_id)
+        return self.std_json_cached(
+            (
+                Path(self.ORDER_JSON_TP.format(order_id=order_id))
+                for order_id in order_ids
+            ),
+            [Path(self.ORDER_LIST_FN)],
+        )
 
-            for item in order_details_dict["items"]:
-                item_dict = {
-                    "name": item["name"],
-                    "id": item["id"],
-                    "quantity": item["count"],
-                }
-                if not self.skip_item_pdf:
-                    self.log.debug("Setting item PDF")
-                    item_dict["attachments"] = [
-                        {
-                            "name": "Item PDF",
-                            "path": str(
-                                Path(
-                                    self.ITEM_PDF_TP.format(
-                                        order_id=order["id"],
-                                        item_id=item["id"],
-                                    ),
-                                ).relative_to(self.cache["BASE"]),
-                            ),
-                            "comment": "PDF print of item page",
-                        },
-                    ]
-                if not self.skip_item_thumb:
-                    self.log.debug("Setting item thumbnail")
-                    item_dict["thumbnail"] = str(
-                        Path(
-                            self.ITEM_THUMB_TP.format(
-                                order_id=order["id"],
-                                item_id=item["id"],
-                            ),
-                        )
-                        .relative_to(self.cache["BASE"])
-                        .as_posix(),
+    def std_json_order(self, order_json: Path) -> list[dict]:
+        """Converts the order in order_json for the JSON export"""
+        order_orig = copy.deepcopy(
+            self.order_list_orders[Path(order_json).parent.name],
+        )
+        order_details_dict = self.read(order_json, from_json=True)
+
+        order = {
+            "id": order_orig["id"],
+            "date": (
+                datetime.strptime(order_orig["date"], "%Y-%m-%d %H:%M:%S")
+                .astimezone()
+                .date()
+                .isoformat()
+            ),
+            "total": self.get_value_currency(
+                "total",
+                order_details_dict["total"],
+                "NOK",
+            ),
+            "subtotal": self.get_value_currency(
+                "subtotal",
+                order_details_dict["subtotal"],
+                "NOK",
+            ),
+            "tax": self.get_value_currency(
+                "tax",
+                order_details_dict["tax"],
+                "NOK",
+            ),
+        }
+        if order_orig["item_count"] < 0:
+            # The price parser does not currently support negative values.
+            # We force the values to negative anywhere the item count
+            # is negative.
+            for value_name in ["total", "subtotal", "tax"]:
+                if order[value_name]["value"][0] != "-":
+                    order[value_name]["value"] = (
+                        "-" + order[value_name]["value"]
+                    )
+                    self.log.debug(
+                        "Item count for order %s is negative, forcing %s"
+                        " negative.",
+                        order["id"],
+                        value_name,
                     )
 
-                order["items"].append(item_dict)
+        # Not part of negative orders
+        if "shipping" in order_details_dict:
+            order["shipping"] = self.get_value_currency(
+                "shipping",
+                order_details_dict["shipping"],
+                "NOK",
+            )
 
-            if not self.skip_order_pdf:
-                order["attachments"] = [
+        order["items"] = []
+
+        for item in order_details_dict["items"]:
+            item_dict = {
+                "name": item["name"],
+                "id": item["id"],
+                "quantity": item["count"],
+            }
+            if not self.skip_item_pdf:
+                self.log.debug("Setting item PDF")
+                item_dict["attachments"] = [
                     {
-                        "name": "Order Invoice PDF",
+                        "name": "Item PDF",
                         "path": str(
                             Path(
-                                self.ORDER_INVOICE_TP.format(
+                                self.ITEM_PDF_TP.format(
                                     order_id=order["id"],
+                                    item_id=item["id"],
                                 ),
-                            )
-                            .relative_to(self.cache["BASE"])
-                            .as_posix(),
+                            ).relative_to(self.cache["BASE"]),
                         ),
                         "comment": "PDF print of item page",
                     },
                 ]
+            if not self.skip_item_thumb:
+                self.log.debug("Setting item thumbnail")
+                item_dict["thumbnail"] = str(
+                    Path(
+                        self.ITEM_THUMB_TP.format(
+                            order_id=order["id"],
+                            item_id=item["id"],
+                        ),
+                    )
+                    .relative_to(self.cache["BASE"])
+                    .as_posix(),
+                )
+
+            order["items"].append(item_dict)
+
+        if not self.skip_order_pdf:
+            order["attachments"] = [
+                {
+                    "name": "Order Invoice PDF",
+                    "path": str(
+                        Path(
+                            self.ORDER_INVOICE_TP.format(
+                                order_id=order["id"],
+                            ),
+                        )
+                        .relative_to(self.cache["BASE"])
+                        .as_posix(),
+                    ),
+                    "comment": "PDF print of item page",
+                },
+            ]
 
-            del order_orig["id"]
-            del order_orig["date"]
-            del order_orig["total"]
+        del order_orig["id"]
+        del order_orig["date"]
+        del order_orig["total"]
 
-            del order_details_dict["subtotal"]
-            del order_details_dict["tax"]
-            del order_details_dict["total"]
-            if "shipping" in order_details_dict:
-                del order_details_dict["shipping"]
+        del order_details_dict["subtotal"]
+        del order_details_dict["tax"]
+        del order_details_dict["total"]
+        if "shipping" in order_details_dict:
+            del order_details_dict["shipping"]
 
-            del order_details_dict["items"]
+        del order_details_dict["items"]
 
-            # Add extra dict items to output
-            order["extra_data"] = order_orig
-            order["extra_data"].update(order_details_dict)
-            structure["orders"].append(order)
-        self.output_schema_json(structure)
+        # Add extra dict items to output
+        order["extra_data"] = order_orig
+        order["extra_data"].update(order_details_dict)
+        return [order]
 
     # Class init
     def __init__(self, options: dict):
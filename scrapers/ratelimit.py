@@ -0,0 +1,154 @@
+"""
+Per host rate limiting for the browser.
+
+Every host gets a token bucket. The rate is halved each time a shop
+detects a interrupt (CAPTCHA, login wall, ...), and slowly increased
+back to the configured rate while requests go through without one.
+Hosts with a rate of 0 are not limited.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlparse
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class TokenBucket:
+    max_rate: float
+    burst: int
+    rate: float = 0
+    tokens: float = 0
+    updated: float = field(default_factory=time.monotonic)
+    interrupted: bool = False
+    # Counters
+    requests: int = 0
+    waits: int = 0
+    waited: float = 0
+    backoffs: int = 0
+
+    def __post_init__(self):
+        self.rate = self.rate or self.max_rate
+        self.tokens = self.burst
+
+    def reserve(self) -> float:
+        """
+        Takes a token, returns how many seconds the caller must sleep
+        before the token is valid.
+        """
+        if self.max_rate <= 0:
+            self.requests += 1
+            return 0
+        now = time.monotonic()
+        self.tokens = min(
+            self.burst,
+            self.tokens + (now - self.updated) * self.rate,
+        )
+        self.updated = now
+        self.tokens -= 1
+        self.requests += 1
+        if self.tokens >= 0:
+            return 0
+        delay = -self.tokens / self.rate
+        self.waits += 1
+        self.waited += delay
+        return delay
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        host_rates: dict[str, float] | None = None,
+        backoff_factor: float = 0.5,
+        min_rate_factor: float = 1 / 16,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.host_rates = host_rates or {}
+        self.backoff_factor = backoff_factor
+        self.min_rate_factor = min_rate_factor
+        self.buckets: dict[str, TokenBucket] = {}
+        self.lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    @classmethod
+    def host(cls, url: str) -> str:
+        return urlparse(url).hostname or url
+
+    def bucket(self, host: str) -> TokenBucket:
+        if host not in self.buckets:
+            self.buckets[host] = TokenBucket(
+                self.host_rates.get(host, self.rate),
+                self.burst,
+            )
+        return self.buckets[host]
+
+    def wait(self, url: str) -> float:
+        """
+        Sleeps until we are allowed another request to the host of url.
+        If the previous request had no interrupt, the rate is increased
+        a bit towards the configured rate.
+
+            Returns:
+                delay (float): seconds slept
+        """
+        with self.lock:
+            bucket = self.bucket(self.host(url))
+            if not bucket.interrupted and bucket.rate < bucket.max_rate:
+                bucket.rate = min(
+                    bucket.max_rate,
+                    bucket.rate + bucket.max_rate * self.min_rate_factor,
+                )
+            bucket.interrupted = False
+            delay = bucket.reserve()
+        if delay:
+            time.sleep(delay)
+        return delay
+
+    def backoff(self, url: str) -> None:
+        """
+        Reduce the request rate for the host of url, because of a
+        interrupt (CAPTCHA or similar).
+        """
+        with self.lock:
+            host = self.host(url)
+            bucket = self.bucket(host)
+            bucket.interrupted = True
+            bucket.backoffs += 1
+            bucket.rate = max(
+                bucket.max_rate * self.min_rate_factor,
+                bucket.rate * self.backoff_factor,
+            )
+            # Don't allow a burst right after a interrupt
+            bucket.tokens = min(bucket.tokens, 0)
+            log.debug(
+                "Backing off %s, now %.3f requests/second",
+                host,
+                bucket.rate,
+            )
+
+    def stats(self) -> dict[str, dict]:
+        with self.lock:
+            return {
+                host: {
+                    "requests": bucket.requests,
+                    "waits": bucket.waits,
+                    "waited": round(bucket.waited, 2),
+                    "backoffs": bucket.backoffs,
+                    "rate": round(bucket.rate, 3),
+                }
+                for host, bucket in self.buckets.items()
+                if bucket.max_rate > 0
+            }
@@ -0,0 +1,464 @@
+"""
+Exchange rates to NOK from Norges Bank's EXR data.
+
+Each currency is parsed once into a RateTable: one rate per day from
+the first observation to the last day needed, indexed by day ordinal.
+Days without an observation (weekends, holidays) have the rate of the
+last day before them, so looking up a rate is a list index.
+
+The rates parsed from a CSV are saved in binary next to it, and read
+from there until the CSV changes.
+
+ExchangeRates downloads one CSV per year to CACHE_BASE from WS_EXR_URL
+(point it at a local HTTP server to test without Norges Bank), several
+years at a time over one connection pool. Files for past years are
+kept, last year is refreshed with a conditional request (ETag and
+Last-Modified) every run, and the rates published since the last day
+we have are appended to the current year.
+"""
+import array
+import codecs
+import csv
+import functools
+import json
+import logging
+import struct
+import sys
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from decimal import Decimal
+from http import HTTPStatus
+from pathlib import Path
+
+import requests
+import requests.adapters
+
+from . import jsoncodec, settings
+
+log = logging.getLogger(__name__)
+
+# Parsed CSVs are cached as <csv>.rates, in native byte order
+CACHE_MAGIC = b"WSRATES1" + sys.byteorder[0].encode()
+# mtime_ns and size of the CSV
+CACHE_HEADER = struct.Struct("<qq")
+CACHE_COUNT = struct.Struct("<I")
+CURRENCY_BYTES = 8
+
+# Years downloaded at the same time
+DOWNLOAD_WORKERS = 4
+
+
+class RateTable:
+    """The rate (NOK per one unit) of currency, for every day from first"""
+
+    def __init__(self, currency: str, first: int, rates: list[Decimal]):
+        self.currency = currency
+        self.first = first
+        self.rates = rates
+
+    @classmethod
+    def from_observations(
+        cls,
+        currency: str,
+        observations: dict[int, Decimal],
+        last: int,
+    ) -> "RateTable":
+        """
+        Builds a table from observations (day ordinal -> rate) that runs
+        to the day ordinal last, forward-filling the days between them
+        """
+        first = min(observations)
+        rates = []
+        rate = None
+        for day in range(first, max(last, first) + 1):
+            rate = observations.get(day, rate)
+            rates.append(rate)
+        return cls(currency, first, rates)
+
+    @property
+    def last(self) -> int:
+        return self.first + len(self.rates) - 1
+
+    def rate(self, day: date | str) -> Decimal:
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        index = day.toordinal() - self.first
+        if not 0 <= index < len(self.rates):
+            msg = (
+                f"No {self.currency} rate for {day}, have rates from "
+                f"{date.fromordinal(self.first)} to "
+                f"{date.fromordinal(self.last)}"
+            )
+            raise KeyError(msg)
+        return self.rates[index]
+
+
+def parse_value(value: str, mult: str) -> Decimal:
+    """OBS_VALUE is per 10^UNIT_MULT units, with a decimal comma"""
+    return Decimal(value.replace(",", ".")).scaleb(-int(mult))
+
+
+def parse_exr(path: Path) -> dict[str, dict[int, Decimal]]:
+    """Reads the EXR CSV path, as currency -> day ordinal -> rate"""
+    observations: dict[str, dict[int, Decimal]] = {}
+    with Path(path).open(newline="", encoding="utf-8-sig") as csvfile:
+        reader = csv.reader(csvfile, delimiter=";")
+        header = next(reader, None)
+        if header is None:
+            return observations
+        cur_col = header.index("BASE_CUR")
+        mult_col = header.index("UNIT_MULT")
+        day_col = header.index("TIME_PERIOD")
+        value_col = header.index("OBS_VALUE")
+        for row in reader:
+            if not row[value_col]:
+                continue
+            observations.setdefault(row[cur_col], {})[
+                date.fromisoformat(row[day_col]).toordinal()
+            ] = parse_value(row[value_col], row[mult_col])
+    return observations
+
+
+def cache_path(path: Path) -> Path:
+    path = Path(path)
+    return path.with_name(path.name + ".rates")
+
+
+def write_cache(path: Path, observations: dict[str, dict[int, Decimal]]):
+    """
+    Saves the observations parsed from the CSV path next to it. Every
+    currency is stored as arrays of day ordinals, and of the rates as
+    integer mantissas and exponents (rate = mantissa * 10^exponent).
+    """
+    stat = Path(path).stat()
+    parts = [CACHE_MAGIC, CACHE_HEADER.pack(stat.st_mtime_ns, stat.st_size)]
+    parts.append(CACHE_COUNT.pack(len(observations)))
+    for currency, days in sorted(observations.items()):
+        ordinals = array.array("i", sorted(days))
+        mantissas = array.array("q")
+        exponents = array.array("b")
+        for ordinal in ordinals:
+            exponent = days[ordinal].as_tuple().exponent
+            mantissas.append(int(days[ordinal].scaleb(-exponent)))
+            exponents.append(exponent)
+        parts.append(currency.encode("ascii").ljust(CURRENCY_BYTES))
+        parts.append(CACHE_COUNT.pack(len(ordinals)))
+        parts.extend(
+            [ordinals.tobytes(), mantissas.tobytes(), exponents.tobytes()],
+        )
+    tmp_path = cache_path(path).with_name(cache_path(path).name + ".tmp")
+    tmp_path.write_bytes(b"".join(parts))
+    tmp_path.replace(cache_path(path))
+
+
+def read_cache(path: Path) -> dict[str, dict[int, Decimal]] | None:
+    """
+    Returns the observations saved for the CSV path, or None if there
+    are none or the CSV has changed since
+    """
+    try:
+        data = cache_path(path).read_bytes()
+        stat = Path(path).stat()
+    except FileNotFoundError:
+        return None
+    if not data.startswith(CACHE_MAGIC):
+        return None
+    offset = len(CACHE_MAGIC)
+    if CACHE_HEADER.unpack_from(data, offset) != (
+        stat.st_mtime_ns,
+        stat.st_size,
+    ):
+        return None
+    offset += CACHE_HEADER.size
+    (currency_count,) = CACHE_COUNT.unpack_from(data, offset)
+    offset += CACHE_COUNT.size
+    observations = {}
+    for _ in range(currency_count):
+        currency = data[offset : offset + CURRENCY_BYTES].rstrip().decode()
+        offset += CURRENCY_BYTES
+        (count,) = CACHE_COUNT.unpack_from(data, offset)
+        offset += CACHE_COUNT.size
+        arrays = []
+        for typecode in "iqb":
+            values = array.array(typecode)
+            end = offset + count * values.itemsize
+            values.frombytes(data[offset:end])
+            arrays.append(values)
+            offset = end
+        observations[currency] = {
+            ordinal: Decimal(mantissa).scaleb(exponent)
+            for ordinal, mantissa, exponent in zip(*arrays, strict=True)
+        }
+    return observations
+
+
+def read_exr(path: Path) -> dict[str, dict[int, Decimal]]:
+    """Like parse_exr, from the cache next to path if it is up to date"""
+    observations = read_cache(path)
+    if observations is None:
+        log.debug("Parsing %s", path)
+        observations = parse_exr(path)
+        write_cache(path, observations)
+    return observations
+
+
+def load_exr(
+    paths: Iterable[Path],
+    currencies: Iterable[str] | None,
+    last: date,
+) -> dict[str, RateTable]:
+    """
+    Reads the EXR CSVs in paths, and returns a table running to last
+    for each of currencies (None for all) that has observations
+    """
+    currencies = None if currencies is None else set(currencies)
+    observations: dict[str, dict[int, Decimal]] = {}
+    for path in paths:
+        for currency, days in read_exr(path).items():
+            if currencies is None or currency in currencies:
+                observations.setdefault(currency, {}).update(days)
+    tables = {
+        currency: RateTable.from_observations(
+            currency,
+            days,
+            last.toordinal(),
+        )
+        for currency, days in observations.items()
+    }
+    for table in tables.values():
+        log.debug(
+            "%s rates from %s to %s",
+            table.currency,
+            date.fromordinal(table.first),
+            date.fromordinal(table.last),
+        )
+    return tables
+
+
+def exr_path(year: int) -> Path:
+    return Path(settings.CACHE_BASE) / f"EXR-{year}.csv"
+
+
+def exr_url(url: str, year: int, start: date | None = None) -> str:
+    """url for year, from start if given (and url has {start})"""
+    return url.format(
+        year=year,
+        start=start or date(year, 1, 1),
+        end=date(year, 12, 31),
+    )
+
+
+def make_session() -> requests.Session:
+    session = requests.Session()
+    session.headers["User-Agent"] = "github.com/Kagee/webshop-order-scraper"
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=DOWNLOAD_WORKERS)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def download_exr(
+    year: int,
+    url: str = settings.EXR_URL,
+    session: requests.Session | None = None,
+) -> bool:
+    """
+    Downloads the rates for year to exr_path(year). If we have the file,
+    only downloads it if it has changed on the server.
+
+        Returns:
+            found (bool): False if the server has no rates for year
+    """
+    path = exr_path(year)
+    # The validators the server sent with the file
+    http_path = path.with_name(path.name + ".http")
+    headers = {}
+    if path.is_file():
+        try:
+            validators = jsoncodec.load(http_path)
+        except (FileNotFoundError, json.decoder.JSONDecodeError):
+            validators = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+    response = (session or make_session()).get(
+        exr_url(url, year),
+        headers=headers,
+        timeout=30,
+    )
+    if response.status_code == HTTPStatus.NOT_FOUND:
+        return False
+    if response.status_code == HTTPStatus.NOT_MODIFIED:
+        log.debug("Rates for %s have not changed", year)
+        return True
+    response.raise_for_status()
+    log.debug("Downloaded rates for %s", year)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(response.content)
+    tmp_path.replace(path)
+    jsoncodec.dump(
+        {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        },
+        http_path,
+    )
+    return True
+
+
+def update_exr(
+    year: int,
+    url: str = settings.EXR_URL,
+    session: requests.Session | None = None,
+) -> bool:
+    """
+    Appends the rates published since the last day in exr_path(year),
+    for the current year. Downloads the whole year if we do not have
+    it, or url can not ask for a start date.
+
+        Returns:
+            found (bool): False if the server has no rates for year
+    """
+    path = exr_path(year)
+    observations = read_exr(path) if path.is_file() else {}
+    if "{start}" not in url or not any(observations.values()):
+        return download_exr(year, url, session)
+    start = date.fromordinal(
+        max(max(days) for days in observations.values() if days) + 1,
+    )
+    if start > datetime.now().astimezone().date():
+        return True
+    response = (session or make_session()).get(
+        exr_url(url, year, start),
+        timeout=30,
+    )
+    # No rates published since start
+    if response.status_code == HTTPStatus.NOT_FOUND:
+        return True
+    response.raise_for_status()
+    lines = response.content.removeprefix(codecs.BOM_UTF8).splitlines(
+        keepends=True,
+    )
+    # The first line is the header
+    if len(lines) > 1:
+        log.debug(
+            "Appending %s rates for %s from %s",
+            len(lines) - 1,
+            year,
+            start,
+        )
+        content = path.read_bytes()
+        with path.open("ab") as file:
+            if not content.endswith(b"\n"):
+                file.write(b"\r\n")
+            file.writelines(lines[1:])
+    return True
+
+
+class ExchangeRates:
+    """
+    Rates to NOK for all currencies, for the years loaded. Looking up
+    a day outside them loads the years needed.
+    """
+
+    def __init__(self, url: str = settings.EXR_URL):
+        self.url = url
+        self.years: range = range(0)
+        self.tables: dict[str, RateTable] = {}
+        # Years the server has no rates for
+        self.missing: set[int] = set()
+
+    def load(self, first_year: int, last_year: int) -> None:
+        """
+        Makes sure the rates for first_year to last_year are downloaded
+        and up to date, and loads them
+        """
+        today = datetime.now().astimezone().date()
+        last_year = min(last_year, today.year)
+        # The year before fills in the days before the first observation
+        years = range(first_year - 1, last_year + 1)
+        # Past years do not change once we have them
+        fetch = [
+            year
+            for year in years
+            if year not in self.missing
+            and (not exr_path(year).is_file() or year >= today.year - 1)
+        ]
+        with ThreadPoolExecutor(
+            max_workers=DOWNLOAD_WORKERS,
+        ) as executor, make_session() as session:
+            futures = {
+                year: executor.submit(
+                    update_exr if year == today.year else download_exr,
+                    year,
+                    self.url,
+                    session,
+                )
+                for year in fetch
+            }
+            for year, future in futures.items():
+                try:
+                    if not future.result():
+                        log.debug("No rates for %s", year)
+                        self.missing.add(year)
+                except requests.RequestException as err:  # noqa: PERF203
+                    if not exr_path(year).is_file():
+                        raise
+                    log.warning("Could not refresh rates for %s: %s", year, err)
+        self.tables = load_exr(
+            [
+                exr_path(year)
+                for year in years
+                if year not in self.missing and exr_path(year).is_file()
+            ],
+            None,
+            min(date(last_year, 12, 31), today),
+        )
+        self.years = range(first_year, last_year + 1)
+
+    def cover(self, first: date, last: date) -> None:
+        """Loads more years if first to last is not loaded"""
+        if first.year not in self.years or last.year not in self.years:
+            self.load(
+                min(first.year, self.years.start or first.year),
+                max(last.year, (self.years.stop or last.year + 1) - 1),
+            )
+
+    def table(self, currency: str, day: date) -> RateTable:
+        self.cover(day, day)
+        try:
+            return self.tables[currency]
+        except KeyError:
+            msg = f"No rates for {currency}"
+            raise KeyError(msg) from None
+
+    def rate(self, currency: str, day: date | str) -> Decimal:
+        """The rate to NOK for one unit of currency on day"""
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        return self.table(currency, day).rate(day)
+
+    def rates(self, currency: str, days: Iterable[date | str]) -> list[Decimal]:
+        """The rates to NOK of currency on each of days"""
+        days = [
+            date.fromisoformat(day) if isinstance(day, str) else day
+            for day in days
+        ]
+        if not days:
+            return []
+        # Load the whole range once, not one year at a time
+        self.cover(min(days), max(days))
+        table = self.table(currency, days[0])
+        return [table.rate(day) for day in days]
+
+
+@functools.cache
+def exchange_rates() -> ExchangeRates:
+    """The ExchangeRates shared by everything in this process"""
+    return ExchangeRates()
+
+
+def rate(currency: str, day: date | str) -> Decimal:
+    return exchange_rates().rate(currency, day)
@@ -0,0 +1,35 @@
+"""
+The scrapers, by scraper.py subcommand.
+
+Shop modules import Selenium, lxml and friends, so they are only
+imported when a scraper is used, not when the CLI starts.
+"""
+import importlib
+
+# subcommand -> (module in scrapers, class)
+SCRAPERS: dict[str, tuple[str, str]] = {
+    "adafruit": ("adafruit", "AdafruitScraper"),
+    "aliexpress": ("aliexpress", "AliExpressScraper"),
+    "amazon": ("amazon", "AmazonScraper"),
+    "digikey": ("digikey", "DigikeyScraper"),
+    "distrelec": ("distrelec", "DistrelecScraper"),
+    "ebay": ("ebay", "EbayScraper"),
+    "imap": ("imap", "IMAPScraper"),
+    "jula": ("jula", "JulaScraper"),
+    "kjell": ("kjell", "KjellScraper"),
+    "komplett": ("komplett", "KomplettScraper"),
+    "pimoroni": ("pimoroni", "PimoroniScraper"),
+    "polyalkemi": ("polyalkemi", "PolyalkemiScraper"),
+    "tindie": ("tindie", "TindieScraper"),
+}
+
+
+def scraper_class(source: str) -> type:
+    """Imports and returns the scraper class for the subcommand source"""
+    try:
+        module_name, class_name = SCRAPERS[source]
+    except KeyError:
+        msg = f"No scraper for {source}"
+        raise ValueError(msg) from None
+    module = importlib.import_module(f".{module_name}", __package__)
+    return getattr(module, class_name)
@@ -64,15 +64,80 @@ with env.prefixed("WS_"):
         ),
     )
 
+    # webdriver: WebDriver print command, printer: window.print() to PDF_PRINTER
+    PDF_BACKEND: str = env(
+        "PDF_BACKEND",
+        default="webdriver",
+        validate=lambda x: x in ["webdriver", "printer"],
+    )
+
     GH_TOKEN: str = env("GH_TOKEN", default=None)
 
+    # Where exchange rates to NOK are downloaded from. {year} is replaced
+    # with the year, {start} and {end} with the first and last day to get
+    # (YYYY-MM-DD). See rates.py
+    EXR_URL: str = env(
+        "EXR_URL",
+        default=(
+            "https://data.norges-bank.no/api/data/EXR/B..NOK.SP?"
+            "startPeriod={start}&"
+            "endPeriod={end}&"
+            "format=csv&bom=include&locale=no"
+        ),
+    )
+
+    # Max requests per second to each host, and how many requests
+    # may be done in a burst before the rate applies. 0 is no limit,
+    # except for shops with their own default (RATE_LIMIT on the class)
+    RATE_LIMIT: float = env.float("RATE_LIMIT", default=0)
+    RATE_LIMIT_BURST: int = env.int("RATE_LIMIT_BURST", default=2)
+    # Format: RATE_LIMITS=www.amazon.de=0.2,www.ebay.com=1
+    RATE_LIMITS: dict = env.dict(
+        "RATE_LIMITS",
+        subcast_values=float,
+        default={},
+    )
+
     OUTPUT_FOLDER: Path = Path(
         env("OUTPUT_FOLDER", default="./output"),
     ).resolve()
 
+    # zlib level (1-9) for HTML/JSON in the export zip
+    EXPORT_DEFLATE_LEVEL: int = env.int(
+        "EXPORT_DEFLATE_LEVEL",
+        default=6,
+        validate=lambda x: 1 <= x <= 9,  # noqa: PLR2004
+    )
+    # none, gzip or zstd (needs zstandard). For HTML in the cache
+    CACHE_COMPRESSION: str = env(
+        "CACHE_COMPRESSION",
+        default="gzip",
+        validate=lambda x: x in ["none", "gzip", "zstd"],
+    )
+    # Hardlink identical thumbnails/PDFs in the cache to one file
+    CACHE_DEDUPLICATE: bool = env.bool("CACHE_DEDUPLICATE", default=True)
+    # Keep an index of the files in the cache, see cacheindex.py
+    CACHE_INDEX: bool = env.bool("CACHE_INDEX", default=True)
+    # Threads used to compress the export zip, 0 is one per CPU
+    EXPORT_WORKERS: int = env.int("EXPORT_WORKERS", default=0)
+
     JSON_SCHEMA: Path = Path(
         env("JSON_SCHEMA", default="./schema/webshop-orders.json"),
     ).resolve()
+    # auto: orjson if installed, else json. Used for the cache
+    JSON_BACKEND: str = env(
+        "JSON_BACKEND",
+        default="auto",
+        validate=lambda x: x in ["auto", "json", "orjson"],
+    )
+    # Indentation of the JSON export, 0 writes it without newlines
+    JSON_INDENT: int = env.int("JSON_INDENT", default=4)
+    # auto: fastjsonschema if installed, else jsonschema
+    JSON_VALIDATOR: str = env(
+        "JSON_VALIDATOR",
+        default="auto",
+        validate=lambda x: x in ["auto", "jsonschema", "fastjsonschema"],
+    )
 
     NO_COLOR: str = env.bool(
         "NO_COLOR",
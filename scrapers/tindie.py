@@ -1,12 +1,11 @@
 # pylint: disable=unused-import
-import contextlib
 import re
 from datetime import datetime as dt
 from datetime import datetime as dtdt
 from pathlib import Path
-from typing import TYPE_CHECKING, Final, List  # noqa: UP035
+from typing import Final
 
-from selenium.common.exceptions import NoSuchElementException
+from lxml.html import HtmlElement
 from selenium.webdriver.common.by import By
 
 from .base import BaseScraper
@@ -14,14 +13,49 @@ from .base import BaseScraper
 # pylint: disable=unused-import
 from .utils import AMBER
 
-if TYPE_CHECKING:
-    from selenium.webdriver.remote.webelement import WebElement
-
 
 class TindieScraper(BaseScraper):
     tla: Final[str] = "TND"
     name: Final[str] = "Tindie"
     simple_name: Final[str] = "tindie"
+    ORDER_LIST_SPEC: Final[dict] = {
+        "orders": {
+            "css": "main table.table tbody tr",
+            "all": True,
+            "fields": {
+                "tds": {
+                    "css": "td",
+                    "all": True,
+                    "fields": {
+                        "text": {},
+                        "items": {
+                            "css": "div.row",
+                            "all": True,
+                            "fields": {
+                                "cols": {
+                                    "css": "div",
+                                    "all": True,
+                                    "fields": {
+                                        "text": {},
+                                        "link_text": "a",
+                                        "link_href": {
+                                            "css": "a",
+                                            "prop": "href",
+                                        },
+                                        "small": "small",
+                                        "small_href": {
+                                            "css": "small a",
+                                            "prop": "href",
+                                        },
+                                    },
+                                },
+                            },
+                        },
+                    },
+                },
+            },
+        },
+    }
 
     def __init__(self, options: dict):
         super().__init__(options, __name__)
@@ -49,129 +83,113 @@ class TindieScraper(BaseScraper):
             self.log.error(msg)
             raise ValueError(msg)
 
-    def browser_scrape_order_list(self) -> dict:  # noqa: PLR0915
+    def browser_scrape_order_list(self) -> dict:
         if self.options.use_cached_orderlist and self.can_read(
             self.ORDER_LIST_JSON,
         ):
             order_dict = self.read(self.ORDER_LIST_JSON, from_json=True)
         else:
-            order_dict = {}
-            _brws = self.browser_visit(
-                "https://www.tindie.com/orders/purchases/",
-            )
-            csss = "main table.table tbody tr"
-            order_trs: WebElement = self.find_elements(
-                By.CSS_SELECTOR,
-                csss,
+            self.browser_visit("https://www.tindie.com/orders/purchases/")
+            order_dict = self.lxml_parse_order_list(
+                self.browser_snapshot(self.ORDER_LIST_HTML),
             )
 
-            for order_tr in order_trs:
-                order = {}
-                tds: List[WebElement] = order_tr.find_elements(  # noqa: UP006
-                    By.TAG_NAME,
-                    "td",
-                )
-                # td1 a.text = #<order_id>
-                order["id"] = tds[0].text[1:]
-                self.log.debug("Order ID: %s", order["id"])
+        self.write(self.ORDER_LIST_JSON, order_dict, to_json=True)
+        return order_dict
 
-                # td2.text = order date 27 Jun 2023
-                order["date"] = dt.strptime(
-                    tds[1].text,
-                    "%d %b %Y",
-                ).astimezone()
-                self.log.debug("Order date: %s", order["date"])
+    def lxml_parse_order_list(self, html: HtmlElement) -> dict:
+        page = self.lxml_extract(self.ORDER_LIST_SPEC, html)
+        order_dict = {}
 
-                csss = "div.row"
-                item_divs: List[WebElement] = tds[2].find_elements(  # noqa: UP006
-                    By.CSS_SELECTOR,
-                    csss,
-                )
-                # td3 div -> order item ->
-                #     div (3 stk):
+        for order_tr in page["orders"]:
+            order = {}
+            tds = order_tr["tds"]
+            # td1 a.text = #<order_id>
+            order["id"] = tds[0]["text"][1:]
+            self.log.debug("Order ID: %s", order["id"])
 
-                items = []
-                for item_div in item_divs:
-                    item = {}
-                    item_cols: List[WebElement] = item_div.find_elements(  # noqa: UP006
-                        By.TAG_NAME,
-                        "div",
-                    )
-                    #     -div1 <a href="/products/hamstudio/ham-ch552-micro/">Ham CH552 Micro</a>
-                    item_a = item_cols[0].find_element(By.TAG_NAME, "a")
-                    item["name"] = item_a.text
-                    item["id"] = re.sub(
-                        "http.*/products/",
-                        "",
-                        item_a.get_attribute("href"),
-                    )[:-1]
-                    self.log.debug(
-                        "Item id: %s, Item name: %s",
-                        item["id"],
-                        item["name"],
-                    )
-                    #     -div2 : ignore?
-                    #     -div3: line1: order status, line 2: status date, line x in small: tracking name or url(href)
-                    item_tracking_info = []
-                    tracking_small_element: WebElement = None
-                    with contextlib.suppress(NoSuchElementException):
-                        tracking_small_element = item_cols[2].find_element(
-                            By.TAG_NAME,
-                            "small",
-                        )
+            # td2.text = order date 27 Jun 2023
+            order["date"] = dt.strptime(
+                tds[1]["text"],
+                "%d %b %Y",
+            ).astimezone()
+            self.log.debug("Order date: %s", order["date"])
+
+            # td3 div -> order item ->
+            #     div (3 stk):
 
-                        if tracking_small_element:
-                            tracking_a: WebElement = None
-                            with contextlib.suppress(NoSuchElementException):
-                                tracking_a = (
-                                    tracking_small_element.find_element(
-                                        By.TAG_NAME,
-                                        "a",
-                                    )
-                                )
-                            for (
-                                line
-                            ) in tracking_small_element.text.splitlines():
-                                sline = line.strip()
-                                if sline and "Track Your Package" not in sline:
-                                    item_tracking_info.append(sline)
-                            if tracking_a:
-                                item_tracking_info.append(
-                                    tracking_a.get_attribute("href"),
-                                )
-                        else:
-                            self.log.warning("No tracking info")
-                        self.browser.execute_script(
-                            """
-                                arguments[0].remove();
-                            """,
-                            tracking_small_element,
+            items = []
+            for item_div in tds[2]["items"]:
+                item = {}
+                item_cols = item_div["cols"]
+                #     -div1 <a href="/products/hamstudio/ham-ch552-micro/">Ham CH552 Micro</a>
+                item["name"] = item_cols[0]["link_text"]
+                item["id"] = re.sub(
+                    "http.*/products/",
+                    "",
+                    item_cols[0]["link_href"],
+                )[:-1]
+                self.log.debug(
+                    "Item id: %s, Item name: %s",
+                    item["id"],
+                    item["name"],
+                )
+                #     -div2 : ignore?
+                #     -div3: line1: order status, line 2: status date, line x in small: tracking name or url(href)
+                item_tracking_info = []
+                status_text = item_cols[2]["text"]
+                if item_cols[2]["small"] is not None:
+                    for line in item_cols[2]["small"].splitlines():
+                        sline = line.strip()
+                        if sline and "Track Your Package" not in sline:
+                            item_tracking_info.append(sline)
+                    if item_cols[2]["small_href"]:
+                        item_tracking_info.append(
+                            item_cols[2]["small_href"],
                         )
-                    item["extra_data"] = {}
-                    item["extra_data"]["status"] = " ".join(
-                        item_cols[2].text.splitlines(),
+                    status_text = status_text.replace(
+                        item_cols[2]["small"],
+                        "",
                     )
-                    self.log.warning(
-                        "Item status: %s",
-                        item["extra_data"]["status"],
+                else:
+                    self.log.warning("No tracking info")
+                item["extra_data"] = {}
+                item["extra_data"]["status"] = " ".join(
+                    line
+                    for line in status_text.splitlines()
+                    if line.strip()
+                )
+                self.log.warning(
+                    "Item status: %s",
+                    item["extra_data"]["status"],
+                )
+                if item_tracking_info:
+                    item_tracking_info = "; ".join(item_tracking_info)
+                    item["extra_data"]["tracking"] = item_tracking_info
+                    self.log.debug(
+                        "Item tracking info: %s",
+                        item["extra_data"]["tracking"],
                     )
-                    if item_tracking_info:
-                        item_tracking_info = "; ".join(item_tracking_info)
-                        item["extra_data"]["tracking"] = item_tracking_info
-                        self.log.debug(
-                            "Item tracking info: %s",
-                            item["extra_data"]["tracking"],
-                        )
-                    items.append(item)
-                order["items"] = items
-                # td4.text order total $43.00
-                order_total = self.get_value_currency("total", tds[3].text)
-                self.log.debug("Order total: %s", order_total)
-                order_dict[order["id"]] = order
-
-        self.write(self.ORDER_LIST_JSON, order_dict, to_json=True)
+                items.append(item)
+            order["items"] = items
+            # td4.text order total $43.00
+            order_total = self.get_value_currency("total", tds[3]["text"])
+            self.log.debug("Order total: %s", order_total)
+            order_dict[order["id"]] = order
         return order_dict
 
+    def reparse_cache_files(self) -> list[Path]:
+        if self.can_read(self.ORDER_LIST_HTML):
+            return [self.ORDER_LIST_HTML]
+        return []
+
+    def reparse_cache_file(self, path: Path) -> None:
+        self.write(
+            self.ORDER_LIST_JSON,
+            self.lxml_parse_order_list(self.read(path, from_html=True)),
+            to_json=True,
+        )
+
     def browser_get_item_thumb(self, item_id: str):
         item_id_filesafe = item_id.replace("/", "_")
         filename = f"{item_id_filesafe}.jpg"
@@ -194,9 +212,10 @@ class TindieScraper(BaseScraper):
         else:
             self.log.debug("Thumbnail for %s found", item_id)
 
-    def browser_detect_handle_interrupt(self, _):
+    def browser_detect_handle_interrupt(self, expected_url):
         brws = self.browser_get_instance()
         if "login" in brws.current_url:
+            self.rate_limit_backoff(expected_url)
             self.log.error(
                 AMBER(
                     "Please manyally login to Tindie, "
@@ -208,6 +227,7 @@ class TindieScraper(BaseScraper):
     def setup_templates(self):
         # pylint: disable=invalid-name
         self.ORDER_LIST_JSON = self.cache["BASE"] / "order_list.json"
+        self.ORDER_LIST_HTML = self.cache["BASE"] / "order_list.html"
         self.ORDER_FOLDER_TP = str(self.cache["BASE"] / "orders/{order_id}/")
         self.THUMBNAILS = str(self.cache["BASE"] / "thumbnails/{filename}")
         self.PDFS = str(self.cache["BASE"] / "pdfs/{filename}")
@@ -221,7 +241,10 @@ class TindieScraper(BaseScraper):
             "https://www.tindie.com/orders/purchases/{order_id}/",
             "https://www.tindie.com/products/{item_id}",
         )
-        orders = []
+        self.output_schema_json(structure, self.std_json_orders())
+
+    def std_json_orders(self):
+        """Yields the orders for command_to_std_json, one at a time"""
         for order_input in self.json_read(
             self.ORDER_LIST_JSON,
         ).values():
@@ -271,9 +294,4 @@ class TindieScraper(BaseScraper):
                 )
 
                 order["items"].append(item)
-            orders.append(order)
-        structure["orders"] = orders
-        import pprint
-
-        self.log.debug(pprint.pformat(structure))
-        self.output_schema_json(structure)
+            yield order
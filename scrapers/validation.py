@@ -0,0 +1,236 @@
+"""
+Validates exports against the JSON schema.
+
+The schema is read and compiled once per process. It is split in a
+schema for the export without the order details, and one for a single
+order, so orders can be validated one by one (in parallel for large
+exports) and every failing order is reported, not only the first.
+uniqueItems on the orders is checked by hashing the orders, jsonschema
+compares every pair of orders, which takes seconds for large exports.
+
+If fastjsonschema is installed it is used by default, it compiles the
+schema to Python code and is much faster than jsonschema. It only
+reports the first error in each order.
+"""
+import copy
+import functools
+import hashlib
+import json
+import logging
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from jsonschema.validators import validator_for
+
+try:
+    import fastjsonschema
+except ImportError:
+    fastjsonschema = None
+
+# Exports with fewer orders are validated in this process
+PARALLEL_ORDERS = 5000
+
+log = logging.getLogger(__name__)
+
+ValidationErrors = list[tuple[str, str]]
+Validator = Callable[[object], ValidationErrors]
+
+
+def compile_jsonschema(schema: dict) -> Validator:
+    validator_class = validator_for(schema)
+    validator_class.check_schema(schema)
+    validator = validator_class(schema)
+
+    def errors(instance: object) -> ValidationErrors:
+        return [
+            (error.json_path, error.message)
+            for error in validator.iter_errors(instance)
+        ]
+
+    return errors
+
+
+def compile_fastjsonschema(schema: dict) -> Validator:
+    # jsonschema does not check formats by default, so neither do we
+    validate = fastjsonschema.compile(schema, use_formats=False)
+
+    def errors(instance: object) -> ValidationErrors:
+        try:
+            validate(instance)
+        except fastjsonschema.JsonSchemaValueException as exc:
+            return [("$" + exc.name.removeprefix("data"), exc.message)]
+        return []
+
+    return errors
+
+
+BACKENDS = {
+    "jsonschema": compile_jsonschema,
+    "fastjsonschema": compile_fastjsonschema,
+}
+
+
+def resolve_backend(backend: str) -> str:
+    if backend == "auto":
+        return "fastjsonschema" if fastjsonschema else "jsonschema"
+    if backend == "fastjsonschema" and not fastjsonschema:
+        log.warning("fastjsonschema is not installed, using jsonschema")
+        return "jsonschema"
+    return backend
+
+
+def split_schema(schema: dict) -> tuple[dict, dict]:
+    """
+    Splits schema in one for the export without the order details
+    and uniqueItems (but with the other checks on the list of orders),
+    and one for a single order.
+    """
+    structure_schema = copy.deepcopy(schema)
+    structure_schema["properties"]["orders"].pop("uniqueItems", None)
+    order_schema = structure_schema["properties"]["orders"].pop("items")
+    order_schema = {
+        key: schema[key] for key in ["$schema", "$defs"] if key in schema
+    } | order_schema
+    return structure_schema, order_schema
+
+
+@functools.cache
+def compiled_validators(
+    schema_path: Path,
+    backend: str,
+) -> tuple[Validator, Validator]:
+    """
+    Returns:
+        structure (Validator): validates the export, except orders
+        order (Validator): validates a single order
+    """
+    log.debug("Compiling %s using %s", schema_path, backend)
+    with schema_path.open(encoding="utf-8") as schema_file:
+        schema = json.load(schema_file)
+    structure_schema, order_schema = split_schema(schema)
+    compile_schema = BACKENDS[backend]
+    return compile_schema(structure_schema), compile_schema(order_schema)
+
+
+def order_digest(order: dict) -> bytes:
+    return hashlib.sha1(
+        json.dumps(order, sort_keys=True).encode("utf-8"),
+        usedforsecurity=False,
+    ).digest()
+
+
+def duplicate_errors(orders: list) -> ValidationErrors:
+    seen = {}
+    errors = []
+    for index, order in enumerate(orders):
+        key = order_digest(order)
+        if key in seen:
+            errors.append(
+                (
+                    f"$.orders[{index}]",
+                    f"Order is a duplicate of $.orders[{seen[key]}]",
+                ),
+            )
+        else:
+            seen[key] = index
+    return errors
+
+
+def order_errors(
+    schema_path: Path,
+    backend: str,
+    index: int,
+    order: dict,
+) -> ValidationErrors:
+    _, validator = compiled_validators(schema_path, backend)
+    return [
+        (f"$.orders[{index}]{path.removeprefix('$')}", message)
+        for path, message in validator(order)
+    ]
+
+
+def validate_structure(
+    structure: dict,
+    schema_path: Path,
+    backend: str = "auto",
+    workers: int | None = None,
+) -> ValidationErrors:
+    """
+    Validates an export against the schema at schema_path.
+
+        Returns:
+            errors (list): (JSON path, message) for every error, empty
+                if structure is valid
+    """
+    backend = resolve_backend(backend)
+    structure_validator, _ = compiled_validators(schema_path, backend)
+    errors = structure_validator(structure)
+    orders = structure.get("orders")
+    if not isinstance(orders, list):
+        return errors
+    errors += duplicate_errors(orders)
+    check_order = functools.partial(order_errors, schema_path, backend)
+    if len(orders) < PARALLEL_ORDERS or workers == 1:
+        results = map(check_order, range(len(orders)), orders)
+        return errors + [error for result in results for error in result]
+    log.debug("Validating %s orders in parallel", len(orders))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(
+            check_order,
+            range(len(orders)),
+            orders,
+            chunksize=100,
+        )
+        return errors + [error for result in results for error in result]
+
+
+class OrderStreamValidator:
+    """
+    Validates an export one order at a time, for exports that are
+    written as the orders are made (see jsonexport). Only a digest of
+    each order is kept, to find duplicates.
+    """
+
+    def __init__(self, schema_path: Path, backend: str = "auto"):
+        self.schema_path = schema_path
+        self.backend = resolve_backend(backend)
+        self.errors: ValidationErrors = []
+        self.count = 0
+        self.seen: dict[bytes, int] = {}
+
+    def add(self, order: dict) -> None:
+        index = self.count
+        self.count += 1
+        key = order_digest(order)
+        if key in self.seen:
+            self.errors.append(
+                (
+                    f"$.orders[{index}]",
+                    f"Order is a duplicate of $.orders[{self.seen[key]}]",
+                ),
+            )
+        else:
+            self.seen[key] = index
+        self.errors += order_errors(
+            self.schema_path,
+            self.backend,
+            index,
+            order,
+        )
+
+    def finish(self, structure: dict) -> ValidationErrors:
+        """
+        Validates the rest of structure, and returns the errors for
+        the whole export. The orders in structure are ignored.
+        """
+        structure_validator, _ = compiled_validators(
+            self.schema_path,
+            self.backend,
+        )
+        # The orders are already validated, the schema for the export
+        # only checks the length of the list
+        return (
+            structure_validator(structure | {"orders": list(range(self.count))})
+            + self.errors
+        )
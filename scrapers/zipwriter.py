@@ -0,0 +1,274 @@
+"""
+Minimal zip writer for entries compressed ahead of time.
+
+zipfile compresses an entry while writing it, so it can not write data
+deflated in other threads. compress_entry makes the data of an entry
+(raw deflate, or stored as is) with its CRC and size, and ZipWriter
+writes such entries and the central directory. Opened on an existing
+archive (mode "a") the new entries are written over its central
+directory, which is written again after them, as zipfile does.
+
+Zip64 records are written when sizes, offsets or the number of entries
+need them. Archives are read back with zipfile.
+"""
+import os
+import struct
+import zipfile
+import zlib
+from pathlib import Path
+
+LOCAL_HEADER = struct.Struct("<4sHHHHHLLLHH")
+LOCAL_SIG = b"PK\x03\x04"
+CENTRAL_HEADER = struct.Struct("<4sBBHHHHHLLLHHHHHLL")
+CENTRAL_SIG = b"PK\x01\x02"
+END_RECORD = struct.Struct("<4sHHHHLLH")
+END_SIG = b"PK\x05\x06"
+ZIP64_END_RECORD = struct.Struct("<4sQHHLLQQQQ")
+ZIP64_END_SIG = b"PK\x06\x06"
+ZIP64_LOCATOR = struct.Struct("<4sLQL")
+ZIP64_LOCATOR_SIG = b"PK\x06\x07"
+ZIP64_EXTRA_ID = 0x0001
+
+# Written in place of values that are in zip64 records
+ZIP64_MARKER = 0xFFFFFFFF
+ZIP64_COUNT_MARKER = 0xFFFF
+# Values from these on need zip64
+ZIP64_LIMIT = ZIP64_MARKER
+ZIP_MAX_ENTRIES = ZIP64_COUNT_MARKER
+# Version needed to extract: stored, deflated, zip64
+STORED_VERSION = 10
+DEFLATED_VERSION = 20
+ZIP64_VERSION = 45
+UTF8_FLAG = 0x800
+# The end record and the longest archive comment
+MAX_TAIL = END_RECORD.size + 0xFFFF
+
+
+def compress_entry(
+    zinfo: zipfile.ZipInfo,
+    data: bytes,
+    level: int,
+) -> tuple[zipfile.ZipInfo, bytes, int, int]:
+    """
+    Compresses data for the entry zinfo, by zinfo.compress_type.
+    Thread safe, zlib releases the GIL.
+
+        Returns:
+            zinfo (ZipInfo): the entry
+            data (bytes): the raw deflate stream, or data if stored
+            crc (int): CRC32 of the uncompressed data
+            size (int): size of the uncompressed data
+    """
+    packed = data
+    if zinfo.compress_type == zipfile.ZIP_DEFLATED:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        packed = compressor.compress(data) + compressor.flush()
+    return zinfo, packed, zlib.crc32(data), len(data)
+
+
+class ZipWriter:
+    """
+    Writes entries from compress_entry to the zip archive at path,
+    a new archive with mode "w" or appending with mode "a".
+    """
+
+    def __init__(self, path: Path, mode: str = "w"):
+        if mode not in ["w", "a"]:
+            msg = f"ZipWriter mode must be 'w' or 'a', not {mode!r}"
+            raise ValueError(msg)
+        # Closed by close()
+        self.file = Path(path).open(  # noqa: SIM115
+            "r+b" if mode == "a" else "wb",
+        )
+        # Records of the central directory, written on close
+        self.central: list[bytes] = []
+        self.count = 0
+        if mode == "a":
+            try:
+                self.read_central_directory()
+            except BaseException:
+                self.file.close()
+                raise
+
+    def __enter__(self) -> "ZipWriter":  # noqa: PYI034
+        return self
+
+    def __exit__(self, *_) -> None:
+        # Also on errors, so an appended archive keeps its old entries
+        self.close()
+
+    def read_central_directory(self) -> None:
+        """
+        Keeps the central directory of the archive, to write it again
+        after the new entries, and truncates the file before it.
+        """
+        size = self.file.seek(0, os.SEEK_END)
+        tail_start = max(0, size - MAX_TAIL)
+        self.file.seek(tail_start)
+        tail = self.file.read()
+        pos = tail.rfind(END_SIG)
+        if pos < 0 or len(tail) - pos < END_RECORD.size:
+            msg = f"No end of central directory in {self.file.name}"
+            raise zipfile.BadZipFile(msg)
+        _, _, _, _, count, cd_size, cd_offset, _ = END_RECORD.unpack_from(
+            tail,
+            pos,
+        )
+        locator_pos = pos - ZIP64_LOCATOR.size
+        if locator_pos >= 0 and tail.startswith(ZIP64_LOCATOR_SIG, locator_pos):
+            _, _, end64_offset, _ = ZIP64_LOCATOR.unpack_from(
+                tail,
+                locator_pos,
+            )
+            self.file.seek(end64_offset)
+            record = ZIP64_END_RECORD.unpack(
+                self.file.read(ZIP64_END_RECORD.size),
+            )
+            if record[0] != ZIP64_END_SIG:
+                msg = f"Bad zip64 end of central directory in {self.file.name}"
+                raise zipfile.BadZipFile(msg)
+            count, cd_size, cd_offset = record[7:10]
+        self.file.seek(cd_offset)
+        central = self.file.read(cd_size)
+        if len(central) != cd_size or (
+            count and not central.startswith(CENTRAL_SIG)
+        ):
+            msg = f"Bad central directory in {self.file.name}"
+            raise zipfile.BadZipFile(msg)
+        self.central.append(central)
+        self.count = count
+        self.file.seek(cd_offset)
+        self.file.truncate()
+
+    def write(
+        self,
+        zinfo: zipfile.ZipInfo,
+        data: bytes,
+        crc: int,
+        file_size: int,
+    ) -> None:
+        """Writes an entry, see compress_entry"""
+        flags = 0 if zinfo.filename.isascii() else UTF8_FLAG
+        name = zinfo.filename.encode("utf-8")
+        year, month, day, hour, minute, second = zinfo.date_time
+        dos_date = (year - 1980) << 9 | month << 5 | day
+        dos_time = hour << 11 | minute << 5 | second // 2
+        offset = self.file.tell()
+        compress_size = len(data)
+        zip64 = max(file_size, compress_size) >= ZIP64_LIMIT
+        version = (
+            DEFLATED_VERSION
+            if zinfo.compress_type == zipfile.ZIP_DEFLATED
+            else STORED_VERSION
+        )
+
+        # The local header has both sizes in zip64 extra, if either
+        # is too large
+        sizes = [compress_size, file_size]
+        if zip64:
+            sizes = [ZIP64_MARKER, ZIP64_MARKER]
+        extra = (
+            struct.pack("<HHQQ", ZIP64_EXTRA_ID, 16, file_size, compress_size)
+            if zip64
+            else b""
+        )
+        self.file.write(
+            LOCAL_HEADER.pack(
+                LOCAL_SIG,
+                ZIP64_VERSION if zip64 else version,
+                flags,
+                zinfo.compress_type,
+                dos_time,
+                dos_date,
+                crc,
+                *sizes,
+                len(name),
+                len(extra),
+            ),
+        )
+        self.file.write(name)
+        self.file.write(extra)
+        self.file.write(data)
+
+        # The central directory has the values that are too large
+        # in zip64 extra, in this order
+        fields = [file_size, compress_size] if zip64 else []
+        header_offset = offset
+        if offset >= ZIP64_LIMIT:
+            header_offset = ZIP64_MARKER
+            fields.append(offset)
+        extra = (
+            struct.pack(
+                f"<HH{len(fields)}Q",
+                ZIP64_EXTRA_ID,
+                8 * len(fields),
+                *fields,
+            )
+            if fields
+            else b""
+        )
+        self.central.append(
+            CENTRAL_HEADER.pack(
+                CENTRAL_SIG,
+                ZIP64_VERSION,
+                zinfo.create_system,
+                ZIP64_VERSION if fields else version,
+                flags,
+                zinfo.compress_type,
+                dos_time,
+                dos_date,
+                crc,
+                *sizes,
+                len(name),
+                len(extra),
+                0,
+                0,
+                zinfo.internal_attr,
+                zinfo.external_attr,
+                header_offset,
+            )
+            + name
+            + extra,
+        )
+        self.count += 1
+
+    def close(self) -> None:
+        """Writes the central directory and closes the archive"""
+        if self.file.closed:
+            return
+        cd_offset = self.file.tell()
+        for record in self.central:
+            self.file.write(record)
+        cd_size = self.file.tell() - cd_offset
+        count = self.count
+        if (
+            count >= ZIP_MAX_ENTRIES
+            or cd_offset >= ZIP64_LIMIT
+            or cd_size >= ZIP64_LIMIT
+        ):
+            end64_offset = self.file.tell()
+            self.file.write(
+                ZIP64_END_RECORD.pack(
+                    ZIP64_END_SIG,
+                    # Size of the rest of the record
+                    ZIP64_END_RECORD.size - 12,
+                    ZIP64_VERSION,
+                    ZIP64_VERSION,
+                    0,
+                    0,
+                    count,
+                    count,
+                    cd_size,
+                    cd_offset,
+                ),
+            )
+            self.file.write(
+                ZIP64_LOCATOR.pack(ZIP64_LOCATOR_SIG, 0, end64_offset, 1),
+            )
+            count = ZIP64_COUNT_MARKER
+            cd_size = ZIP64_MARKER
+            cd_offset = ZIP64_MARKER
+        self.file.write(
+            END_RECORD.pack(END_SIG, 0, 0, count, count, cd_size, cd_offset, 0),
+        )
+        self.file.close()
@@ -11,8 +11,7 @@ from datetime import datetime
 from decimal import Decimal
 from pathlib import Path
 
-from scrapers import settings
-from scrapers.base import BaseScraper
+from scrapers import fileio, settings
 
 logging.config.dictConfig(settings.LOGGING)
 log = logging.getLogger("shopstats")
@@ -52,7 +51,7 @@ def parse_args():
 def main():
     args = parse_args()
     log.setLevel(level=args.loglevel)
-    shop_json = BaseScraper.read(
+    shop_json = fileio.read(
         Path(settings.OUTPUT_FOLDER) / Path(args.source + ".json"),
         from_json=True,
     )